@@ -1,122 +1,490 @@
+import time
+_run_started = time.perf_counter() # Startup/rerun budget (V8.0): imports included
 import streamlit as st
+from streamlit.errors import StreamlitAPIException
 import pandas as pd
-import time
+import numpy as np
 from datetime import datetime
-import plotly.express as px
 import json
-from streamlit_gsheets import GSheetsConnection
-import extra_streamlit_components as stx
+import os
+import uuid
+import collections
+from storage import GSheetsBackend, MemoryBackend, SESSION_COLUMNS
+from sheets_quota import QuotaGate
+from sync_worker import SyncWorker
+from session_hub import SessionHub
+from local_store import LocalStore
+from history_cache import HistoryCache
+from history_ingest import ingest_history, split_notes, concat_sessions
+from history_view import downsample_curve, filter_sessions, page_sessions, PAGE_SIZE
+from rollups import Rollups, BUCKET_FORMATS
+import ledger as ledger_ops
+from ledger import get_ledger
+from player_import import read_import, validate_import, build_players
+import snapshot_codec
+import session_events
+import profiler
+import poker_core
+from poker_core import KEYS_TO_PERSIST, new_session_state, load_state
+from translations import TRANSLATIONS
+
+_imports_s = time.perf_counter() - _run_started
 
 # --- Configuration & Setup ---
 st.set_page_config(page_title="Poker Host CRM v5.5", page_icon="♠️", layout="wide")
 
-# --- Google Sheets Connection ---
-conn = st.connection("gsheets", type=GSheetsConnection)
+# --- Rerun Profiling (V7.9) ---
+# Only while Admin Mode's profiler is switched on; otherwise spans are no-ops
+PROFILE_RUNS = 50
+if st.session_state.get('profiler_on'):
+    profiler.start_run(st.session_state.setdefault('profile_history', collections.deque(maxlen=PROFILE_RUNS)), st.session_state)
+else:
+    profiler.stop()
+    st.session_state.pop('_profile_run', None)
+
+# --- Storage Backend (V6.5) ---
+# [storage] backend = "gsheets" (default) or "memory" for the offline stand-in,
+#           history = "partitioned" (one tab per host, default) or "shared" (legacy single tab)
+try:
+    STORAGE_CFG = dict(st.secrets.get("storage", {}))
+except Exception:
+    STORAGE_CFG = {}
+# [quota] read_per_min / write_per_min (whole app), host_read_per_min / host_write_per_min,
+#         max_retries, base_delay, max_delay, batch_window (V7.8)
+try:
+    QUOTA_CFG = dict(st.secrets.get("quota", {}))
+except Exception:
+    QUOTA_CFG = {}
+# [budget] cold_start_ms / rerun_setup_ms: targets shown in Admin Mode (V8.0)
+try:
+    BUDGET_CFG = dict(st.secrets.get("budget", {}))
+except Exception:
+    BUDGET_CFG = {}
+COLD_START_BUDGET_MS = float(BUDGET_CFG.get("cold_start_ms", 3000))
+RERUN_SETUP_BUDGET_MS = float(BUDGET_CFG.get("rerun_setup_ms", 50))
 
 # --- 1. Constants & Setup ---
-KEYS_TO_PERSIST = [
-    'players', 'log', 'expenses_log', 'rake_log', 'insurance_log', 
-    'income_rake', 'income_insurance', 'game_mode', 'fee_cash_collected', 'start_time'
-]
+# Persisted keys, the empty session and the money math live in poker_core (V8.0)
+
+# Flight Recorder write mode: "rows" = targeted per-host row writes (V6.2), "sheet" = legacy full rewrite
+try:
+    RECORDER_CFG = dict(st.secrets.get("flight_recorder", {}))
+except Exception:
+    RECORDER_CFG = {}
+RECORDER_MODE = RECORDER_CFG.get("mode", "rows")
+SYNC_DEBOUNCE_SEC = float(RECORDER_CFG.get("debounce", 1.5))
+CHECKPOINT_EVERY = int(RECORDER_CFG.get("checkpoint_every", 50)) # Events between full snapshots (V7.5)
+LIVE_POLL_SEC = float(RECORDER_CFG.get("live_poll", 1.0)) # How often other devices' changes are picked up (V7.7)
+
+# [history_cache] dir = folder for the local Parquet copies of session history,
+#                 refresh_sec = how stale a copy may get before the worker fetches newer rows (V8.0)
+try:
+    HISTORY_CACHE_CFG = dict(st.secrets.get("history_cache", {}))
+except Exception:
+    HISTORY_CACHE_CFG = {}
+HISTORY_REFRESH_SEC = float(HISTORY_CACHE_CFG.get("refresh_sec", 60))
 
+@st.cache_resource
+def get_backend():
+    """Process-wide storage backend; every cloud read/write goes through it"""
+    options = dict(STORAGE_CFG)
+    kind = options.pop("backend", "gsheets")
+    quota = QuotaGate(**QUOTA_CFG) # Rate limits, backoff and batching under every Sheets call
+    if kind == "memory":
+        return MemoryBackend(mode=RECORDER_MODE, quota=quota, **options)
+    from streamlit_gsheets import GSheetsConnection # Pulls in gspread/google-auth: only when used (V8.0)
+    return GSheetsBackend(
+        st.connection("gsheets", type=GSheetsConnection), mode=RECORDER_MODE,
+        history=options.get("history", "partitioned"), quota=quota
+    )
 
 
 # --- FLIGHT RECORDER FUNCTIONS (Persistence) ---
-def sync_state_to_cloud():
-    """Saves current session state to 'active_state' worksheet"""
-    if not st.session_state.get('authenticated'): return
+# Local SQLite is the primary store (V6.4); the sync worker mirrors it to GSheets.
+@st.cache_resource
+def get_local_store():
+    """Process-wide SQLite store for snapshots and session history"""
+    default_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "poker_crm.db")
+    return LocalStore(RECORDER_CFG.get("local_db", default_path))
 
-    # 1. Gather State (Dynamic)
-    state_payload = {k: st.session_state.get(k) for k in KEYS_TO_PERSIST}
-    
-    json_str = json.dumps(state_payload)
+def push_snapshot(host_id, record):
+    """Writes (or wipes, if State_JSON is empty) one host's row in 'active_state'"""
+    if record["State_JSON"]:
+        get_backend().write_snapshot(host_id, record)
+    else:
+        get_backend().clear_snapshot(host_id, record.get("Revision"))
+
+def push_session(record, verify=False):
+    """Appends one finished session to the history worksheet (idempotent via Session_ID)"""
+    get_backend().append_history(record, verify=verify)
+    get_history_cache().want(record.get("Host_ID")) # Pulled into the local copy by this same worker run
+
+def replicate_to_cloud(host_id, _job):
+    """Mirrors everything the local store has not yet pushed (runs on the sync worker thread)"""
+    store = get_local_store()
+    snap = store.load_snapshot(host_id)
+    if snap and not snap['synced']:
+        try:
+            # A wipe tombstone carries the wipe's head: older checkpoints of the wiped session must not land over it
+            revision = snap['seq'] if snap['state_json'] else snap['head_seq']
+            push_snapshot(host_id, {"Last_Update": snap['updated_at'], "State_JSON": snap['state_json'] or "", "Revision": revision})
+        except session_events.RevisionConflict as e:
+            print(f"Kept newer cloud snapshot: {e}") # Another server pushed a later checkpoint
+        store.mark_snapshot_synced(host_id, snap['rev'])
+    events = store.unsynced_events(host_id)
+    if events:
+        get_backend().append_events(host_id, events) # One append for the whole batch
+        store.mark_events_synced(host_id, events[-1][0])
+    for row_id, record_json, attempts in store.unsynced_sessions(host_id):
+        # A previous attempt may have reached the sheet before failing: check before re-sending
+        store.mark_session_attempt(row_id)
+        push_session(json.loads(record_json), verify=attempts > 0)
+        store.mark_session_synced(row_id)
+    history = get_history_cache()
+    if history.is_wanted(host_id):
+        history.sync(host_id, history_fetcher(host_id), rollup_synced_rows(host_id)) # Only the rows after the cache's watermark
+
+@st.cache_resource
+def get_sync_worker(host_id):
+    """One write-behind worker per host, shared by every browser session of that host"""
+    return SyncWorker(host_id, replicate_to_cloud, debounce=SYNC_DEBOUNCE_SEC)
+
+@st.cache_resource
+def get_session_hub():
+    """Process-wide live session hub: every browser session of a host attaches to it (V7.7)"""
+    return SessionHub()
+
+@st.cache_resource
+def get_run_budget():
+    """Process-wide cold start / rerun setup timings (V8.0)"""
+    return profiler.RunBudget()
+
+def hub_session_id():
+    """This browser session's id on the hub"""
+    if 'hub_session' not in st.session_state:
+        st.session_state['hub_session'] = uuid.uuid4().hex
+    return st.session_state['hub_session']
+
+@profiler.timed("sync")
+def sync_state_to_cloud(wait=False, checkpoint=False):
+    """Commits new session events locally and queues them for the cloud (V7.5)
+
+    Only the events recorded since the last call are appended; a full
+    checkpoint of the state is written every CHECKPOINT_EVERY events (or when
+    asked). The commit is checked against the host's revision (V7.6): if
+    another device got there first, its changes are merged in and the commit
+    retried. The host's sync worker mirrors everything. wait=True blocks
+    until the cloud copy is up to date.
+    """
+    if not st.session_state.get('authenticated'): return False
     host_id = st.session_state.get('host_id')
-    if not host_id: return
+    if not host_id: return False
+    store = get_local_store()
 
-    now_str = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    
-    # 2. Safe Sync Wrapper
-    try:
-        # Read Existing
+    for _ in range(3):
+        # 1. Pending events, recorded on top of base
+        pending = st.session_state.get('events') or []
+        seq = st.session_state.get('event_seq', 0)
+        base = pending[0]['seq'] - 1 if pending else seq
+
+        # 2. Checkpoint when due (Dynamic keys)
+        ckpt = None
+        last = st.session_state.get('checkpoint_seq')
+        if checkpoint or last is None or seq - last >= CHECKPOINT_EVERY:
+            state_payload = poker_core.snapshot_payload(st.session_state)
+            with profiler.span("encode"):
+                json_str = snapshot_codec.encode(state_payload) # Compressed + checksummed (V7.4)
+            ckpt = (datetime.now().strftime("%Y-%m-%d %H:%M:%S"), json_str)
+
+        # 3. Commit, unless another device moved the session on since base;
+        #    log segments sealed since the last commit are archived with it (V8.0)
+        segments = poker_core.unarchived_segments(st.session_state)
         try:
-            df_state = conn.read(worksheet="active_state", ttl=0)
-        except:
-            df_state = pd.DataFrame(columns=["Host_ID", "Last_Update", "State_JSON"])
-            
-        # Upsert
-        new_row = {"Host_ID": host_id, "Last_Update": now_str, "State_JSON": json_str}
-        
-        if not df_state.empty and "Host_ID" in df_state.columns:
-            if host_id in df_state["Host_ID"].values:
-                df_state.loc[df_state["Host_ID"] == host_id, ["Last_Update", "State_JSON"]] = [now_str, json_str]
-            else:
-                df_state = pd.concat([df_state, pd.DataFrame([new_row])], ignore_index=True)
-        else:
-            df_state = pd.DataFrame([new_row])
-            
-        # Push
-        conn.update(worksheet="active_state", data=df_state)
-    except Exception as e:
-        # V6.0 Safe Sync: Log error but don't crash app
-        print(f"Sync failed (Non-critical): {e}")
+            store.commit_events(
+                host_id, base, [(e['seq'], json.dumps(e)) for e in pending], checkpoint=ckpt,
+                segments=[(k, n, json.dumps(entries)) for k, n, entries in segments]
+            )
+            break
+        except session_events.RevisionConflict:
+            merge_concurrent(host_id)
+    else:
+        return False
+    st.session_state['events'] = []
+    poker_core.mark_archived(st.session_state, segments)
+    if ckpt:
+        st.session_state['checkpoint_seq'] = seq
+    if pending:
+        get_session_hub().publish(host_id, pending, seq, source=hub_session_id()) # Other devices pick these up
+
+    # 4. Hand off to the worker (cloud errors are logged there, never raised here)
+    worker = get_sync_worker(host_id)
+    worker.notify("snapshot")
+    if wait:
+        return worker.flush()
+    return True
+
+def forget_chip_inputs(events):
+    """Drops card chip inputs of players whose counts changed elsewhere, so they re-read the new values"""
+    for event in events:
+        if event['type'] in ("chips_set", "chips_counted", "player_added"):
+            for name in event.get('names') or [event['name']]:
+                for k in get_chip_config():
+                    st.session_state.pop(f"c_{name}_{k}", None)
+
+def merge_concurrent(host_id, notify=True):
+    """Rebases this session's uncommitted events onto what another device committed first (V7.6)"""
+    store = get_local_store()
+    ours = st.session_state.get('events') or []
+    base = ours[0]['seq'] - 1 if ours else st.session_state.get('event_seq', 0)
+    head = store.head(host_id)
+    state, _ = state_at(host_id, head)
+    state['event_seq'] = max(state['event_seq'], head) # After a wipe the log is empty but keeps counting
+    theirs = [json.loads(e) for e in store.events(host_id, after=base)]
+    dropped = session_events.rebase(state, get_chip_config(), theirs, ours)
+
+    for k in KEYS_TO_PERSIST + ['events']:
+        st.session_state[k] = state[k]
+    ledger_ops.invalidate_ledger(st.session_state)
+    forget_chip_inputs(theirs + dropped)
+    st.session_state['checkpoint_seq'] = min(st.session_state.get('checkpoint_seq') or 0, head)
+    if theirs and notify:
+        st.toast(f"🔀 Merged {len(theirs)} change(s) from another device")
+    for event in dropped:
+        st.toast(f"⚠️ Not applied (changed on another device): {session_events.describe(event)}")
+
+@profiler.timed("live_pull")
+def pull_live_changes():
+    """Applies what this host's other sessions committed since our last look (V7.7); True if anything changed"""
+    host_id = st.session_state.get('host_id')
+    hub = get_session_hub()
+    sub = hub.subscribe(host_id, hub_session_id())
+    if not sub.changed.is_set():
+        return False
+    sub.changed.clear()
+    seq = st.session_state.get('event_seq', 0)
+    if hub.head(host_id) <= seq:
+        return False
+    events = hub.since(host_id, seq)
+    if events is None or st.session_state.get('events'):
+        # A gap (wipe, long idle) or uncommitted edits of our own: rebase through the store
+        merge_concurrent(host_id, notify=False)
+        return True
+    session_events.replay(st.session_state, get_chip_config(), events) # Straight from memory, ledger kept incremental
+    forget_chip_inputs(events)
+    return True
+
+def load_cloud_snapshot(host_id):
+    """Returns {'Last_Update', 'State_JSON', 'Revision'} for a host from 'active_state', or None"""
+    return get_backend().read_snapshot(host_id)
+
+def get_chip_config():
+    return {chip: st.session_state.get(f"cfg_{chip}", value) for chip, value in poker_core.DEFAULT_CHIP_VALUES.items()}
+
+def apply_snapshot(json_str, load_tail):
+    """Restores a checkpoint, then replays the events recorded after it (V7.5).
+
+    load_tail(seq) returns the JSON events after seq; returns the checkpoint's seq.
+    """
+    state = load_state(json_str)
+    for k, v in state.items():
+        st.session_state[k] = v
+    ledger_ops.invalidate_ledger(st.session_state) # Rebuilt from the restored players
+    st.session_state['events'] = []
+    st.session_state['checkpoint_seq'] = state['event_seq']
+    tail = [json.loads(e) for e in load_tail(state['event_seq'])]
+    session_events.replay(st.session_state, get_chip_config(), tail)
+    return state['event_seq']
+
+def state_at(host_id, seq, pending=()):
+    """The session as it stood right after event seq: nearest checkpoint + replay (V7.5).
 
-def restore_state_from_cloud():
+    pending are this session's not-yet-committed events; returns (state,
+    event) where event is the one at seq (or None).
+    """
+    ckpt = get_local_store().checkpoint_at(host_id, seq)
+    state = new_session_state()
+    if ckpt:
+        state.update(load_state(ckpt[1]))
+    tail = [json.loads(e) for e in get_local_store().events(host_id, after=state['event_seq'], upto=seq)]
+    tail += [e for e in pending if state['event_seq'] < e['seq'] <= seq]
+    session_events.replay(state, get_chip_config(), tail)
+    return state, next((e for e in tail if e['seq'] == seq), None)
+
+def restore_state_from_cloud(record=None):
     """Restores session state from 'active_state' worksheet if exists"""
     try:
         host_id = st.session_state.get('host_id')
         if not host_id: return False
 
-        try:
-            df_state = conn.read(worksheet="active_state", ttl=0)
-        except:
-            return False # Sheet doesn't exist
-        
-        if not df_state.empty and "Host_ID" in df_state.columns:
-            row = df_state[df_state["Host_ID"] == host_id]
-            if not row.empty:
-                json_str = row.iloc[0]["State_JSON"]
-                if not json_str: return False
+        record = record or load_cloud_snapshot(host_id)
+        if not record: return False
 
-                payload = json.loads(json_str)
-                
-                # Restore Keys (Dynamic)
-                for k in KEYS_TO_PERSIST:
-                    if k in payload:
-                        st.session_state[k] = payload[k]
-                
-                st.toast("🔄 Game State Restored from Cloud", icon="☁️")
-                return True
+        tail = []
+        def load_tail(seq):
+            tail.extend(get_backend().read_events(host_id, after=seq))
+            return [e for _, e in tail]
+        seq = apply_snapshot(record["State_JSON"], load_tail)
+        # Seed the local store so the next restore stays offline
+        store = get_local_store()
+        store.save_snapshot(host_id, record["Last_Update"], record["State_JSON"], synced=True, seq=seq)
+        store.save_checkpoint(host_id, seq, record["State_JSON"])
+        if tail:
+            store.append_events(host_id, tail)
+            store.mark_events_synced(host_id, tail[-1][0])
+
+        st.toast("🔄 Game State Restored from Cloud", icon="☁️")
+        return True
+    except snapshot_codec.SnapshotError as e:
+        print(f"Restore failed: {e}")
+        st.toast(f"Saved game state is unreadable: {e}", icon="⚠️")
     except Exception as e:
         print(f"Restore failed: {e}")
     return False
 
-def wipe_snapshot():
-    """Clears persistence for current host"""
+@profiler.timed("restore")
+def restore_state():
+    """Restores session state from the local store, falling back to the cloud copy
+    only when the local one is missing or older (V6.4)"""
+    host_id = st.session_state.get('host_id')
+    if not host_id: return False
+
+    store = get_local_store()
+    local = store.load_snapshot(host_id)
+    local_dirty = (local and not local['synced']) or store.unsynced_events(host_id)
+    if store.unsynced_sessions(host_id) or local_dirty:
+        get_sync_worker(host_id).notify("resume") # Catch up on anything left from an offline stretch
+
+    if not local_dirty and not get_session_hub().is_live(host_id):
+        # Local copy is mirrored (or missing) and no other device is live here: the cloud can only be the same or newer
+        try:
+            cloud = load_cloud_snapshot(host_id)
+        except Exception as e:
+            print(f"Cloud check failed (offline?): {e}")
+            cloud = None
+        if cloud and (not local or (
+            cloud["Revision"] > local['head_seq'] if cloud["Revision"] else cloud["Last_Update"] > local['updated_at']
+        )):
+            return restore_state_from_cloud(cloud)
+
+    if local and not local['state_json']:
+        st.session_state['event_seq'] = local['head_seq'] # Wiped: the next session continues the count
+    if not local or not local['state_json']: return False # Missing or wiped
     try:
-        host_id = st.session_state.get('host_id')
-        df_state = conn.read(worksheet="active_state", ttl=0)
-        if not df_state.empty and "Host_ID" in df_state.columns:
-            # Drop row
-            df_state = df_state[df_state["Host_ID"] != host_id]
-            conn.update(worksheet="active_state", data=df_state)
-    except:
-        pass
+        seq = apply_snapshot(local['state_json'], lambda seq: store.events(host_id, after=seq))
+        store.save_checkpoint(host_id, seq, local['state_json']) # No-op unless a pre-V7.5 snapshot
+    except snapshot_codec.SnapshotError as e:
+        print(f"Restore failed: {e}")
+        st.toast(f"Saved game state is unreadable: {e}", icon="⚠️")
+        return False
+    except Exception as e:
+        print(f"Restore failed: {e}")
+        return False
+    st.toast("💾 Game State Restored (Local)")
+    return True
+
+def wipe_snapshot():
+    """Clears persistence for current host (locally now, in the cloud via the sync worker)"""
+    host_id = st.session_state.get('host_id')
+    if not host_id: return
+    head = get_local_store().wipe_snapshot(host_id, datetime.now().strftime("%Y-%m-%d %H:%M:%S")) # Events + checkpoints too
+    # This device carries on from the wipe; others holding the old session will conflict and rebase
+    st.session_state['event_seq'] = head
+    st.session_state['events'] = []
+    st.session_state['checkpoint_seq'] = None
+    get_session_hub().publish(host_id, [], head, source=hub_session_id())
+    get_sync_worker(host_id).notify("wipe")
+
+@st.cache_resource
+def get_rollups():
+    """Incremental analytics aggregates, kept in the local store (V6.8)"""
+    return Rollups(get_local_store())
 
+@st.cache_resource
+def get_history_cache():
+    """Process-wide on-disk copy of every host's session history (V8.0)"""
+    default_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "history_cache")
+    return HistoryCache(HISTORY_CACHE_CFG.get("dir", default_dir), SESSION_COLUMNS)
+
+def history_fetcher(host_id):
+    """fetch(watermark) for HistoryCache.sync: the host's sessions after the watermark"""
+    return lambda watermark: get_backend().read_history_since(host_id, watermark)
+
+def rollup_synced_rows(host_id):
+    """on_rows for HistoryCache.sync: sessions other servers saved reach the rollups too"""
+    def on_rows(rows, full):
+        if full:
+            get_rollups().reset(host_id) # Re-aggregated from the fresh copy on the next Analytics visit
+        else:
+            get_rollups().apply_all(host_id, ingest_history(pd.DataFrame(rows))[0].to_dict("records"))
+    return on_rows
+
+def local_sessions(host_id, unsynced=False):
+    """Sessions recorded on this server as a frame: all of them, or those not mirrored yet"""
+    store = get_local_store()
+    records = [r for _, r, _ in store.unsynced_sessions(host_id)] if unsynced else store.sessions(host_id)
+    return pd.DataFrame([json.loads(r) for r in records], columns=SESSION_COLUMNS)
+
+def history_ready(host_id):
+    """True if the host's history cache can be served; syncs it first if there is none yet"""
+    history = get_history_cache()
+    if not history.has(host_id):
+        try:
+            history.sync(host_id, history_fetcher(host_id), rollup_synced_rows(host_id)) # First visit: one full read
+        except Exception:
+            return False # Offline with nothing cached yet
+    elif history.age(host_id) > HISTORY_REFRESH_SEC:
+        # Served from the cache right away; the sync worker fetches the newer rows
+        history.want(host_id)
+        get_sync_worker(host_id).notify("history")
+    return True
+
+@profiler.timed("history_read")
 def get_analytics_data():
-    try:
-        df = conn.read(ttl="10s")
-        current_host = st.session_state.get('host_id')
-        if not df.empty and 'Host_ID' in df.columns:
-            df = df[df['Host_ID'] == current_host]
-        return df
-    except:
-        return pd.DataFrame()
+    """The host's sessions, typed (history_ingest), Notes left out: see get_session_notes()"""
+    current_host = st.session_state.get('host_id')
+    if not history_ready(current_host):
+        # Offline: serve the locally recorded history
+        return ingest_history(local_sessions(current_host))[0]
+    # Sessions saved locally but not mirrored yet
+    pending = local_sessions(current_host, unsynced=True)
+    return concat_sessions([get_history_cache().frame(current_host), ingest_history(pending)[0]])
 
-def save_session_to_cloud(mode, buyin, cashout, gross, expenses, net, share, notes):
-    existing_data = conn.read(ttl="10s")
-    new_row = pd.DataFrame([{
+def get_session_notes():
+    """Session_ID -> note and expense details; only read when the session log is shown (V8.0)"""
+    current_host = st.session_state.get('host_id')
+    if not history_ready(current_host):
+        return split_notes(local_sessions(current_host))
+    pending = split_notes(local_sessions(current_host, unsynced=True))
+    return pd.concat([get_history_cache().notes(current_host), pending], ignore_index=True)
+
+def session_expenses(host_id):
+    """Every expense entry of the live session, sealed ones included (V8.0).
+
+    Sealed segments are archived in the local store only: after a restore on
+    another server, or a lost local DB, the entries are rebuilt from the event
+    log instead, topped up from the cloud copy when the local one is short.
+    """
+    log = st.session_state['expenses_log']
+    archived = [x for seg in get_local_store().log_segments(host_id, 'expenses_log') for x in json.loads(seg)]
+    if len(archived) >= log.sealed:
+        return log.entries(lambda: archived[:log.sealed])
+    events = [json.loads(e) for e in get_local_store().events(host_id)] + st.session_state.get('events', [])
+    expenses = session_events.expense_entries(events)
+    if len(expenses) < len(log):
+        try:
+            cloud = [json.loads(e) for _, e in get_backend().read_events(host_id)]
+            expenses = session_events.expense_entries(cloud + events)
+        except Exception as e:
+            print(f"Expense log read failed: {e}")
+    return expenses
+
+def save_session_to_cloud(mode,buyin, cashout, gross, expenses, net, share, notes):
+    """Records a finished session locally and queues it for the history worksheet"""
+    host_id = st.session_state.get('host_id', 'unknown')
+    record = {
+        "Session_ID": uuid.uuid4().hex, # Stable across retries, so re-sends are idempotent
         "Timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-        "Host_ID": st.session_state.get('host_id', 'unknown'),
+        "Host_ID": host_id,
         "Mode": mode,
         "Total_Buyin": buyin,
         "Total_Cashout": cashout,
@@ -125,16 +493,29 @@ def save_session_to_cloud(mode, buyin, cashout, gross, expenses, net, share, not
         "Net_Profit": net,
         "My_Share": share,
         "Notes": notes
-    }])
-    if existing_data.empty:
-        updated_df = new_row
-    else:
-        updated_df = pd.concat([existing_data, new_row], ignore_index=True)
-    conn.update(data=updated_df)
-    st.cache_data.clear()
+    }
+    get_local_store().add_session(host_id, json.dumps(record))
+    get_rollups().apply(host_id, record) # KPIs/charts update incrementally
+    get_sync_worker(host_id).notify("session")
 
-# --- 1. Initialize Cookie Manager ---
-cookie_manager = stx.CookieManager(key="auth_cookie_manager")
+# --- 1. Cookie Manager ---
+# The cookie component costs a browser round trip per run, so it is only
+# rendered while logged out (auto-login reads it) or to apply a cookie change
+# the previous run queued; authenticated reruns skip it (V8.0).
+_cookie_manager = None
+
+def get_cookie_manager():
+    """This run's cookie component, rendered on first use"""
+    global _cookie_manager
+    if _cookie_manager is None:
+        import extra_streamlit_components as stx
+        with profiler.span("cookies"):
+            _cookie_manager = stx.CookieManager(key="auth_cookie_manager")
+    return _cookie_manager
+
+def queue_cookie(value=None):
+    """Sets (value) or deletes (None) host_token on the next run, which isn't cut short by st.rerun()"""
+    st.session_state['pending_cookie'] = value or ""
 
 # --- 2. Session State Initialization ---
 if 'authenticated' not in st.session_state:
@@ -155,38 +536,41 @@ except Exception as e:
 # Only attempt auto-login if:
 # A. We are NOT authenticated
 # B. We did NOT just log out (The Fix)
-cookie_token = None
-try:
-    cookie_token = cookie_manager.get("host_token")
-except:
-    pass
+if 'pending_cookie' in st.session_state:
+    token = st.session_state.pop('pending_cookie')
+    try:
+        if token:
+            get_cookie_manager().set("host_token", token, key="set_cookie", expires_at=datetime.now() + pd.Timedelta(days=7))
+        else:
+            get_cookie_manager().delete("host_token")
+    except:
+        pass
 
 if not st.session_state['authenticated'] and not st.session_state['just_logged_out']:
-    if cookie_token:
-        # Check if cookie matches a valid user
-        found_user = None
-        for uid, upw in HOSTS.items():
-            if cookie_token == uid: # In prod, use a hash, but this works for now
-                found_user = uid
-                break
-        
-        if found_user:
-            st.session_state['authenticated'] = True
-            st.session_state['host_id'] = found_user
-            # We do NOT rerun here to avoid weird loops, just let the app flow
-            st.toast(f"⚡ Auto-logged in as {found_user}")
-            time.sleep(0.5)
+    cookie_token = None
+    try:
+        cookie_token = get_cookie_manager().get("host_token")
+    except:
+        pass
+
+    # The token is the host ID: one dict lookup (in prod, use a hash)
+    if cookie_token and cookie_token in HOSTS:
+        st.session_state['authenticated'] = True
+        st.session_state['host_id'] = cookie_token
+        # We do NOT rerun here to avoid weird loops, just let the app flow
+        st.toast(f"⚡ Auto-logged in as {cookie_token}")
+        restore_state() # Local store first, so this is cheap
 
 # --- 5. Logout Logic (In Sidebar) ---
 if st.session_state['authenticated']:
     st.sidebar.divider()
     st.sidebar.caption(f"User: {st.session_state['host_id']}")
     if st.sidebar.button("🚪 Logout", type="primary"):
-        # A. Delete Cookie
-        try:
-            cookie_manager.delete("host_token")
-        except:
-            pass
+        # Anything still queued is pushed by the host's worker, which outlives this session
+        get_session_hub().unsubscribe(st.session_state['host_id'], hub_session_id())
+
+        # A. Delete Cookie (on the login page, once this rerun is through)
+        queue_cookie(None)
         
         # B. Clear Session
         st.session_state['authenticated'] = False
@@ -199,13 +583,21 @@ if st.session_state['authenticated']:
         st.rerun()
 
     # Manual Force Save (V6.1)
-    if st.sidebar.button("💾 Force Flight Recorder"):
-        sync_state_to_cloud()
-        st.toast("State Saved Manually")
+    fr1, fr2 = st.sidebar.columns([3, 2])
+    if fr1.button("💾 Force Flight Recorder"):
+        if sync_state_to_cloud(wait=True, checkpoint=True):
+            st.toast("State Saved Manually")
+        else:
+            st.toast("⚠️ Save failed - will retry in background")
+
+    # Write-behind status (V6.3)
+    sync_status = get_sync_worker(st.session_state['host_id']).status
+    fr2.caption({"pending": "⏳ Pending", "synced": "✅ Synced", "failed": "⚠️ Failed"}[sync_status])
 
 
 # --- 6. Manual Login Page ---
 if not st.session_state['authenticated']:
+    get_run_budget().record_setup(_imports_s, time.perf_counter() - _run_started)
     c1, c2, c3 = st.columns([1,2,1])
     with c2:
         st.title("🔒 Poker CRM Login")
@@ -219,20 +611,13 @@ if not st.session_state['authenticated']:
                 st.session_state['host_id'] = uid
                 st.session_state['just_logged_out'] = False # Reset lock
                 
-                if remember:
-                    cookie_manager.set("host_token", uid, key="set_cookie", expires_at=datetime.now() + pd.Timedelta(days=7))
-                else:
-                    # If they didn't check remember, ensure no old cookie remains
-                    try:
-                        cookie_manager.delete("host_token")
-                    except:
-                        pass
+                # Set on the next run; if they didn't check remember, ensure no old cookie remains
+                queue_cookie(uid if remember else None)
                 
                 # Restore Data
-                if restore_state_from_cloud():
+                if restore_state():
                      st.toast("Session Restored!", icon="🔄")
                 
-                time.sleep(0.5)
                 st.rerun()
             else:
                 st.error("Invalid ID or Password")
@@ -241,253 +626,285 @@ if not st.session_state['authenticated']:
 
 # --- SESSION STATE DEFAULTS ---
 # Initialize defaults only if keys don't exist (i.e. not restored)
-defaults = {
-    'players': {},
-    'start_time': time.time(),
-    'log': [],
-    'expenses_log': [],
-    'rake_log': [],
-    'insurance_log': [],
-    'income_rake': 0.0,
-    'income_insurance': 0.0,
-    'fee_cash_collected': 0.0,
-    'game_mode': "Time Charge (Venue Fee)"
-}
+defaults = new_session_state()
 
 for k, v in defaults.items():
     if k not in st.session_state:
         st.session_state[k] = v
 
+# --- Live updates from this host's other devices (V7.7) ---
+pull_live_changes() # Full run: fold them in before anything renders
+
+@st.fragment(run_every=LIVE_POLL_SEC)
+def live_updates():
+    # Between full runs: a cheap flag check each tick, and a full rerun only when something arrived
+    if pull_live_changes():
+        st.rerun()
+    others = get_session_hub().subscribers(st.session_state['host_id']) - 1
+    if others > 0:
+        st.caption(f"👥 Live with {others} other device(s)")
+
+with st.sidebar:
+    live_updates()
+
 # Helper
-def log_event(event, amount, type_):
-    st.session_state['log'].append({
-        "Time": datetime.now().strftime("%H:%M:%S"),
-        "Event": event,
-        "Amount": f"${amount:,.0f}",
-        "Type": type_
-    })
-    sync_state_to_cloud() # Auto-Save on Log
-
-# --- Translations ---
-translations = {
-    "English": {
-        "nav_header": "Navigation",
-        "nav_home": "♠️ Active Session",
-        "nav_analytics": "📊 Analytics Dashboard",
-        "gamemode_header": "Game Mode",
-        "mode_time": "Time Charge (Venue Fee)",
-        "mode_rake": "Rake Game (Profit Share)",
-        "sidebar_header": "🔧 Chip Config",
-        "app_title": "🃏 Poker Host CRM v5.5",
-        "live_header": "🎲 Active Players",
-        "paused_header": "🟡 Paused / Sit Out",
-        "history_header": "⚫ Cashed Out History",
-        "rebuy": "Re-buy",
-        "sit_out": "Sit Out", 
-        "return_seat": "Return",
-        "cashout": "Cash Out",
-        "fee": "Venue Fee",
-        "fee_deduct": "Deduct Stack",
-        "fee_cash": "Paid Cash",
-        "summary": "📊 Session Summary",
-        "save_session": "💾 Save Session to Cloud",
-        "saved": "Session Saved to GSheets!",
-        "analytics_title": "📈 Profit Analytics",
-        "kpi_lifetime": "Lifetime Profit",
-        "kpi_sessions": "Total Sessions",
-        "kpi_avg": "Avg Profit/Session",
-        "chip_white": "White", "chip_red": "Red", "chip_black": "Black", "chip_purple": "Purple", "chip_yellow": "Yellow",
-        "tab_expenses": "💸 Expenses",
-        "tab_income": "💰 Income & Risk",
-        "lbl_item": "Item Name",
-        "lbl_amount": "Amount",
-        "btn_add_exp": "Add Expense",
-        "lbl_rake": "Rake Collection",
-        "btn_add_rake": "Add Rake",
-        "lbl_ins": "Insurance / Risk",
-        "btn_add_ins": "Add Amount",
-        "total_rake": "Total Rake",
-        "total_ins": "Total Insurance",
-        "total_exp": "Total Expenses",
-        "gross_income": "Gross Income",
-        "net_profit": "Net Profit",
-        "my_share": "My Share",
-        "partner_share": "Partner Share",
-        "pct_share": "Host Share %",
-        "notes": "Session Notes",
-        "reset": "Reset All Data",
-        "confirm_out": "Confirm & Out",
-        "still_owes": "Still Owes",
-        "ins_calc": "🧮 Insurance Calculator",
-        "ins_bet": "Bet Amount",
-        "ins_outs": "Outs (1-20)",
-        "ins_odds": "Odds",
-        "ins_payout": "Potential Payout",
-        "btn_win": "✅ House Win (Keep Bet)",
-        "btn_loss": "❌ House Loss (Pay Out)",
-        "log_rake": "📜 Rake History",
-        "log_ins": "📉 Insurance History",
-        "pay_player": "🟢 Pay Player",
-        "player_owes": "🔴 Player Owes",
-        "audit_ok": "✅ System Balanced",
-        "audit_short": "🔴 SHORTAGE DETECTED",
-        "audit_surplus": "🟡 SURPLUS DETECTED",
-        "repay": "💰 Repay",
-        "btn_repay": "Confirm Repay"
-    },
-    "繁體中文": {
-        "nav_header": "功能導覽",
-        "nav_home": "♠️ 當前牌局",
-        "nav_analytics": "📊 數據中心",
-        "gamemode_header": "經營模式",
-        "mode_time": "計時局 (收清潔費)",
-        "mode_rake": "抽水局 (股東分潤)",
-        "sidebar_header": "🔧 籌碼設定",
-        "app_title": "🃏 撲克局務管理 v5.5",
-        "live_header": "🎲 在桌玩家",
-        "paused_header": "🟡 暫離 / Sit Out",
-        "history_header": "⚫ 已離桌記錄",
-        "rebuy": "加買",
-        "sit_out": "暫離",
-        "return_seat": "回桌",
-        "cashout": "結算離桌",
-        "fee": "清潔費",
-        "fee_deduct": "籌碼扣除",
-        "fee_cash": "另外付現",
-        "summary": "📊 結算總表",
-        "save_session": "💾 保存牌局記錄 (雲端)",
-        "saved": "記錄已上傳 Google Sheets！",
-        "analytics_title": "📈 獲利分析報表",
-        "kpi_lifetime": "生涯總獲利",
-        "kpi_sessions": "總場次",
-        "kpi_avg": "場均獲利",
-        "chip_white": "白色", "chip_red": "紅色", "chip_black": "黑色", "chip_purple": "紫色", "chip_yellow": "黃色",
-        "tab_expenses": "💸 支出明細",
-        "tab_income": "💰 收入與風控",
-        "lbl_item": "項目名稱",
-        "lbl_amount": "金額",
-        "btn_add_exp": "新增支出",
-        "lbl_rake": "抽水管理",
-        "btn_add_rake": "新增抽水",
-        "lbl_ins": "保險 / 風控管理",
-        "btn_add_ins": "手動新增金額",
-        "total_rake": "總抽水",
-        "total_ins": "總保險獲利",
-        "total_exp": "總支出",
-        "gross_income": "總營收",
-        "net_profit": "淨利潤",
-        "my_share": "我的分潤",
-        "partner_share": "股東分潤",
-        "pct_share": "主辦佔比 %",
-        "notes": "備註",
-        "reset": "重置所有資料",
-        "confirm_out": "確認結算",
-        "still_owes": "尚欠款項",
-        "ins_calc": "🧮 保險計算器",
-        "ins_bet": "玩家買保險金額",
-        "ins_outs": "補牌數 (Outs)",
-        "ins_odds": "賠率",
-        "ins_payout": "潛在賠付額",
-        "btn_win": "✅ 沒中 (莊贏收錢)",
-        "btn_loss": "❌ 中了 (莊賠付錢)",
-        "log_rake": "📜 抽水記錄",
-        "log_ins": "📉 保險流水",
-        "pay_player": "🟢 應付玩家",
-        "player_owes": "🔴 玩家回補",
-        "audit_ok": "✅ 系統平衡 (無帳差)",
-        "audit_short": "🔴 警告：帳目短缺 (少籌碼)",
-        "audit_surplus": "🟡 警告：帳目盈餘 (多籌碼)",
-        "repay": "💰 還款 (轉現金)",
-        "btn_repay": "確認還款"
-    }
-}
+def show_log(key, newest_first=True, **kwargs):
+    """A session log's table: its cached view of the hot tail, plus how much is archived (V8.0)"""
+    log = st.session_state[key]
+    with profiler.span("log_tables"):
+        st.dataframe(log.view(newest_first), use_container_width=True, **kwargs)
+    if log.sealed:
+        st.caption(f"+ {log.sealed} older entries archived")
 
-# --- Chip Config (Helper for Audit) ---
-def get_chip_config():
-    return {
-        "white": st.session_state.get("cfg_white", 5),
-        "red": st.session_state.get("cfg_red", 25),
-        "black": st.session_state.get("cfg_black", 100),
-        "purple": st.session_state.get("cfg_purple", 500),
-        "yellow": st.session_state.get("cfg_yellow", 1000)
-    }
+def rerun_fragment():
+    """Reruns just the calling fragment (V7.1), or the whole app during a full run"""
+    try:
+        st.rerun(scope="fragment")
+    except StreamlitAPIException:
+        st.rerun()
 
+# --- Chip Config (Helper for Audit) ---
 # --- Sidebar Options ---
 st.sidebar.header("Settings") 
 
 
 lang = st.sidebar.radio("Language / 語言", ["English", "繁體中文"], horizontal=True, label_visibility="collapsed")
-t = translations[lang]
+t = TRANSLATIONS[lang]
 
 st.sidebar.divider()
 st.sidebar.header(t["nav_header"])
 page = st.sidebar.radio("Go to", ["Home", "Analytics"], label_visibility="collapsed")
+get_run_budget().record_setup(_imports_s, time.perf_counter() - _run_started) # Fixed cost ends: the page starts here
 
 # --- ADMIN MODE (V3.1.2) ---
 if st.sidebar.checkbox("🔧 Admin Mode"):
     st.sidebar.warning("⚠️ God Mode Active")
+    if RECORDER_MODE == "rows" and st.sidebar.button("🔄 Refresh Flight Recorder Index"):
+        try:
+            n_hosts = get_backend().refresh()
+            st.sidebar.success(f"Indexed {n_hosts} host rows")
+        except Exception as e:
+            st.sidebar.error(f"Error: {e}")
+
+    # Storage I/O accounting (V6.5)
+    with st.sidebar.expander(f"📡 Storage I/O ({get_backend().name})"):
+        io = get_backend().stats.snapshot()
+        s1, s2 = st.columns(2)
+        s1.metric("Reads", io["reads"], f"{io['bytes_read'] / 1024:,.1f} KB", delta_color="off")
+        s2.metric("Writes", io["writes"], f"{io['bytes_written'] / 1024:,.1f} KB", delta_color="off")
+        st.caption(f"Network time: {io['latency_s']:,.2f} s · Errors: {io['errors']}")
+        # Quota headroom (V7.8)
+        q = get_backend().quota.snapshot()
+        st.caption(
+            f"Last minute: {q['last_min']['read']}/{q['limits']['read']} reads · "
+            f"{q['last_min']['write']}/{q['limits']['write']} writes"
+        )
+        q1, q2, q3, q4 = st.columns(4)
+        q1.metric("Throttled", q["throttled"], f"{q['throttle_wait_s']:,.1f} s", delta_color="off")
+        q2.metric("Retried", q["retried"])
+        q3.metric("Dropped", q["dropped"])
+        q4.metric("Batched", q["batched"])
+        if io["by_op"]:
+            st.dataframe(pd.DataFrame([
+                {"Op": op, "Calls": v["calls"], "KB": round(v["bytes"] / 1024, 1), "Avg ms": round(v["seconds"] / v["calls"] * 1000, 1)}
+                for op, v in io["by_op"].items()
+            ]), hide_index=True, use_container_width=True)
+            st.caption("Last calls")
+            st.dataframe(pd.DataFrame(io["recent"][::-1]), hide_index=True, use_container_width=True, height=180)
+        if st.button("Reset Counters"):
+            get_backend().stats.reset()
+            get_backend().quota.reset()
+            st.rerun()
+
+    if st.sidebar.button("♻️ Rebuild Analytics Rollups"):
+        get_rollups().reset(st.session_state['host_id']) # Rebuilt from history on the next Analytics visit
+        st.sidebar.success("Rollups will be rebuilt")
+
+    # Local copy of the session history (V8.0)
+    with st.sidebar.expander("🗄️ History Cache"):
+        cached = get_history_cache().status(st.session_state['host_id'])
+        h1, h2 = st.columns(2)
+        h1.metric("Sessions", cached["rows"])
+        h2.metric("On Disk", f"{cached['bytes'] / 1024:,.1f} KB")
+        if cached["synced_at"]:
+            st.caption(f"Last sync: {datetime.fromtimestamp(cached['synced_at']).strftime('%Y-%m-%d %H:%M:%S')}")
+        if cached["watermark"]:
+            st.caption(f"Watermark: row {cached['watermark']['rows']} · {cached['watermark']['timestamp'] or '-'}")
+        problems = get_history_cache().report(st.session_state['host_id'])
+        if not problems.empty:
+            st.caption(f"{len(problems)} value(s) in {problems['Row'].nunique()} row(s) could not be typed")
+            st.dataframe(problems, hide_index=True, use_container_width=True, height=180)
+        if st.button("Full Resync"):
+            try:
+                host_id = st.session_state['host_id']
+                n = get_history_cache().resync(host_id, history_fetcher(host_id), rollup_synced_rows(host_id))
+                st.success(f"Resynced {n} sessions")
+            except Exception as e:
+                st.error(f"Error: {e}")
+
+    # Per-stage timings of the last PROFILE_RUNS full reruns (V7.9)
+    # Startup and fixed per-rerun cost against their budgets (V8.0)
+    with st.sidebar.expander("🚀 Startup Budget"):
+        budget = get_run_budget().summary()
+        b1, b2 = st.columns(2)
+        if budget["cold_start_ms"] is not None:
+            b1.metric("Cold Start", f"{budget['cold_start_ms']:,.0f} ms", f"{budget['imports_ms']:,.0f} ms imports", delta_color="off")
+        if budget["setup_p95_ms"] is not None:
+            b2.metric("Rerun Setup p95", f"{budget['setup_p95_ms']:,.1f} ms", f"p50 {budget['setup_p50_ms']:,.1f} ms", delta_color="off")
+        if budget["run_p50_ms"] is not None:
+            st.caption(f"Full rerun: p50 {budget['run_p50_ms']:,.0f} ms · p95 {budget['run_p95_ms']:,.0f} ms over {budget['runs']} runs")
+        over = []
+        if (budget["cold_start_ms"] or 0) > COLD_START_BUDGET_MS:
+            over.append(f"cold start over {COLD_START_BUDGET_MS:,.0f} ms")
+        if (budget["setup_p95_ms"] or 0) > RERUN_SETUP_BUDGET_MS:
+            over.append(f"rerun setup over {RERUN_SETUP_BUDGET_MS:,.0f} ms")
+        if over:
+            st.warning("Over budget: " + ", ".join(over))
+        else:
+            st.success(f"Within budget ({COLD_START_BUDGET_MS:,.0f} ms start, {RERUN_SETUP_BUDGET_MS:,.0f} ms per rerun)")
+
+    if st.sidebar.checkbox("⏱️ Rerun Profiler", key="profiler_on"):
+        with st.sidebar.expander("⏱️ Rerun Profile", expanded=True):
+            history = st.session_state.get('profile_history') or []
+            if not history:
+                st.caption("Recording - interact with the app to collect reruns")
+            else:
+                st.caption(f"Last {len(history)} reruns")
+                st.dataframe(pd.DataFrame(profiler.summarize(history)), hide_index=True, use_container_width=True)
+                st.download_button("Export JSON", profiler.export_json(history), file_name="rerun_profile.json", mime="application/json")
+                if st.button("Clear Profile"):
+                    history.clear()
+
+    # Re-verify the incremental ledger against a full recompute on every rerun (V6.9)
+    st.sidebar.checkbox("🧾 Ledger Self-Check", key="ledger_debug")
+
+    # Rebuild the session at any recorded event and re-run the audit there (V7.5)
+    with st.sidebar.expander("⏪ Timeline Audit"):
+        last_seq = st.session_state.get('event_seq', 0)
+        if not last_seq:
+            st.caption("No events recorded yet")
+        else:
+            at_seq = st.slider("After event #", 0, last_seq, last_seq, key="timeline_seq")
+            past, event = state_at(st.session_state['host_id'], at_seq, st.session_state.get('events', []))
+            past_ledger = ledger_ops.Ledger.from_state(past, get_chip_config())
+            t1, t2 = st.columns(2)
+            t1.metric("Inflow", f"${past_ledger.total_inflow:,.0f}")
+            t2.metric("On Table", f"${past_ledger.chips_on_table:,.0f}")
+            past_audit = past_ledger.audit(past)
+            st.metric("Audit", "OK" if past_audit == 0 else f"{'SHORT' if past_audit > 0 else 'SURPLUS'}: ${abs(past_audit):,.0f}")
+            st.caption(session_events.describe(event) if event else "Checkpoint")
+            st.caption(f"{len(past['players'])} players · rake ${past['income_rake']:,.0f} · insurance ${past['income_insurance']:,.0f}")
+
     uploaded_file = st.sidebar.file_uploader("Import CSV", type=["csv"])
     if uploaded_file is not None:
         if st.sidebar.button("⚠️ Overwrite Data", type="primary"):
             try:
-                # 1. Read CSV
-                df_import = pd.read_csv(uploaded_file)
-                
-                # 2. Clear Current State
-                st.session_state['players'] = {}
-                
-                # 3. Repopulate
+                # 1. Read CSV (all text) and validate every row up front (V7.3)
                 # ExpectedCols: Name, Buy-in, Final Stack, Payout, Fee Paid
-                for index, row in df_import.iterrows():
-                    p_name = str(row['Name'])
-                    p_buyin = float(row['Buy-in']) 
-                    p_stack = float(row['Final Stack'])
-                    p_payout = float(row['Payout'])
-                    p_fee = float(row.get('Fee Paid', 0)) 
-                    
-                    st.session_state['players'][p_name] = {
-                        "cash_in": p_buyin, 
-                        "credit_in": 0.0, 
-                        "chip_counts": {k:0 for k in get_chip_config()}, 
-                        "status": "out", 
-                        "final_stack": p_stack, 
-                        "final_payout": p_payout, 
-                        "final_fee": p_fee
-                    }
-                sync_state_to_cloud() # Auto-Save on Import
-                st.sidebar.success(f"Imported {len(df_import)} players!")
-                time.sleep(1) 
-                st.rerun()
+                df_import = read_import(uploaded_file)
+                typed, report = validate_import(df_import)
+
+                if not report.empty:
+                    # Nothing applied: the current session stays as it was
+                    st.sidebar.error(f"Import aborted: {len(report)} problem(s) in {report['Row'].nunique()} row(s)")
+                    st.sidebar.dataframe(report, hide_index=True, use_container_width=True)
+                else:
+                    # 2. Build the new player store in one pass, then swap it in
+                    ledger_ops.import_players(st.session_state, get_chip_config(), build_players(typed, get_chip_config()))
+                    sync_state_to_cloud() # Auto-Save on Import
+                    st.toast(f"Imported {len(typed)} players!") # A toast outlives the rerun
+                    st.rerun()
             except Exception as e:
                 st.sidebar.error(f"Error: {e}")
 
 # --- PAGE: ANALYTICS ---
+LOG_SORT_COLUMNS = ["Timestamp", "My_Share", "Net_Profit", "Total_Buyin", "Mode"]
 if page == "Analytics":
+    import plotly.express as px # Only this page draws charts: keep the import off every other cold start (V8.0)
     st.title(t["analytics_title"])
-    df = get_analytics_data()
-    
-    if not df.empty:
-        total_profit = df['My_Share'].sum()
-        total_sessions = len(df)
-        avg_profit = df['My_Share'].mean()
-        
+    host_id = st.session_state['host_id']
+    rollups = get_rollups()
+    if not rollups.is_seeded(host_id):
+        # First visit since rollups exist (or after a rebuild): aggregate the raw history once
+        df_seed = get_analytics_data()
+        rollups.rebuild(host_id, df_seed.to_dict("records") if not df_seed.empty else [])
+
+    totals = rollups.totals(host_id)
+    span = rollups.day_span(host_id)
+    if totals["sessions"]:
         k1, k2, k3 = st.columns(3)
-        k1.metric(t["kpi_lifetime"], f"${total_profit:,.0f}")
-        k2.metric(t["kpi_sessions"], total_sessions)
-        k3.metric(t["kpi_avg"], f"${avg_profit:,.0f}")
+        k1.metric(t["kpi_lifetime"], f"${totals['my_share']:,.0f}")
+        k2.metric(t["kpi_sessions"], totals["sessions"])
+        k3.metric(t["kpi_avg"], f"${totals['avg_share']:,.0f}")
+        undated = rollups.undated(host_id)
+        if undated:
+            st.caption(f"⚠️ {undated} session(s) have no readable date: counted in the totals above, left out of the curve and date ranges")
         
-        st.divider()
-        c1, c2 = st.columns([2, 1])
-        with c1:
-            st.subheader("💰 Growth Curve")
-            df['cumulative_profit'] = df['My_Share'].cumsum()
-            fig = px.line(df, x='Timestamp', y='cumulative_profit', markers=True)
-            st.plotly_chart(fig, use_container_width=True)
-        with c2:
-            st.subheader("🎲 Game Modes")
-            fig2 = px.pie(df, names='Mode', values='My_Share', hole=0.4)
-            st.plotly_chart(fig2, use_container_width=True)
-        st.dataframe(df.style.format("${:,.0f}", subset=["Total_Buyin", "Net_Profit", "My_Share"]), use_container_width=True)
+        if span:
+            st.divider()
+            f1, f2 = st.columns([2, 1])
+            date_range = f1.date_input("Date Range", value=span, min_value=span[0], max_value=span[1])
+            grain = f2.radio("Group By", ["day", "week", "month"], horizontal=True, format_func=str.title)
+            d_from, d_to = date_range if len(date_range) == 2 else (date_range[0], date_range[0])
+            if (d_from, d_to) != span:
+                # Two running-total lookups, whatever the range
+                in_range = rollups.range_totals(host_id, d_from, d_to)
+                r1, r2 = st.columns(2)
+                r1.metric("Profit in Range", f"${in_range['my_share']:,.0f}")
+                r2.metric("Sessions in Range", in_range["sessions"])
+
+            c1, c2 = st.columns([2, 1])
+            with c1:
+                st.subheader("💰 Growth Curve")
+                fmt = BUCKET_FORMATS[grain]
+                df_curve = rollups.series(host_id, grain, d_from.strftime(fmt), d_to.strftime(fmt))
+                shown = downsample_curve(df_curve, grain) # Shape-preserving, over the visible range only
+                with profiler.span("charts"):
+                    fig = px.line(shown, x='Bucket', y='Cumulative_Profit', markers=len(shown) == len(df_curve))
+                    st.plotly_chart(fig, use_container_width=True)
+                if len(shown) < len(df_curve):
+                    st.caption(f"{len(shown)} of {len(df_curve)} points drawn - narrow the date range for full detail")
+            with c2:
+                st.subheader("🎲 Game Modes")
+                with profiler.span("charts"):
+                    fig2 = px.pie(rollups.by_mode(host_id), names='Mode', values='My_Share', hole=0.4)
+                    st.plotly_chart(fig2, use_container_width=True)
+        else:
+            d_from = d_to = None # Every session is undated: no range to pick or curve to draw
+
+        problems = get_history_cache().report(host_id)
+        if not problems.empty:
+            st.caption(f"⚠️ {len(problems)} history value(s) could not be read and were left blank (Admin Mode › History Cache)")
+
+        # The raw log is only read on request, and only one page of it is sent (V8.0)
+        if st.toggle("Show Session Log"):
+            df = get_analytics_data()
+            notes = get_session_notes()
+            l1, l2 = st.columns(2)
+            modes = l1.multiselect("Mode", list(df["Mode"].cat.categories), key="log_modes")
+            search = l2.text_input("Search Notes", key="log_search").strip()
+            matched_ids = None
+            if search:
+                hit = notes["Note"].str.contains(search, case=False, regex=False) | notes["Expense_Details"].str.contains(search, case=False, regex=False)
+                matched_ids = notes.loc[hit.fillna(False), "Session_ID"]
+            in_range = (d_from, d_to) if span and (d_from, d_to) != span else (None, None) # Full span: undated rows too
+            mask = filter_sessions(df, *in_range, modes=modes, session_ids=matched_ids)
+
+            l3, l4, l5 = st.columns([2, 1, 1])
+            sort_by = l3.selectbox("Sort By", LOG_SORT_COLUMNS, format_func=lambda c: c.replace("_", " "), key="log_sort")
+            descending = l4.toggle("Descending", value=True, key="log_desc")
+            n_pages = max(1, -(-int(mask.sum()) // PAGE_SIZE))
+            if st.session_state.get('log_page', 1) > n_pages:
+                st.session_state['log_page'] = n_pages # Filters narrowed: stay on a page that exists
+            page_no = l5.number_input("Page", min_value=1, max_value=n_pages, key="log_page")
+            rows, total, _ = page_sessions(df, mask, sort_by, descending, page_no)
+            rows = rows.merge(notes[notes["Session_ID"].isin(rows["Session_ID"])], on="Session_ID", how="left")
+            st.dataframe(rows, hide_index=True, use_container_width=True, column_config={
+                "Timestamp": st.column_config.DatetimeColumn(format="YYYY-MM-DD HH:mm"),
+                **{c: st.column_config.NumberColumn(format="$%d") for c in ["Total_Buyin", "Total_Cashout", "Gross_Profit", "Expenses", "Net_Profit", "My_Share"]},
+            })
+            first = (page_no - 1) * PAGE_SIZE + 1 if total else 0
+            st.caption(f"Sessions {first}-{min(page_no * PAGE_SIZE, total)} of {total}")
     else:
         st.info("No saved sessions in cloud.")
 
@@ -505,52 +922,76 @@ else:
     # Internal Mode Key
     new_mode = "Time Charge" if game_mode_sel == t["mode_time"] else "Rake Game"
     if st.session_state['game_mode'] != new_mode:
-        st.session_state['game_mode'] = new_mode
+        ledger_ops.set_game_mode(st.session_state, get_chip_config(), new_mode)
         sync_state_to_cloud() # Save on mode change
     
     # Chip Config
     st.sidebar.header(t["sidebar_header"])
     chip_config = {}
-    chip_def = {"white": ("⚪", 5), "red": ("🔴", 25), "black": ("⚫", 100), "purple": ("🟣", 500), "yellow": ("🟡", 1000)}
-    for k, v in chip_def.items():
-        chip_config[k] = st.sidebar.number_input(f"{t[f'chip_{k}']} ({v[0]})", value=v[1], step=5, key=f"cfg_{k}")
+    chip_icons = {"white": "⚪", "red": "🔴", "black": "⚫", "purple": "🟣", "yellow": "🟡"}
+    for k, value in poker_core.DEFAULT_CHIP_VALUES.items():
+        chip_config[k] = st.sidebar.number_input(f"{t[f'chip_{k}']} ({chip_icons[k]})", value=value, step=5, key=f"cfg_{k}")
         
     st.title(t["app_title"])
 
     # --- V6.0 HIGH-LEVEL METRICS (CALCULATION) ---
-    total_inflow = sum(p['cash_in'] + p['credit_in'] for p in st.session_state['players'].values())
-    
-    # Audit Logic
-    chips_on_table = 0
-    for p in st.session_state['players'].values():
-        if p['status'] in ['active', 'paused']:
-            s = sum(p['chip_counts'][k] * chip_config[k] for k in chip_config)
-            chips_on_table += s
-            
-    total_final_stacks = sum(p.get('final_stack', 0) for p in st.session_state['players'].values() if p['status'] == 'out')
-    total_fees_in_rake = sum(p.get('final_fee', 0) for p in st.session_state['players'].values() if p['status']=='out' and p.get('final_fee', 0) > 0)
-    
-    pot_rake = st.session_state['income_rake'] - total_fees_in_rake
-    gross_insurance = st.session_state['income_insurance']
-    
-    total_outflow = chips_on_table + total_final_stacks + pot_rake + gross_insurance
-    discrepancy = total_inflow - total_outflow
+    # Running totals are kept by the ledger (V6.9), no per-rerun loops over players
+    ledger = get_ledger(st.session_state, chip_config)
+
+    def summary_figures():
+        """Gross income, expenses, net profit and host share of the session so far"""
+        ledger = get_ledger(st.session_state, chip_config)
+        gross_income, net_profit = poker_core.net_profit(
+            st.session_state['income_rake'], st.session_state['income_insurance'], ledger.total_exp)
+        my_share = poker_core.host_share(
+            net_profit, st.session_state['game_mode'], st.session_state.get('host_pct', poker_core.DEFAULT_HOST_PCT))
+        return gross_income, ledger.total_exp, net_profit, my_share
+
+    def mark_dashboard_dirty():
+        st.session_state['dashboard_dirty'] = True
+
+    @profiler.timed("audit")
+    def render_dashboard():
+        """Fills the audit badge and summary placeholders from the ledger.
+
+        Called once per full run, and by a fragment (V7.1) after it commits a
+        change, so only these figures refresh instead of the whole page.
+        """
+        st.session_state.pop('dashboard_dirty', None)
+        ledger = get_ledger(st.session_state, chip_config)
+        chips_on_table = ledger.chips_on_table
+        discrepancy = ledger.audit(st.session_state)
+        _, net_profit_house = poker_core.net_profit(st.session_state['income_rake'], st.session_state['income_insurance'], ledger.total_exp)
+
+        dashboard['pot'].metric("🎲 Active Chips (Pot)", f"${chips_on_table:,.0f}")
+        dashboard['house'].metric("💰 House Profit", f"${net_profit_house:,.0f}", delta_color="normal")
 
-    # Dashboard Metrics
-    total_exp = sum(x['Amount'] for x in st.session_state['expenses_log'])
-    net_profit_house = (st.session_state['income_rake'] + st.session_state['income_insurance']) - total_exp
+        if discrepancy == 0:
+            dashboard['audit'].metric("✅ Audit Status", "OK", delta="Balanced", delta_color="normal")
+        elif discrepancy > 0:
+            dashboard['audit'].metric("🔴 Audit Status", f"SHORT: -${discrepancy:,.0f}", delta="Missing", delta_color="inverse")
+        else:
+            dashboard['audit'].metric("🟡 Audit Status", f"SURPLUS: +${abs(discrepancy):,.0f}", delta="Extra", delta_color="off")
+
+        if st.session_state.get('ledger_debug'):
+            # Debug: incremental totals vs a full recompute
+            mismatches = ledger_ops.verify_ledger(st.session_state, chip_config)
+            if mismatches:
+                dashboard['check'].error(f"Ledger drift: {mismatches}")
+            else:
+                dashboard['check'].caption("🧾 Ledger verified against full recompute")
+
+        if 'gross' in dashboard: # Summary row exists once the full run has laid it out
+            gross_income, total_exp, net_profit, my_share = summary_figures()
+            dashboard['gross'].metric(t["gross_income"], f"${gross_income:,.0f}")
+            dashboard['exp'].metric(t["total_exp"], f"${total_exp:,.0f}")
+            dashboard['net'].metric(t["net_profit"], f"${net_profit:,.0f}", delta_color="normal" if net_profit >= 0 else "inverse")
+            dashboard['share'].metric(t["my_share"], f"${my_share:,.0f}")
 
     # --- V6.0 DASHBOARD UI ---
-    m1, m2, m3 = st.columns(3)
-    m1.metric("🎲 Active Chips (Pot)", f"${chips_on_table:,.0f}")
-    m2.metric("💰 House Profit", f"${net_profit_house:,.0f}", delta_color="normal")
-    
-    if discrepancy == 0:
-        m3.metric("✅ Audit Status", "OK", delta="Balanced", delta_color="normal")
-    elif discrepancy > 0:
-        m3.metric("🔴 Audit Status", f"SHORT: -${discrepancy:,.0f}", delta="Missing", delta_color="inverse")
-    else:
-        m3.metric("🟡 Audit Status", f"SURPLUS: +${abs(discrepancy):,.0f}", delta="Extra", delta_color="off")
+    # Placeholders, filled by render_dashboard() after the player cards so chip edits made in this rerun are counted
+    dashboard = dict(zip(['pot', 'house', 'audit'], [c.empty() for c in st.columns(3)]))
+    dashboard['check'] = st.empty()
 
     st.divider()
 
@@ -564,23 +1005,25 @@ else:
         new_credit = c3.number_input("Credit In", step=100)
         if c4.button("Add"):
             if new_name:
-                st.session_state['players'][new_name] = {
-                    "cash_in": new_cash, "credit_in": new_credit, 
-                    "chip_counts": {k:0 for k in chip_config}, 
-                    "status": "active", "final_stack": 0, "final_payout": 0, "final_fee": 0
-                }
+                ledger_ops.add_player(st.session_state, chip_config, new_name, new_cash, new_credit)
                 sync_state_to_cloud()
                 st.rerun()
 
     # 2. Active Players
     st.subheader(t["live_header"])
-    active = {n:p for n,p in st.session_state['players'].items() if p['status']=='active'}
-    paused = {n:p for n,p in st.session_state['players'].items() if p['status']=='paused'}
+    active = dict(st.session_state['players'].items(status='active'))
+    paused = dict(st.session_state['players'].items(status='paused'))
     
     if not active:
         st.info("No active players.")
 
-    for name, data in active.items():
+    @st.fragment
+    def player_card(name):
+        """One active player's card; chip and fee edits rerun only this fragment (V7.1)"""
+        players = st.session_state['players']
+        if name not in players or players[name]['status'] != 'active':
+            return # Changed elsewhere; the next full run redraws the list
+        data = players[name]
         total_in = data['cash_in'] + data['credit_in']
         with st.expander(f"**{name}** (${total_in:,}) [Cash: ${data['cash_in']:,} | Credit: ${data['credit_in']:,}]", expanded=True):
             c_chips, c_acts = st.columns([3, 1])
@@ -590,10 +1033,10 @@ else:
                 with st.popover(t["rebuy"]):
                     amt = st.number_input("Amt", step=100, key=f"rb_{name}")
                     if st.button("Confirm", key=f"btn_rb_{name}"):
-                        data['cash_in'] += amt 
-                        log_event(f"{name} Rebuy", amt, "Cash")
-                        # sync_state_to_cloud called in log_event
-                        st.rerun()
+                        ledger_ops.rebuy(st.session_state, chip_config, name, amt)
+                        sync_state_to_cloud() # The ledger writes the log line
+                        mark_dashboard_dirty()
+                        rerun_fragment()
                 
                 # Repay (V3.2)
                 with st.popover(t["repay"]):
@@ -601,16 +1044,15 @@ else:
                         rep_amt = st.number_input("Amount", step=100.0, max_value=float(data['credit_in']), key=f"rep_{name}")
                         if st.button(t['btn_repay'], key=f"btn_rep_{name}"):
                             if rep_amt > 0:
-                                data['credit_in'] -= rep_amt
-                                data['cash_in'] += rep_amt
-                                log_event(f"{name} Repaid Debt", rep_amt, "Repay")
-                                st.rerun()
+                                ledger_ops.repay(st.session_state, chip_config, name, rep_amt)
+                                sync_state_to_cloud()
+                                rerun_fragment()
                     else:
                         st.info("No Debt")
 
                 # Sit Out
                 if st.button(t["sit_out"], key=f"so_{name}"):
-                    data['status'] = 'paused'
+                    ledger_ops.set_status(st.session_state, chip_config, name, 'paused')
                     sync_state_to_cloud()
                     st.rerun()
 
@@ -620,20 +1062,13 @@ else:
             changed_chips = False
             for i, (k, v) in enumerate(chip_config.items()):
                 cnt = cols[i].number_input(f"${v}", value=data['chip_counts'][k], key=f"c_{name}_{k}")
-                if cnt != data['chip_counts'][k]:
-                    data['chip_counts'][k] = cnt
+                if ledger_ops.set_chip_count(st.session_state, chip_config, name, k, cnt):
                     changed_chips = True
             
             if changed_chips:
-                # We don't auto-save on every chip click to avoid spamming API, 
-                # but maybe should? Let's rely on Manual Save or major events for now.
-                # Or maybe save if they close the expander? Hard to detect.
-                # Let's add a "Update Stack" button or just trust the next event saves it.
-                # Actually, Streamlit reruns on every change, so we COULD save.
-                # But rate limits... Let's save on Sidebar "Force Save" or major events.
-                pass
-
-            stack = sum(data['chip_counts'][k] * chip_config[k] for k in chip_config)
+                mark_dashboard_dirty()
+
+            stack = data.stack(chip_config)
             c_chips.metric("Stack", f"${stack:,.0f}")
             
             # Cash Out
@@ -644,19 +1079,14 @@ else:
             fee = 0
             fee_method = "N/A"
             if st.session_state['game_mode'] == "Time Charge":
-                fee = co1.number_input(t["fee"], value=170, step=10, key=f"fee_{name}")
+                fee = co1.number_input(t["fee"], value=poker_core.DEFAULT_VENUE_FEE, step=10, key=f"fee_{name}")
                 fee_method = co2.radio("Method", [t["fee_deduct"], t["fee_cash"]], key=f"fm_{name}")
             
             # --- REAL TIME NET CALCULATION ---
-            if st.session_state['game_mode'] == "Time Charge" and fee_method == t["fee_deduct"]:
-                proj_payout_stack = max(0, stack - fee)
-            else:
-                proj_payout_stack = stack
-            
-            credit_debt = data['credit_in']
-            debt_cleared = min(proj_payout_stack, credit_debt)
-            proj_cash_payout = proj_payout_stack - debt_cleared
-            proj_remaining_debt = credit_debt - debt_cleared
+            deduct_fee = st.session_state['game_mode'] == "Time Charge" and fee_method == t["fee_deduct"]
+            proj = poker_core.cashout_projection(stack, data['credit_in'], fee, deduct_fee)
+            proj_cash_payout = proj["cash_payout"]
+            proj_remaining_debt = proj["remaining_debt"]
             
             with co3:
                 # Visual Alerts
@@ -666,27 +1096,69 @@ else:
                     st.success(f"{t['pay_player']}: ${proj_cash_payout:,.0f}")
                 
                 if st.button(t["cashout"], key=f"btn_co_{name}", type="primary"):
-                    payout_stack = proj_payout_stack
-                    
                     # Record Fee
                     if st.session_state['game_mode'] == "Time Charge":
-                        if fee_method == t["fee_deduct"]:
-                             st.session_state['income_rake'] += fee 
-                             st.session_state['rake_log'].append({"Time": datetime.now().strftime("%H:%M"), "Event": f"{name} Fee", "Amount": fee})
-                             log_event(f"{name} Fee", fee, "Fee")
-                        else:
-                             st.session_state['income_rake'] += fee
-                             st.session_state['fee_cash_collected'] += fee
-                             st.session_state['rake_log'].append({"Time": datetime.now().strftime("%H:%M"), "Event": f"{name} Fee (Cash)", "Amount": fee})
-                             log_event(f"{name} Fee (Cash)", fee, "Fee")
+                        cash_fee = fee_method != t["fee_deduct"]
+                        ledger_ops.charge_fee(st.session_state, chip_config, name, fee, cash=cash_fee)
                     
-                    data['final_stack'] = stack
-                    data['final_payout'] = proj_cash_payout
-                    data['final_fee'] = fee
-                    data['status'] = 'out'
+                    ledger_ops.cash_out(st.session_state, chip_config, name, stack, proj_cash_payout, fee)
                     sync_state_to_cloud()
                     st.rerun()
 
+        if st.session_state.get('dashboard_dirty'):
+            render_dashboard()
+
+    # Count Grid (V7.2): every active player x denomination in one editor,
+    # committed in one batch and one sync; cards stay available one at a time
+    view = st.radio("View", [t["view_cards"], t["view_grid"]], horizontal=True, label_visibility="collapsed", key="player_view")
+    if view == t["view_cards"]:
+        with profiler.span("player_cards"):
+            for name in active:
+                player_card(name)
+    elif active:
+        players = st.session_state['players']
+        names = list(active)
+        chips = list(chip_config)
+        counts = players.chip_matrix(names, chips)
+        stacks = counts @ np.array([chip_config[k] for k in chips], dtype=np.float64)
+        credit = np.array([players[n]['credit_in'] for n in names], dtype=np.float64)
+
+        grid = pd.DataFrame(counts, columns=chips)
+        grid.insert(0, "Name", names)
+        grid["Stack"] = stacks
+        # Same rule as the cards' cashout_projection(), with each card's fee settings
+        time_charge = st.session_state['game_mode'] == "Time Charge"
+        fees = np.array([st.session_state.get(f"fee_{n}", poker_core.DEFAULT_VENUE_FEE) if time_charge else 0 for n in names], dtype=np.float64)
+        deduct = np.array([time_charge and st.session_state.get(f"fm_{n}", t["fee_deduct"]) != t["fee_cash"] for n in names])
+        grid["Payout"] = poker_core.cashout_projections(stacks, credit, fees, deduct)["cash_payout"]
+
+        with st.form("count_grid"):
+            edited = st.data_editor(
+                grid, hide_index=True, use_container_width=True, num_rows="fixed",
+                disabled=["Name", "Stack", "Payout"],
+                column_config={
+                    **{k: st.column_config.NumberColumn(f"${v}", min_value=0, step=1, format="%d") for k, v in chip_config.items()},
+                    "Stack": st.column_config.NumberColumn(format="$%d"),
+                    "Payout": st.column_config.NumberColumn(format="$%d"),
+                },
+                key=f"count_grid_{st.session_state.get('count_grid_rev', 0)}",
+            )
+            st.caption(t["grid_hint"])
+            if st.form_submit_button(t["grid_commit"], type="primary"):
+                new_counts = edited[chips].fillna(0).clip(lower=0).to_numpy(dtype=np.int64)
+                changed = ledger_ops.set_chip_counts(st.session_state, chip_config, names, new_counts)
+                if changed:
+                    for n in changed:
+                        for k in chips:
+                            st.session_state.pop(f"c_{n}_{k}", None) # Card inputs re-read the new counts
+                    sync_state_to_cloud()
+                st.session_state['count_grid_rev'] = st.session_state.get('count_grid_rev', 0) + 1
+                st.rerun()
+
+        selected = st.selectbox(t["grid_player"], names, index=None, key="grid_player")
+        if selected:
+            player_card(selected)
+
     # Paused Players
     if paused:
         st.markdown("---")
@@ -695,7 +1167,7 @@ else:
                 pc1, pc2 = st.columns([4, 1])
                 pc1.info(f"**{name}** (Buy-in: ${data['cash_in']+data['credit_in']:,}) - Paused")
                 if pc2.button(t["return_seat"], key=f"ret_{name}"):
-                    data['status'] = 'active'
+                    ledger_ops.set_status(st.session_state, chip_config, name, 'active')
                     sync_state_to_cloud()
                     st.rerun()
 
@@ -703,25 +1175,68 @@ else:
     st.markdown("---")
     st.header(t["summary"])
     
+    @st.fragment
+    def insurance_panel():
+        """Insurance calculator and log; bet/outs edits rerun only this fragment (V7.1)"""
+        st.subheader(t["lbl_ins"])
+        with st.expander(t["ins_calc"], expanded=True):
+            ins_bet = st.number_input(t["ins_bet"], min_value=0.0, step=100.0, key="ins_bet_val")
+            ins_outs = st.slider(t["ins_outs"], 1, 20, 4)
+            curr_odd = poker_core.insurance_odds(ins_outs)
+            payout = poker_core.insurance_payout(ins_bet, ins_outs)
+            c_cal1, c_cal2 = st.columns(2)
+            c_cal1.metric(t["ins_odds"], f"1:{curr_odd}")
+            c_cal2.metric(t["ins_payout"], f"${payout:,.0f}")
+            b_win, b_loss = st.columns(2)
+            if b_win.button(t["btn_win"], use_container_width=True):
+                if ins_bet > 0:
+                    ledger_ops.add_insurance(st.session_state, chip_config, ins_bet, "Win (沒中)", f"Bet ${ins_bet}", f"+${ins_bet}")
+                    sync_state_to_cloud()
+                    mark_dashboard_dirty()
+                    rerun_fragment()
+            if b_loss.button(t["btn_loss"], use_container_width=True):
+                if ins_bet > 0:
+                    ledger_ops.add_insurance(st.session_state, chip_config, -payout, "Loss (中了)", "Pay limit", f"-${payout}")
+                    sync_state_to_cloud()
+                    mark_dashboard_dirty()
+                    rerun_fragment()
+
+        with st.popover(t["btn_add_ins"]):
+            manual_ins = st.number_input("Manual Amount (+)", step=100.0)
+            if st.button("Add Manual"):
+                ledger_ops.add_insurance(st.session_state, chip_config, manual_ins, "Manual", "-", f"+${manual_ins}")
+                sync_state_to_cloud()
+                mark_dashboard_dirty()
+                rerun_fragment()
+        st.metric(t["total_ins"], f"${st.session_state['income_insurance']:,.0f}")
+        st.caption(t["log_ins"])
+        if st.session_state['insurance_log']:
+            show_log('insurance_log', height=200)
+        if st.session_state.get('dashboard_dirty'):
+            render_dashboard()
+
     # Financial Management Tabs
     tab_exp, tab_inc = st.tabs([t["tab_expenses"], t["tab_income"]])
     
     # --- EXPENSES ---
-    with tab_exp:
+    @st.fragment
+    def expenses_tab():
         ec1, ec2, ec3 = st.columns([2, 1, 1])
         exp_item = ec1.text_input(t["lbl_item"], key="exp_new_item")
         exp_amt = ec2.number_input(t["lbl_amount"], step=100.0, key="exp_new_amt")
         if ec3.button(t["btn_add_exp"]):
              if exp_item and exp_amt > 0:
-                 st.session_state['expenses_log'].append({
-                     "Time": datetime.now().strftime("%H:%M"),
-                     "Item": exp_item,
-                     "Amount": exp_amt
-                 })
+                 ledger_ops.add_expense(st.session_state, chip_config, exp_item, exp_amt)
                  sync_state_to_cloud()
-                 st.rerun()
+                 mark_dashboard_dirty()
+                 rerun_fragment()
         if st.session_state['expenses_log']:
-            st.dataframe(pd.DataFrame(st.session_state['expenses_log']), use_container_width=True)
+            show_log('expenses_log', newest_first=False)
+        if st.session_state.get('dashboard_dirty'):
+            render_dashboard()
+
+    with tab_exp:
+        expenses_tab()
             
     # --- INCOME & RISK ---
     with tab_inc:
@@ -740,89 +1255,37 @@ else:
                 new_rake = st.number_input("+ $", step=100.0, key="new_rake_in")
                 if st.button(t["btn_add_rake"]):
                     if new_rake > 0:
-                        st.session_state['income_rake'] += new_rake
-                        st.session_state['rake_log'].append({
-                            "Time": datetime.now().strftime("%H:%M"), 
-                            "Event": "Manual Rake", 
-                            "Amount": new_rake
-                        })
+                        ledger_ops.add_rake(st.session_state, chip_config, new_rake, "Manual Rake")
                         sync_state_to_cloud()
                         st.rerun()
                 st.metric(t["total_rake"], f"${st.session_state['income_rake']:,.0f}")
                 st.caption(t["log_rake"])
                 if st.session_state['rake_log']:
-                     st.dataframe(pd.DataFrame(st.session_state['rake_log'][::-1]), use_container_width=True, height=200)
+                     show_log('rake_log', height=200)
 
         # --- INSURANCE ---
         with ic2:
-            st.subheader(t["lbl_ins"])
-            with st.expander(t["ins_calc"], expanded=True):
-                ins_bet = st.number_input(t["ins_bet"], min_value=0.0, step=100.0, key="ins_bet_val")
-                ins_outs = st.slider(t["ins_outs"], 1, 20, 4)
-                odds_map = {1:30, 2:16, 3:10, 4:8, 5:6, 6:5, 7:4.5, 8:4, 9:3.5, 10:3, 11:2.6, 12:2.3, 13:2, 14:1.8, 15:1.6, 16:1.4}
-                curr_odd = odds_map.get(ins_outs, 1.2)
-                payout = ins_bet * curr_odd
-                c_cal1, c_cal2 = st.columns(2)
-                c_cal1.metric(t["ins_odds"], f"1:{curr_odd}")
-                c_cal2.metric(t["ins_payout"], f"${payout:,.0f}")
-                b_win, b_loss = st.columns(2)
-                if b_win.button(t["btn_win"], use_container_width=True):
-                    if ins_bet > 0:
-                        st.session_state['income_insurance'] += ins_bet
-                        st.session_state['insurance_log'].append({
-                            "Time": datetime.now().strftime("%H:%M"), "Action": "Win (沒中)", "Details": f"Bet ${ins_bet}", "Change": f"+${ins_bet}"
-                        })
-                        sync_state_to_cloud()
-                        st.rerun()
-                if b_loss.button(t["btn_loss"], use_container_width=True):
-                    if ins_bet > 0:
-                        st.session_state['income_insurance'] -= payout
-                        st.session_state['insurance_log'].append({
-                            "Time": datetime.now().strftime("%H:%M"), "Action": "Loss (中了)", "Details": f"Pay limit", "Change": f"-${payout}"
-                        })
-                        sync_state_to_cloud()
-                        st.rerun()
-
-            with st.popover(t["btn_add_ins"]):
-                manual_ins = st.number_input("Manual Amount (+)", step=100.0)
-                if st.button("Add Manual"):
-                    st.session_state['income_insurance'] += manual_ins
-                    st.session_state['insurance_log'].append({"Time": datetime.now().strftime("%H:%M"), "Action": "Manual", "Details": "-", "Change": f"+${manual_ins}"})
-                    sync_state_to_cloud()
-                    st.rerun()
-            st.metric(t["total_ins"], f"${st.session_state['income_insurance']:,.0f}")
-            st.caption(t["log_ins"])
-            if st.session_state['insurance_log']:
-                st.dataframe(pd.DataFrame(st.session_state['insurance_log'][::-1]), use_container_width=True, height=200)
+            insurance_panel()
 
     # Breakdown
     st.divider()
-    total_rake = st.session_state['income_rake']
-    total_ins = st.session_state['income_insurance']
-    total_exp = sum(x['Amount'] for x in st.session_state['expenses_log'])
-    gross_income = total_rake + total_ins
-    net_profit = gross_income - total_exp
+    dashboard.update(zip(['gross', 'exp', 'net', 'share'], [c.empty() for c in st.columns(4)]))
     
-    b1, b2, b3, b4 = st.columns(4)
-    b1.metric(t["gross_income"], f"${gross_income:,.0f}")
-    b2.metric(t["total_exp"], f"${total_exp:,.0f}")
-    b3.metric(t["net_profit"], f"${net_profit:,.0f}", delta_color="normal" if net_profit >= 0 else "inverse")
-    
-    host_pct = 100
     if st.session_state['game_mode'] == "Rake Game":
-        host_pct = st.slider(t["pct_share"], 0, 100, 60)
-    my_share = net_profit * (host_pct / 100.0)
-    partner_share = net_profit - my_share
-    b4.metric(t["my_share"], f"${my_share:,.0f}")
+        st.slider(t["pct_share"], 0, 100, 60, key="host_pct")
+    render_dashboard()
 
     # SAVE SESSION
     notes = st.text_input(t["notes"])
     if st.button(t["save_session"], type="primary"):
-        exp_details = "; ".join([f"{x['Item']}:${x['Amount']}" for x in st.session_state['expenses_log']])
+        expenses = session_expenses(st.session_state['host_id'])
+        exp_details = "; ".join([f"{x['Item']}:${x['Amount']}" for x in expenses])
         final_notes = f"{notes} | Exp: {exp_details}"
-        total_buyin = sum(p['cash_in']+p['credit_in'] for p in st.session_state['players'].values())
-        total_payout = sum(p['final_payout'] for p in st.session_state['players'].values() if p['status']=='out')
+        gross_income, total_exp, net_profit, my_share = summary_figures()
+        total_buyin = ledger.total_inflow
+        total_payout = ledger.total_payout
         
+        # No wait for the cloud: the local wipe tombstone is what the worker pushes last (V6.4)
         save_session_to_cloud(st.session_state['game_mode'], total_buyin, total_payout, gross_income, total_exp, net_profit, my_share, final_notes)
         wipe_snapshot() # Clean up persistence after official save
         st.success(t["saved"])
@@ -831,7 +1294,7 @@ else:
     # --- Cashed Out History ---
     out_players = [
         {"Name": n, "Buy-in": p['cash_in']+p['credit_in'], "Final Stack": p['final_stack'], "Payout": p['final_payout'], "Fee Paid": p.get('final_fee', 0)}
-        for n, p in st.session_state['players'].items() if p['status'] == 'out'
+        for n, p in st.session_state['players'].items(status='out')
     ]
     if out_players:
         st.markdown("---")
@@ -842,3 +1305,8 @@ else:
         wipe_snapshot() # Wipe cloud
         st.session_state.clear()
         st.rerun()
+
+# --- End of run: close this rerun's profile (V7.9) ---
+if st.session_state.get('profiler_on'):
+    profiler.end_run(st.session_state['profile_history'], st.session_state)
+get_run_budget().record_run(time.perf_counter() - _run_started)
@@ -0,0 +1,299 @@
+"""Synthetic-workload benchmarks for the headless core (V8.0).
+
+Plays synthetic nights of N players through the ledger (buy-ins, rebuys,
+chip counts, insurance, fees, expenses, cash-outs) and measures, as N grows:
+
+    op.<type>         median latency of one ledger mutation
+    audit.full        Ledger.from_state() + audit(), the full recompute
+    audit.incremental audit() on the running ledger
+    snapshot.kb       encoded checkpoint size (json.kb: before compression)
+    snapshot.encode   snapshot_payload() + snapshot_codec.encode()
+    snapshot.decode   load_state() of that checkpoint
+    replay.events     rebuilding the night from its event log
+
+Every night is also checked: the running ledger must match a full
+recompute and the books must balance, so a fast-but-wrong change fails too.
+
+    python bench_core.py                            # report for N = 10, 100, 1000
+    python bench_core.py --check                    # exit 1 if anything regressed vs bench_baseline.json
+    python bench_core.py --baseline base.json       # ... or vs another baseline
+    python bench_core.py --save-baseline base.json  # record this machine's numbers
+
+bench_baseline.json is committed with the code; after a change that is
+meant to move the numbers, re-record it with --save-baseline and commit it
+alongside. tests/test_bench_core.py runs --check with the suite.
+"""
+import argparse
+import contextlib
+import gc
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+import ledger
+import poker_core
+import session_events
+import snapshot_codec
+
+CHIPS = list(poker_core.DEFAULT_CHIP_VALUES)
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_baseline.json")
+
+
+def synthetic_night(n_players, rounds=3, seed=0, chip_config=poker_core.DEFAULT_CHIP_VALUES):
+    """(state, {op type: [seconds]}) of one generated night.
+
+    Each player buys in, then every round each player rebuys or has a chip
+    count updated, and a few insurance bets, expenses and rake drops happen;
+    at the end half the table cashes out (with the venue fee) and pays off
+    its credit. Stacks are dealt from the money put in, so the books balance.
+    """
+    rng = random.Random(seed)
+    state = poker_core.new_session_state()
+    timings = {}
+
+    def run(op, fn, *args):
+        t0 = time.perf_counter()
+        result = fn(state, chip_config, *args)
+        timings.setdefault(op, []).append(time.perf_counter() - t0)
+        return result
+
+    names = [f"P{i:05d}" for i in range(n_players)]
+    for name in names:
+        run("add_player", ledger.add_player, name, rng.choice([1000, 2000, 5000]), rng.choice([0, 0, 1000]))
+
+    for _ in range(rounds):
+        for name in names:
+            if rng.random() < 0.3:
+                run("rebuy", ledger.rebuy, name, rng.choice([500, 1000]))
+        for name in names:
+            p = state['players'][name]
+            budget = p['cash_in'] + p['credit_in']
+            # Deal the player's whole buy-in out as chips, biggest first
+            counts = {}
+            for chip in reversed(CHIPS):
+                counts[chip], budget = divmod(budget, chip_config[chip])
+            for chip, count in counts.items():
+                run("set_chip_count", ledger.set_chip_count, name, chip, count)
+        for _ in range(max(1, n_players // 10)):
+            bet = rng.choice([100, 200, 500])
+            if rng.random() < 0.7:
+                run("insurance", ledger.add_insurance, bet, "Win (沒中)", f"Bet ${bet}", f"+${bet}")
+            else:
+                payout = poker_core.insurance_payout(bet, rng.randint(1, 20))
+                run("insurance", ledger.add_insurance, -payout, "Loss (中了)", "Pay limit", f"-${payout}")
+        run("rake", ledger.add_rake, rng.choice([100, 300]), "Pot Rake")
+        run("expense", ledger.add_expense, "Food", rng.choice([50, 100, 200]))
+
+    counted = names[: n_players // 2]
+    grid = [[state['players'][n]['chip_counts'].get(c, 0) for c in CHIPS] for n in counted]
+    run("set_chip_counts", ledger.set_chip_counts, counted, grid)
+
+    fee = 170
+    for name in names[::2]:
+        p = state['players'][name]
+        stack = p.stack(chip_config)
+        proj = poker_core.cashout_projection(stack, p['credit_in'], fee, deduct_fee=True)
+        run("charge_fee", ledger.charge_fee, name, fee, False)
+        if proj["debt_cleared"]:
+            run("repay", ledger.repay, name, proj["debt_cleared"])
+        run("cash_out", ledger.cash_out, name, stack, proj["cash_payout"], fee)
+    return state, timings
+
+
+def best_of(repeat, fn):
+    """Fastest of repeat calls (seconds) and the last result"""
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+def calibrate(repeat=5):
+    """Seconds for a fixed pure-Python workload: this machine's speed right now.
+
+    Timings are compared to a baseline relative to it, so a slower machine or
+    a busy CPU doesn't read as a regression.
+    """
+    def work():
+        total = 0
+        for i in range(200000):
+            total += i % 7
+        return total
+    best, _ = best_of(repeat, work)
+    return best
+
+
+def check_night(state, chip_config):
+    """Problems with the night's books, [] if it's sound"""
+    problems = []
+    diff = ledger.verify_ledger(state, chip_config)
+    if diff:
+        problems.append(f"ledger drifted from a full recompute: {diff}")
+    discrepancy = ledger.get_ledger(state, chip_config).audit(state)
+    # Insurance and the house's rake are money that came from the table
+    expected = -(state['income_insurance'] + state['income_rake'] - ledger.get_ledger(state, chip_config).total_fees_in_rake)
+    if abs(discrepancy - expected) > 1e-6:
+        problems.append(f"audit is {discrepancy}, expected {expected}")
+    for name, p in state['players'].items():
+        if abs(p.stack(chip_config) - poker_core.stack_value(dict(p['chip_counts'].items()), chip_config)) > 1e-6:
+            problems.append(f"{name}: table stack disagrees with stack_value()")
+            break
+    return problems
+
+
+@contextlib.contextmanager
+def gc_paused():
+    """No garbage collection while timing, as timeit does: a collection caused by the rest of the process isn't billed to the code measured"""
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def bench_size(n_players, rounds=3, repeat=5, seed=0):
+    """{metric: value} for a night of n_players, plus the problems check_night() found.
+
+    The night is played repeat times (same seed) and each op keeps its best
+    median: small nights have only a sample or two of some ops.
+    """
+    with gc_paused():
+        return _bench_size(n_players, rounds, repeat, seed)
+
+
+def _bench_size(n_players, rounds, repeat, seed):
+    chip_config = poker_core.DEFAULT_CHIP_VALUES
+    results = {}
+    for _ in range(max(1, repeat)):
+        state, timings = synthetic_night(n_players, rounds, seed, chip_config)
+        for op, samples in timings.items():
+            results[f"op.{op}"] = min(results.get(f"op.{op}", float("inf")), statistics.median(samples))
+
+    results["audit.full"], _ = best_of(repeat, lambda: ledger.Ledger.from_state(state, chip_config).audit(state))
+    running = ledger.get_ledger(state, chip_config)
+    results["audit.incremental"], _ = best_of(repeat, lambda: running.audit(state))
+
+    payload = poker_core.snapshot_payload(state)
+    results["json.kb"] = len(json.dumps(payload, separators=(",", ":"))) / 1024
+    results["snapshot.encode"], encoded = best_of(
+        repeat, lambda: snapshot_codec.encode(poker_core.snapshot_payload(state)))
+    results["snapshot.kb"] = len(encoded) / 1024
+    results["snapshot.decode"], _ = best_of(repeat, lambda: poker_core.load_state(encoded))
+
+    events = state['events']
+
+    def rebuild():
+        fresh = poker_core.new_session_state()
+        session_events.replay(fresh, chip_config, events)
+        return fresh
+    results["replay.events"], rebuilt = best_of(max(1, repeat // 2), rebuild)
+    results["events"] = len(events)
+
+    problems = check_night(state, chip_config)
+    if ledger.Ledger.from_state(rebuilt, chip_config).diff(ledger.Ledger.from_state(state, chip_config)):
+        problems.append("replaying the event log gives different totals")
+    return results, problems
+
+
+def is_size(metric):
+    return metric.endswith(".kb") or metric == "events"
+
+
+def format_report(report):
+    """Table of metric rows x N columns (times in µs)"""
+    sizes = list(report)
+    metrics = sorted({m for results in report.values() for m in results}, key=lambda m: (is_size(m), m))
+    lines = [f"{'metric':<22}" + "".join(f"{'N=' + str(n):>14}" for n in sizes)]
+    for metric in metrics:
+        cells = []
+        for n in sizes:
+            value = report[n].get(metric)
+            if value is None:
+                cells.append(f"{'-':>14}")
+            elif is_size(metric):
+                cells.append(f"{value:>14,.1f}")
+            else:
+                cells.append(f"{value * 1e6:>12,.1f}µs")
+        lines.append(f"{metric:<22}" + "".join(cells))
+    return "\n".join(lines)
+
+
+def compare(report, baseline, tolerance, min_delta=10e-6):
+    """Regressions against a saved baseline: [(metric, N, baseline, now)].
+
+    Timings are scaled by the two runs' calibration and must also be
+    min_delta slower, so jitter on the microsecond ops is ignored.
+    """
+    speed = baseline.get("calibration", report["calibration"]) / report["calibration"]
+    regressions = []
+    for n, results in report.items():
+        if n == "calibration":
+            continue
+        base = baseline.get(str(n), {})
+        for metric, value in results.items():
+            was = base.get(metric)
+            if not was:
+                continue
+            if is_size(metric):
+                regressed = value > was * 1.05  # Sizes should not move at all
+            else:
+                value *= speed
+                regressed = value > was * tolerance and value - was > min_delta
+            if regressed:
+                regressions.append((metric, n, was, value))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="10,100,1000", help="comma-separated player counts")
+    parser.add_argument("--rounds", type=int, default=3, help="rebuy/count rounds per night")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per whole-state measurement (best is kept)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--baseline", help="JSON from --save-baseline to check against")
+    parser.add_argument("--check", action="store_true", help=f"check against {os.path.basename(BASELINE_PATH)}")
+    parser.add_argument("--tolerance", type=float, default=1.5, help="allowed slowdown factor vs the baseline")
+    parser.add_argument("--save-baseline", help="write this run's numbers to a JSON file")
+    args = parser.parse_args(argv)
+    baseline = args.baseline or (BASELINE_PATH if args.check else None)
+    if baseline and not os.path.exists(baseline):
+        # A guard without a baseline would pass every run: refuse instead
+        print(f"No baseline at {baseline}. Record one with\n"
+              f"    python bench_core.py --save-baseline {baseline}\n"
+              "and commit it, then re-run the check.")
+        return 2
+
+    report, failed = {}, False
+    for n in (int(s) for s in args.sizes.split(",")):
+        report[n], problems = bench_size(n, args.rounds, args.repeat, args.seed)
+        for problem in problems:
+            print(f"FAIL N={n}: {problem}")
+            failed = True
+    print(format_report(report))
+    report["calibration"] = calibrate(args.repeat)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump({str(n): results for n, results in report.items()}, f, indent=2)
+        print(f"\nBaseline saved to {args.save_baseline}")
+    if baseline:
+        with open(baseline) as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        for metric, n, was, now in regressions:
+            scale = 1 if is_size(metric) else 1e6
+            print(f"REGRESSION N={n} {metric}: {was * scale:,.1f} -> {now * scale:,.1f} (calibrated)")
+            failed = True
+        if not regressions:
+            print(f"\nNo regressions against {baseline} (tolerance x{args.tolerance})")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,180 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+import pandas as pd
+
+from history_ingest import NOTE_COLUMNS, ingest_history, split_notes
+
+# --- Local History Cache (V8.0) ---
+# Analytics used to pull a host's whole history from Sheets on every visit
+# after the cache TTL ran out. The cache keeps one Parquet file per host with
+# the history as the sheet holds it (cell text), plus the watermark of the
+# last row read, stored in the file's own metadata so data and watermark are
+# always written together. A sync asks the backend only for rows after the
+# watermark and rewrites the file when there are any; a full resync starts
+# from no watermark. Files are read memory-mapped, so the page opens from
+# disk with no network at all. pyarrow ships with Streamlit; it is imported
+# on first use so pages without analytics don't pay for it. Note columns are
+# left out of that read and only loaded (column-projected) when asked for.
+
+META_KEY = b"history_cache"
+
+
+class HistoryCache:
+    """Per-host Parquet copy of the session history, kept current from a watermark"""
+
+    def __init__(self, directory, columns=()):
+        self.directory = directory
+        self.columns = list(columns)
+        self._lock = threading.Lock()        # Guards _entries (script thread + sync workers)
+        self._sync_lock = threading.Lock()   # One fetch at a time, outside _lock
+        self._entries = {}                   # host_id -> {"text", "meta", "frame", "report", "notes", "synced_at"}
+        self._wanted = set()                 # Hosts whose next worker run should sync
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, host_id):
+        digest = hashlib.sha1(str(host_id).encode("utf-8")).hexdigest()[:16]
+        return os.path.join(self.directory, f"history_{digest}.parquet")
+
+    def _load(self, host_id):
+        """The host's entry, read memory-mapped from disk on first use"""
+        entry = self._entries.get(host_id)
+        if entry is None:
+            entry = {"text": None, "meta": {}, "frame": None, "report": None, "notes": None, "synced_at": None}
+            path = self.path(host_id)
+            if os.path.exists(path):
+                import pyarrow.parquet as pq
+                try:
+                    schema = pq.read_schema(path)
+                    columns = [c for c in schema.names if c not in NOTE_COLUMNS]
+                    entry["text"] = pq.read_table(path, columns=columns, memory_map=True).to_pandas()
+                    entry["meta"] = json.loads((schema.metadata or {}).get(META_KEY, b"{}"))
+                    entry["synced_at"] = entry["meta"].get("synced_at")
+                except Exception as e:
+                    print(f"History cache unreadable, will resync: {e}")
+            self._entries[host_id] = entry
+        return entry
+
+    def _read(self, host_id, columns=None):
+        """Cell-text frame of the host's file (only the given columns, if any); None if there is none"""
+        import pyarrow.parquet as pq
+        path = self.path(host_id)
+        if not os.path.exists(path):
+            return None
+        if columns is not None:
+            columns = [c for c in columns if c in pq.read_schema(path).names]
+        return pq.read_table(path, columns=columns, memory_map=True).to_pandas()
+
+    def _write(self, host_id, text, meta):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        table = pa.Table.from_pandas(text, preserve_index=False)
+        table = table.replace_schema_metadata({**(table.schema.metadata or {}), META_KEY: json.dumps(meta).encode()})
+        path = self.path(host_id)
+        pq.write_table(table, path + ".tmp")
+        os.replace(path + ".tmp", path)  # Readers see the old file or the new one, never half of it
+
+    # --- Reads ---
+    def has(self, host_id):
+        with self._lock:
+            return self._load(host_id)["text"] is not None
+
+    def _ingest(self, entry):
+        if entry["frame"] is None:
+            text = entry["text"] if entry["text"] is not None else pd.DataFrame(columns=self.columns)
+            entry["frame"], entry["report"] = ingest_history(text)
+
+    def frame(self, host_id):
+        """The cached history, typed by ingest_history() (shared: don't modify it)"""
+        with self._lock:
+            entry = self._load(host_id)
+            self._ingest(entry)
+            return entry["frame"]
+
+    def report(self, host_id):
+        """Cells of the cached history that ingest_history() could not type"""
+        with self._lock:
+            entry = self._load(host_id)
+            self._ingest(entry)
+            return entry["report"]
+
+    def notes(self, host_id):
+        """The notes table (split_notes()), read from disk on first use"""
+        with self._lock:
+            entry = self._load(host_id)
+            if entry["notes"] is None:
+                text = self._read(host_id, ["Session_ID"] + NOTE_COLUMNS)
+                entry["notes"] = split_notes(text if text is not None else pd.DataFrame())
+            return entry["notes"]
+
+    def age(self, host_id):
+        """Seconds since the last sync (inf if never)"""
+        with self._lock:
+            synced_at = self._load(host_id)["synced_at"]
+        return time.time() - synced_at if synced_at else float("inf")
+
+    def status(self, host_id):
+        with self._lock:
+            entry = self._load(host_id)
+            path = self.path(host_id)
+            return {
+                "rows": 0 if entry["text"] is None else len(entry["text"]),
+                "watermark": entry["meta"].get("watermark"),
+                "synced_at": entry["synced_at"],
+                "bytes": os.path.getsize(path) if os.path.exists(path) else 0,
+            }
+
+    # --- Sync ---
+    def want(self, host_id):
+        """Asks the host's next worker run to sync"""
+        with self._lock:
+            self._wanted.add(host_id)
+
+    def is_wanted(self, host_id):
+        with self._lock:
+            return host_id in self._wanted
+
+    def sync(self, host_id, fetch, on_rows=None):
+        """Merges the rows after the watermark; returns how many were new.
+
+        fetch(watermark) -> (rows, watermark), or None if the history no longer
+        matches the watermark, in which case everything is fetched again.
+        on_rows(rows, full), if given, gets the fetched rows (cell text) once
+        they are on disk, so derived data can follow the cache.
+        """
+        with self._sync_lock:
+            with self._lock:
+                watermark = self._load(host_id)["meta"].get("watermark")
+            result = fetch(watermark) if watermark else None
+            full = result is None
+            if full:
+                result = fetch(None)
+            rows, watermark = result
+            with self._lock:
+                entry = self._load(host_id)
+                if rows or full or entry["text"] is None:
+                    new = pd.DataFrame(rows, columns=list(dict.fromkeys(k for row in rows for k in row)) or self.columns)
+                    text = None if full or entry["text"] is None else self._read(host_id)  # Notes included: the file is rewritten whole
+                    text = new if text is None else pd.concat([text, new], ignore_index=True)
+                    text = text.fillna("").astype(str)
+                    if "Session_ID" in text.columns:
+                        # A re-sent append can land twice; legacy rows have no id
+                        text = text[(text["Session_ID"] == "") | ~text["Session_ID"].duplicated()].reset_index(drop=True)
+                    entry["meta"] = {"watermark": watermark, "synced_at": time.time()}
+                    self._write(host_id, text, entry["meta"])
+                    entry["text"] = text.drop(columns=[c for c in NOTE_COLUMNS if c in text.columns])
+                    entry["frame"] = entry["report"] = entry["notes"] = None
+                entry["synced_at"] = time.time()
+                self._wanted.discard(host_id)
+            if on_rows is not None and (rows or full):
+                on_rows(rows, full)
+            return len(rows)
+
+    def resync(self, host_id, fetch, on_rows=None):
+        """Fetches the whole history again; the old copy is kept until that succeeds"""
+        with self._lock:
+            self._load(host_id)["meta"].pop("watermark", None)
+        return self.sync(host_id, fetch, on_rows)
@@ -0,0 +1,128 @@
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+# --- Typed History Ingestion (V8.0) ---
+# The history comes back from Sheets (or the local cache) as cell text, or
+# with whatever dtypes the reader guessed. Ingestion types it once, column by
+# column, against a fixed schema: Timestamp as datetime64, Mode and Host_ID
+# as categoricals, amounts as int32 when every value is whole (float64
+# otherwise, so cents stay exact). Free text is split off into a notes table
+# keyed by Session_ID that is only read when someone asks for it. A value
+# that doesn't parse becomes NaT/NaN and is listed in the report; the row is
+# kept, so one bad cell doesn't hide a session.
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+DATETIME_COLUMNS = ["Timestamp"]
+CATEGORY_COLUMNS = ["Host_ID", "Mode"]
+AMOUNT_COLUMNS = ["Total_Buyin", "Total_Cashout", "Gross_Profit", "Expenses", "Net_Profit", "My_Share"]
+NOTE_COLUMNS = ["Notes"]
+EXPENSE_MARKER = r"\s*\|\s*Exp:\s*"  # " | Exp: " as a saved session appends its expense breakdown, edge spaces optional
+NOTES_TABLE_COLUMNS = ["Session_ID", "Note", "Expense_Details"]
+ERROR_COLUMNS = ["Row", "Session_ID", "Column", "Value", "Error"]
+INT32 = np.iinfo(np.int32)
+
+
+def _text(raw, column):
+    """A column as stripped text, '' for blanks and missing columns"""
+    if column not in raw.columns:
+        return pd.Series("", index=raw.index, dtype=object)
+    values = raw[column]
+    return values.astype(object).where(values.notna(), "").astype(str).str.strip()
+
+
+def session_ids(raw):
+    """Session_ID as text; legacy rows without one get 'row<N>' so notes still join back"""
+    ids = _text(raw, "Session_ID")
+    blank = ids.eq("")
+    if blank.any():
+        ids[blank] = "row" + pd.Series(np.arange(len(raw)) + 2, index=raw.index)[blank].astype(str)
+    return ids.astype("string")
+
+
+def _amounts(values):
+    """Parsed floats -> int32 if every value is whole and in range, else float64"""
+    present = values.dropna()
+    if len(present) == len(values) and (present % 1 == 0).all() and present.between(INT32.min, INT32.max).all():
+        return values.astype("int32")
+    return values.astype("float64")
+
+
+def ingest_history(raw):
+    """(typed sessions, coercion report) for a history frame (text or reader-typed).
+
+    Report rows count from 2 in the order read, like sheet rows under the
+    header. Note columns are left out: split_notes() builds their own table.
+    """
+    raw = raw.reset_index(drop=True)
+    row = pd.Series(np.arange(len(raw)) + 2, index=raw.index)
+    ids = session_ids(raw)
+    problems = []
+
+    def flag(mask, column, values, message):
+        if mask.any():
+            problems.append(pd.DataFrame({
+                "Row": row[mask], "Session_ID": ids[mask], "Column": column, "Value": values[mask], "Error": message
+            }))
+
+    typed = pd.DataFrame(index=raw.index)
+    typed["Session_ID"] = ids
+
+    for column in DATETIME_COLUMNS:
+        text = _text(raw, column)
+        parsed = pd.to_datetime(text, format=TIMESTAMP_FORMAT, errors="coerce")
+        retry = parsed.isna() & text.ne("")
+        if retry.any():
+            # Sheets may hand back its own date format for USER_ENTERED cells
+            parsed[retry] = pd.to_datetime(text[retry], format="mixed", errors="coerce")
+        flag(parsed.isna() & text.ne(""), column, text, "Not a date")
+        typed[column] = parsed.astype("datetime64[ns]")
+
+    for column in CATEGORY_COLUMNS:
+        text = _text(raw, column)
+        typed[column] = text.where(text.ne(""), None).astype("category")
+
+    for column in AMOUNT_COLUMNS:
+        text = _text(raw, column)
+        values = pd.to_numeric(text.str.replace(r"[$,]", "", regex=True), errors="coerce")
+        flag(values.isna() & text.ne(""), column, text, "Not a number")
+        typed[column] = _amounts(values)
+
+    known = set(["Session_ID"] + DATETIME_COLUMNS + CATEGORY_COLUMNS + AMOUNT_COLUMNS + NOTE_COLUMNS)
+    for column in raw.columns:
+        if column not in known:
+            typed[column] = _text(raw, column).astype("string")  # Columns added to the sheet by hand
+
+    report = pd.concat(problems, ignore_index=True).sort_values("Row", kind="stable") if problems else pd.DataFrame(columns=ERROR_COLUMNS)
+    return typed, report.reset_index(drop=True)
+
+
+def split_notes(raw):
+    """Session_ID, the host's note and the expense breakdown, one row per session with any text"""
+    raw = raw.reset_index(drop=True)
+    notes = _text(raw, "Notes")
+    if not notes.ne("").any():
+        return pd.DataFrame({c: pd.Series(dtype="string") for c in NOTES_TABLE_COLUMNS})
+    # The cells are stripped, so a blank note or breakdown leaves the marker without its outer space
+    parts = notes.str.split(EXPENSE_MARKER, n=1, regex=True, expand=True).reindex(columns=[0, 1]).fillna("")
+    table = pd.DataFrame({
+        "Session_ID": session_ids(raw),
+        "Note": parts[0].str.strip().astype("string"),
+        "Expense_Details": parts[1].str.strip().astype("string"),
+    })
+    return table[notes.ne("")].reset_index(drop=True)
+
+
+def concat_sessions(frames):
+    """Concatenates ingested frames, keeping the categoricals categorical"""
+    frames = [f for f in frames if f is not None and not f.empty]
+    if len(frames) < 2:
+        return frames[0] if frames else ingest_history(pd.DataFrame())[0]
+    combined = pd.concat(frames, ignore_index=True)
+    for column in CATEGORY_COLUMNS:
+        if all(column in f.columns for f in frames):
+            combined[column] = union_categoricals([f[column] for f in frames], ignore_order=True)
+    for column in AMOUNT_COLUMNS:
+        if column in combined.columns and combined[column].dtype != "int32":
+            combined[column] = _amounts(combined[column].astype("float64"))
+    return combined
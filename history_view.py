@@ -0,0 +1,93 @@
+import math
+
+import numpy as np
+import pandas as pd
+
+# --- Long-History Rendering (V8.0) ---
+# The Analytics page used to send every session to the browser: one plotted
+# marker per bucket and the whole log through a Styler. The growth curve is
+# now cut to at most max_points by Largest-Triangle-Three-Buckets, which
+# keeps the peaks and dips a plain every-Nth sample drops, over whatever date
+# range is on screen (zooming in brings the detail back). The session log is
+# filtered, sorted and paged here; only one page reaches st.dataframe.
+
+MAX_CURVE_POINTS = 400
+PAGE_SIZE = 50
+WEEK_START = "-1"  # '%G-W%V' buckets parse from their Monday
+
+
+def lttb(x, y, threshold):
+    """Indices of the threshold points Largest-Triangle-Three-Buckets keeps, first and last included"""
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype="float64")
+    y = np.asarray(y, dtype="float64")
+    # Points 1..n-2 split into threshold-2 buckets; one point is kept from each
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+    keep = np.empty(threshold, dtype=int)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        lo, hi = edges[i], edges[i + 1]
+        nlo, nhi = hi, edges[i + 2] if i + 2 < len(edges) else n
+        avg_x, avg_y = x[nlo:nhi].mean(), y[nlo:nhi].mean()
+        # Twice the area of the triangle (last kept point, candidate, next bucket's average)
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(np.argmax(area))
+        keep[i + 1] = a
+    return keep
+
+
+def bucket_dates(grain, buckets):
+    """Rollup bucket labels ('2026-10-17', '2026-W42', '2026-10') -> their start dates"""
+    buckets = pd.Series(buckets, dtype=object).astype(str)
+    if grain == "week":
+        return pd.to_datetime(buckets + WEEK_START, format="%G-W%V-%u", errors="coerce")
+    return pd.to_datetime(buckets, format="%Y-%m" if grain == "month" else "%Y-%m-%d", errors="coerce")
+
+
+def downsample_curve(df, grain, max_points=MAX_CURVE_POINTS, y="Cumulative_Profit"):
+    """The series rows LTTB keeps (all of them if there are max_points or fewer)"""
+    if len(df) <= max_points:
+        return df
+    dates = bucket_dates(grain, df["Bucket"])
+    x = dates.astype("int64").to_numpy() if dates.notna().all() else np.arange(len(df))
+    return df.iloc[lttb(x, df[y].to_numpy(), max_points)].reset_index(drop=True)
+
+
+# --- Session Log Pages ---
+def filter_sessions(df, start=None, end=None, modes=(), session_ids=None):
+    """Boolean mask: sessions on start..end (dates, inclusive), in modes, among session_ids"""
+    mask = np.ones(len(df), dtype=bool)
+    if start is not None or end is not None:
+        days = df["Timestamp"].dt.normalize()
+        if start is not None:
+            mask &= (days >= pd.Timestamp(start)).to_numpy()
+        if end is not None:
+            mask &= (days <= pd.Timestamp(end)).to_numpy()
+    if modes:
+        mask &= df["Mode"].isin(modes).to_numpy()
+    if session_ids is not None:
+        mask &= df["Session_ID"].isin(session_ids).to_numpy()
+    return mask
+
+
+def page_sessions(df, mask, sort_by="Timestamp", descending=True, page=1, page_size=PAGE_SIZE):
+    """(rows of the page, matching rows, page count). Only the page's rows are copied."""
+    matching = np.flatnonzero(mask)
+    total = len(matching)
+    pages = max(1, math.ceil(total / page_size))
+    page = min(max(1, page), pages)
+    key = df[sort_by].iloc[matching]
+    if key.dtype.kind == "M":
+        values = key.to_numpy().view("int64")  # NaT sorts first
+    elif key.dtype.kind in "fiu":
+        values = key.to_numpy(dtype="float64", na_value=np.nan)
+    else:
+        values = key.astype(str).to_numpy()  # Text and categoricals: alphabetical
+    order = np.argsort(values, kind="stable")
+    if descending:
+        order = order[::-1]
+    rows = matching[order[(page - 1) * page_size: page * page_size]]
+    return df.iloc[rows].reset_index(drop=True), total, pages
@@ -0,0 +1,229 @@
+import numpy as np
+
+import poker_core
+import session_events
+from player_table import SEATED, PlayerTable
+
+# --- Incremental Ledger (V6.9) ---
+# Running totals behind the audit badge and dashboard. Every money/chip
+# mutation goes through the functions below, which change the session state
+# and nudge the ledger in O(1), so a rerun never loops over the players.
+# The full recompute is a vectorized pass over the PlayerTable (V7.0), and
+# every mutation is also recorded as a session event (V7.5).
+
+LEDGER_FIELDS = [
+    "total_inflow",        # cash_in + credit_in of every player
+    "chips_on_table",      # stack value of active + paused players
+    "total_final_stacks",  # final_stack of cashed-out players
+    "total_fees_in_rake",  # positive final_fee of cashed-out players
+    "total_payout",        # final_payout of cashed-out players
+    "total_exp",           # expenses_log amounts
+]
+
+
+class Ledger:
+    """O(1)-maintained totals; from_state() is the full recompute used to seed and verify it"""
+
+    def __init__(self, chip_config):
+        self.chip_config = dict(chip_config)
+        for f in LEDGER_FIELDS:
+            setattr(self, f, 0)
+
+    @classmethod
+    def from_state(cls, state, chip_config):
+        ledger = cls(chip_config)
+        for f, v in state['players'].totals(chip_config).items():
+            setattr(ledger, f, v)
+        ledger.total_exp = state['expenses_log'].total('Amount') # Archived segments included (V8.0)
+        return ledger
+
+    def _add_player(self, p, sign=1):
+        self.total_inflow += sign * (p['cash_in'] + p['credit_in'])
+        if p['status'] in SEATED:
+            self.chips_on_table += sign * p.stack(self.chip_config)
+        elif p['status'] == 'out':
+            self.total_final_stacks += sign * p.get('final_stack', 0)
+            self.total_payout += sign * p.get('final_payout', 0)
+            if p.get('final_fee', 0) > 0:
+                self.total_fees_in_rake += sign * p['final_fee']
+
+    def audit(self, state):
+        """Inflow minus everything accounted for; 0 = balanced, >0 = short, <0 = surplus"""
+        return poker_core.audit_discrepancy(
+            self.total_inflow, self.chips_on_table, self.total_final_stacks,
+            state['income_rake'], self.total_fees_in_rake, state['income_insurance'])
+
+    def diff(self, other):
+        """{field: (self, other)} for every total that disagrees"""
+        return {
+            f: (getattr(self, f), getattr(other, f))
+            for f in LEDGER_FIELDS
+            if abs(getattr(self, f) - getattr(other, f)) > 1e-6
+        }
+
+
+# --- Ledger Access ---
+def get_ledger(state, chip_config):
+    """The session's ledger, rebuilt only if missing or the chip values changed"""
+    ledger = state.get('ledger')
+    if ledger is None or ledger.chip_config != dict(chip_config):
+        ledger = Ledger.from_state(state, chip_config)
+        state['ledger'] = ledger
+    return ledger
+
+
+def invalidate_ledger(state):
+    """Call after replacing players/logs wholesale (restore, import)"""
+    state.pop('ledger', None)
+
+
+def verify_ledger(state, chip_config):
+    """Debug check: incremental totals vs a full recompute"""
+    return get_ledger(state, chip_config).diff(Ledger.from_state(state, chip_config))
+
+
+def _now(fmt="%H:%M"):
+    return session_events.now().strftime(fmt)
+
+
+def _log(state, event, amount, type_):
+    state['log'].append({
+        "Time": _now("%H:%M:%S"),
+        "Event": event,
+        "Amount": f"${amount:,.0f}",
+        "Type": type_
+    })
+
+
+# --- Mutations ---
+# Each one records a typed event (V7.5) before changing state, so replaying
+# the events through these same functions rebuilds the session exactly.
+def add_player(state, chip_config, name, cash_in, credit_in):
+    session_events.record(state, "player_added", name=name, cash_in=cash_in, credit_in=credit_in)
+    ledger = get_ledger(state, chip_config)
+    old = state['players'].get(name)
+    if old is not None:
+        ledger._add_player(old, sign=-1)  # Re-adding a name replaces that player
+    p = state['players'].add(name, cash_in, credit_in, denoms=chip_config)
+    ledger._add_player(p)
+    return p
+
+
+def rebuy(state, chip_config, name, amount):
+    session_events.record(state, "rebuy", name=name, amount=amount)
+    state['players'][name]['cash_in'] += amount
+    get_ledger(state, chip_config).total_inflow += amount
+    _log(state, f"{name} Rebuy", amount, "Cash")
+
+
+def repay(state, chip_config, name, amount):
+    session_events.record(state, "repay", name=name, amount=amount)
+    # Credit turns into cash: total inflow is unchanged
+    p = state['players'][name]
+    p['credit_in'] -= amount
+    p['cash_in'] += amount
+    _log(state, f"{name} Repaid Debt", amount, "Repay")
+
+
+def set_status(state, chip_config, name, status):
+    """Sit out / return (both sides keep their chips on the table)"""
+    p = state['players'][name]
+    if p['status'] == status:
+        return
+    session_events.record(state, "status_changed", name=name, status=status)
+    ledger = get_ledger(state, chip_config)
+    ledger._add_player(p, sign=-1)
+    p['status'] = status
+    ledger._add_player(p)
+
+
+def set_chip_count(state, chip_config, name, chip, count):
+    p = state['players'][name]
+    old = p['chip_counts'].get(chip, 0)
+    if count == old:
+        return False
+    session_events.record(state, "chips_set", name=name, chip=chip, count=count)
+    p['chip_counts'][chip] = count
+    if p['status'] in SEATED:
+        ledger = get_ledger(state, chip_config)
+        ledger.chips_on_table += (count - old) * ledger.chip_config[chip]
+    return True
+
+
+def set_chip_counts(state, chip_config, names, counts, chips=None):
+    """Bulk set_chip_count for the count grid (V7.2).
+
+    counts is a len(names) x len(chips) matrix, chips defaulting to
+    chip_config order; returns the names whose counts changed.
+    """
+    table = state['players']
+    chips = list(chips or chip_config)
+    counts = np.asarray(counts, dtype=np.int64).reshape(len(names), len(chips))
+    old = table.chip_matrix(names, chips)
+    changed = (counts != old).any(axis=1)
+    if not changed.any():
+        return []
+    session_events.record(state, "chips_counted", names=list(names), chips=chips, counts=counts.tolist())
+    table.set_chip_matrix(names, chips, counts)
+    ledger = get_ledger(state, chip_config)
+    seated = np.array([table[n]['status'] in SEATED for n in names])
+    values = np.array([ledger.chip_config.get(k, 0) for k in chips], dtype=np.float64)
+    ledger.chips_on_table += float(((counts - old) @ values)[seated].sum())
+    return [n for n, c in zip(names, changed) if c]
+
+
+def cash_out(state, chip_config, name, stack, payout, fee):
+    session_events.record(state, "cashed_out", name=name, stack=stack, payout=payout, fee=fee)
+    p = state['players'][name]
+    ledger = get_ledger(state, chip_config)
+    ledger._add_player(p, sign=-1)
+    p['final_stack'] = stack
+    p['final_payout'] = payout
+    p['final_fee'] = fee
+    p['status'] = 'out'
+    ledger._add_player(p)
+
+
+def _rake(state, amount, event, cash=False):
+    state['income_rake'] += amount
+    if cash:
+        state['fee_cash_collected'] += amount
+    state['rake_log'].append({"Time": _now(), "Event": event, "Amount": amount})
+
+
+def charge_fee(state, chip_config, name, amount, cash=False):
+    """Time Charge venue fee at cash-out: deducted from the stack, or paid in cash"""
+    session_events.record(state, "fee_charged", name=name, amount=amount, cash=cash)
+    event = f"{name} Fee (Cash)" if cash else f"{name} Fee"
+    _rake(state, amount, event, cash=cash)
+    _log(state, event, amount, "Fee")
+
+
+def add_rake(state, chip_config, amount, event):
+    session_events.record(state, "rake_added", amount=amount, event=event)
+    _rake(state, amount, event)
+
+
+def add_insurance(state, chip_config, delta, action, details, change):
+    session_events.record(state, "insurance", delta=delta, action=action, details=details, change=change)
+    state['income_insurance'] += delta
+    state['insurance_log'].append({"Time": _now(), "Action": action, "Details": details, "Change": change})
+
+
+def add_expense(state, chip_config, item, amount):
+    session_events.record(state, "expense_added", item=item, amount=amount)
+    state['expenses_log'].append({"Time": _now(), "Item": item, "Amount": amount})
+    get_ledger(state, chip_config).total_exp += amount
+
+
+def import_players(state, chip_config, players):
+    """Replaces every player at once (Admin CSV import); players is a PlayerTable or its snapshot"""
+    table = players if isinstance(players, PlayerTable) else PlayerTable.from_snapshot(players)
+    session_events.record(state, "players_imported", players=table.to_snapshot())
+    state['players'] = table
+    invalidate_ledger(state)
+
+
+def set_game_mode(state, chip_config, mode):
+    session_events.record(state, "mode_changed", mode=mode)
+    state['game_mode'] = mode
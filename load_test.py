@@ -0,0 +1,305 @@
+"""End-to-end load test: many hosts' nights played through app.py on one server (V8.0).
+
+Each simulated host is a Streamlit AppTest session on its own thread, all in
+this one process, so they share what a real server shares: the storage
+backend and its quota gate, the local SQLite store, the sync workers and
+the live session hub. Storage is the in-memory Sheets stand-in with
+simulated network latency. Every host plays a night:
+
+    login -> add players -> rebuys / chip counts (x rounds) -> cash-outs -> save session
+
+and every interaction's rerun is timed. The report gives rerun time
+percentiles per step, Sheets API calls (total, per host, per op; counted
+once the sync workers have mirrored everything) and memory per session.
+
+The script runs are SERIALIZED: AppTest swaps process globals (the runtime,
+st.secrets) around each run, so only one run can be in flight and they
+take turns on one lock. What does overlap is everything behind the script:
+the sync workers' Sheets I/O, the quota gate and the store. So "run" is
+the cost of one rerun with the shared resources under that background
+load, and "queued" (click to result) is mostly time spent waiting for the
+other hosts' turns; neither is the latency of concurrent script threads
+on a real server, and runs/s is one script thread's throughput.
+
+    python load_test.py --hosts 24 --latency-ms 80 --jitter-ms 30
+    python load_test.py --hosts 48 --players 10 --json load.json
+"""
+import argparse
+import collections
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+from streamlit.testing.v1 import AppTest
+
+import memory_sheets
+from local_store import LocalStore
+from sync_worker import STATUS_SYNCED, live_workers
+
+APP = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+PASSWORD = "load-test"
+
+_run_lock = threading.Lock()  # One AppTest script run at a time, across all hosts (see above)
+
+
+# --- Memory ---
+def deep_size(obj, seen=None):
+    """Bytes held by obj and everything it references (NumPy buffers included)"""
+    seen = set() if seen is None else seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, np.ndarray):
+        return size  # getsizeof already counts an array's own buffer
+    if isinstance(obj, dict):
+        size += sum(deep_size(k, seen) + deep_size(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset, collections.deque)):
+        size += sum(deep_size(v, seen) for v in obj)
+    elif hasattr(obj, "__dict__"):
+        size += deep_size(vars(obj), seen)
+    elif hasattr(obj, "__slots__"):
+        size += sum(deep_size(getattr(obj, s), seen) for s in obj.__slots__ if hasattr(obj, s))
+    return size
+
+
+def rss_bytes():
+    """Resident memory of this process (Linux /proc; peak RSS elsewhere)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+# --- One Simulated Host ---
+class SimulatedHost:
+    """Drives one AppTest session through a night, timing every rerun"""
+
+    def __init__(self, host_id, secrets, args, seed):
+        self.host_id = host_id
+        self.args = args
+        self.rng = random.Random(seed)
+        self.queued = collections.defaultdict(list)  # step -> [seconds from click to result, turn wait included]
+        self.service = collections.defaultdict(list)  # step -> [seconds of script run]
+        self.errors = []
+        self.at = AppTest.from_file(APP, default_timeout=args.timeout)
+        for section, values in secrets.items():
+            self.at.secrets[section] = values
+
+    def _timed(self, step, element):
+        t0 = time.perf_counter()
+        with _run_lock:
+            t1 = time.perf_counter()
+            element.run()
+        t2 = time.perf_counter()
+        self.queued[step].append(t2 - t0)
+        self.service[step].append(t2 - t1)
+        if self.at.exception:
+            self.errors.append(f"{step}: {self.at.exception[0].value}")
+
+    def _find(self, elements, **match):
+        for e in elements:
+            if all(getattr(e, k, None) == v for k, v in match.items()):
+                return e
+        raise LookupError(f"{self.host_id}: no widget with {match}")
+
+    def play(self):
+        at, rng = self.at, self.rng
+        self._timed("load", at)
+        at.text_input[0].input(self.host_id)
+        at.text_input[1].input(PASSWORD)
+        self._timed("login", self._find(at.button, label="Log In").click())
+
+        names = [f"{self.host_id}-p{i}" for i in range(self.args.players)]
+        for name in names:
+            self._find(at.text_input, label="Name").input(name)
+            self._find(at.number_input, label="Cash In").set_value(rng.choice([1000, 2000, 5000]))
+            self._timed("add_player", self._find(at.button, label="Add").click())
+
+        for _ in range(self.args.rounds):
+            for name in rng.sample(names, max(1, len(names) // 3)):
+                self._find(at.number_input, key=f"rb_{name}").set_value(rng.choice([500, 1000]))
+                self._timed("rebuy", self._find(at.button, key=f"btn_rb_{name}").click())
+            for name in names:
+                chip = rng.choice(["white", "red", "black", "purple", "yellow"])
+                self._timed("chip_count", self._find(at.number_input, key=f"c_{name}_{chip}").set_value(rng.randint(1, 40)))
+            time.sleep(self.args.think)
+
+        for name in names[: len(names) // 2]:
+            self._timed("cash_out", self._find(at.button, key=f"btn_co_{name}").click())
+        self._timed("save_session", self._find(at.button, label="💾 Save Session to Cloud").click())
+
+    def run(self, start_at):
+        time.sleep(max(0.0, start_at - time.monotonic()))
+        try:
+            self.play()
+        except Exception as e:  # One broken host is reported, not fatal to the run
+            self.errors.append(f"{type(e).__name__}: {e}")
+        self.state_bytes = deep_size(dict(self.at.session_state.items()))
+
+
+# --- Report ---
+def percentiles(samples):
+    p50, p95, p99 = np.percentile(samples, [50, 95, 99]) * 1000
+    return {"n": len(samples), "p50_ms": round(p50, 1), "p95_ms": round(p95, 1),
+            "p99_ms": round(p99, 1), "max_ms": round(max(samples) * 1000, 1)}
+
+
+def settle(store, quiet, timeout=180.0, poll=0.25):
+    """Waits until the sync workers have mirrored everything; returns False on timeout.
+
+    Drained means every worker reports synced, the local store has no
+    unsynced snapshot, event or session left, and no Sheets call happened
+    for `quiet` seconds. A quiet spell alone isn't enough: a worker waiting
+    for its host's write quota makes no calls while it waits.
+    """
+    last, quiet_since = None, time.monotonic()
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        total = sum(memory_sheets.call_counts().values())
+        if total != last:
+            last, quiet_since = total, time.monotonic()
+        elif (time.monotonic() - quiet_since >= quiet
+              and all(w.status == STATUS_SYNCED for w in live_workers())
+              and not any(store.unsynced_counts().values())):
+            return True
+        time.sleep(poll)
+    return False
+
+
+def run_load(args):
+    workdir = args.workdir or tempfile.mkdtemp(prefix="poker_load_")
+    host_ids = [f"host{i:03d}" for i in range(args.hosts)]
+    secrets = {
+        "hosts": {h: PASSWORD for h in host_ids},
+        "storage": {"backend": "memory", "latency_ms": args.latency_ms, "jitter_ms": args.jitter_ms,
+                    "path": os.path.join(workdir, "sheets.json")},
+        "flight_recorder": {"local_db": os.path.join(workdir, "poker_crm.db"), "debounce": args.debounce},
+        "history_cache": {"dir": os.path.join(workdir, "history_cache")},
+    }
+    if args.host_write_per_min:
+        secrets["quota"] = {"host_write_per_min": args.host_write_per_min}
+    # Warm-up: the first run imports everything and creates the process-wide resources
+    SimulatedHost("warmup", {**secrets, "hosts": {"warmup": PASSWORD}}, args, 0).at.run()
+
+    calls_before = memory_sheets.call_counts()
+    rss_before = rss_bytes()
+    hosts = [SimulatedHost(h, secrets, args, seed=i) for i, h in enumerate(host_ids)]
+    start = time.monotonic() + 0.5
+    threads = [
+        threading.Thread(target=host.run, args=(start + i * args.ramp,), name=host.host_id, daemon=True)
+        for i, host in enumerate(hosts)
+    ]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+    rss_after = rss_bytes()
+    drained = settle(LocalStore(secrets["flight_recorder"]["local_db"]), max(1.0, args.debounce * 2), args.settle_timeout)
+
+    calls = memory_sheets.call_counts()
+    calls.subtract(calls_before)
+    by_step, svc_by_step = collections.defaultdict(list), collections.defaultdict(list)
+    for host in hosts:
+        for step, samples in host.queued.items():
+            by_step[step].extend(samples)
+            svc_by_step[step].extend(host.service[step])
+    everything = [s for samples in by_step.values() for s in samples]
+    svc_everything = [s for samples in svc_by_step.values() for s in samples]
+    state_sizes = [host.state_bytes for host in hosts]
+    return {
+        "hosts": args.hosts, "players": args.players, "rounds": args.rounds,
+        "latency_ms": args.latency_ms, "jitter_ms": args.jitter_ms,
+        "script_runs": "serialized",
+        "drained": drained,
+        "elapsed_s": round(elapsed, 2), "reruns": len(everything),
+        "serial_reruns_per_s": round(len(everything) / elapsed, 1),
+        "service": {"(all)": percentiles(svc_everything), **{step: percentiles(s) for step, s in svc_by_step.items()}},
+        "queued": {"(all)": percentiles(everything), **{step: percentiles(s) for step, s in by_step.items()}},
+        "api_calls": {
+            "total": sum(calls.values()),
+            "reads": sum(n for (kind, _), n in calls.items() if kind == "read"),
+            "writes": sum(n for (kind, _), n in calls.items() if kind == "write"),
+            "per_host": round(sum(calls.values()) / args.hosts, 1),
+            "by_op": {f"{kind}:{op}": n for (kind, op), n in sorted(calls.items()) if n},
+        },
+        "memory": {
+            "session_state_kb_avg": round(np.mean(state_sizes) / 1024, 1),
+            "session_state_kb_max": round(max(state_sizes) / 1024, 1),
+            "rss_growth_kb_per_host": round((rss_after - rss_before) / 1024 / args.hosts, 1),
+        },
+        "errors": {host.host_id: host.errors for host in hosts if host.errors},
+    }
+
+
+def format_report(report):
+    lines = [
+        f"{report['hosts']} hosts x {report['players']} players x {report['rounds']} rounds, "
+        f"Sheets latency {report['latency_ms']}±{report['jitter_ms']} ms",
+        f"{report['reruns']} reruns in {report['elapsed_s']} s ({report['serial_reruns_per_s']}/s, "
+        "script runs serialized: one at a time across all hosts)",
+        "",
+        f"{'step':<14}{'n':>7}{'run p50':>10}{'run p95':>10}{'run p99':>10}{'run max':>10}{'queued p50':>12}{'queued p95':>12}",
+    ]
+    for step, p in report["service"].items():
+        queued = report["queued"][step]
+        lines.append(f"{step:<14}{p['n']:>7}{p['p50_ms']:>10}{p['p95_ms']:>10}{p['p99_ms']:>10}{p['max_ms']:>10}"
+                     f"{queued['p50_ms']:>12}{queued['p95_ms']:>12}")
+    api = report["api_calls"]
+    lines += ["", f"Sheets API calls: {api['total']} ({api['reads']} reads, {api['writes']} writes), {api['per_host']} per host"]
+    if not report["drained"]:
+        lines.append("  WARNING: the sync workers had not drained when counted; the totals are short")
+    lines += [f"  {op:<28}{n:>7}" for op, n in api["by_op"].items()]
+    mem = report["memory"]
+    lines += ["", f"Session state: {mem['session_state_kb_avg']} KB avg, {mem['session_state_kb_max']} KB max; "
+                  f"RSS growth {mem['rss_growth_kb_per_host']} KB per host"]
+    for host_id, errors in report["errors"].items():
+        lines.append(f"ERRORS {host_id}: {'; '.join(errors[:3])}")
+    return "\n".join(lines)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--hosts", type=int, default=24, help="simulated hosts (their script runs take turns)")
+    parser.add_argument("--players", type=int, default=8, help="players per host")
+    parser.add_argument("--rounds", type=int, default=2, help="rebuy/chip-count rounds per night")
+    parser.add_argument("--latency-ms", type=float, default=80, help="simulated Sheets API latency")
+    parser.add_argument("--jitter-ms", type=float, default=30)
+    parser.add_argument("--host-write-per-min", type=int, help="tighter per-host Sheets write quota (default: the app's)")
+    parser.add_argument("--debounce", type=float, default=1.5, help="flight recorder debounce (s)")
+    parser.add_argument("--ramp", type=float, default=0.1, help="seconds between host starts")
+    parser.add_argument("--think", type=float, default=0.0, help="pause between rounds (s)")
+    parser.add_argument("--timeout", type=float, default=120, help="per-rerun timeout (s)")
+    parser.add_argument("--settle-timeout", type=float, default=180, help="max wait for the sync workers to drain (s)")
+    parser.add_argument("--workdir", help="where the SQLite store and sheet file go (default: a temp dir)")
+    parser.add_argument("--json", help="also write the report as JSON")
+    parser.add_argument("--max-p95-ms", type=float, help="exit 1 if the overall p95 script run time is above this")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    report = run_load(args)
+    print(format_report(report))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    failed = bool(report["errors"]) or not report["drained"]
+    if args.max_p95_ms is not None and report["service"]["(all)"]["p95_ms"] > args.max_p95_ms:
+        print(f"Run p95 {report['service']['(all)']['p95_ms']} ms is over the {args.max_p95_ms} ms budget")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,255 @@
+import sqlite3
+import threading
+
+from session_events import RevisionConflict
+
+# --- Local Primary Store (V6.4) ---
+# SQLite is the authoritative copy of the Flight Recorder snapshot and the
+# session history; Google Sheets is a mirror fed by the sync worker.
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    host_id     TEXT PRIMARY KEY,
+    updated_at  TEXT NOT NULL,
+    state_json  TEXT,              -- NULL = wiped (tombstone until mirrored)
+    rev         INTEGER NOT NULL DEFAULT 1,
+    synced      INTEGER NOT NULL DEFAULT 0,
+    seq         INTEGER NOT NULL DEFAULT 0,  -- last event folded into state_json
+    head_seq    INTEGER NOT NULL DEFAULT 0   -- last committed event (the host's revision)
+);
+CREATE TABLE IF NOT EXISTS sessions (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    host_id     TEXT NOT NULL,
+    record_json TEXT NOT NULL,
+    attempts    INTEGER NOT NULL DEFAULT 0,
+    synced      INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_sessions_host ON sessions(host_id, synced);
+CREATE TABLE IF NOT EXISTS events (
+    host_id     TEXT NOT NULL,
+    seq         INTEGER NOT NULL,
+    event_json  TEXT NOT NULL,
+    synced      INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (host_id, seq)
+);
+CREATE TABLE IF NOT EXISTS checkpoints (
+    host_id     TEXT NOT NULL,
+    seq         INTEGER NOT NULL,  -- last event folded into state_json
+    state_json  TEXT NOT NULL,
+    PRIMARY KEY (host_id, seq)
+);
+CREATE TABLE IF NOT EXISTS log_segments (
+    host_id       TEXT NOT NULL,
+    log           TEXT NOT NULL,     -- 'log', 'rake_log', ...
+    segment       INTEGER NOT NULL,  -- sealed segment number, oldest first
+    entries_json  TEXT NOT NULL,
+    PRIMARY KEY (host_id, log, segment)
+);
+"""
+
+
+class LocalStore:
+    """Thread-safe SQLite store shared by the script thread and the sync workers"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")  # Durable across app crashes, fast commits
+        self._db.executescript(_SCHEMA)
+        self._migrate()
+
+    def _migrate(self):
+        # V6.6: upload attempts, so a retried append is checked for duplicates first
+        cols = [r[1] for r in self._db.execute("PRAGMA table_info(sessions)")]
+        if "attempts" not in cols:
+            self._db.execute("ALTER TABLE sessions ADD COLUMN attempts INTEGER NOT NULL DEFAULT 0")
+        # V7.6: event revisions, checked on every commit
+        cols = [r[1] for r in self._db.execute("PRAGMA table_info(snapshots)")]
+        for col in ("seq", "head_seq"):
+            if col not in cols:
+                self._db.execute(f"ALTER TABLE snapshots ADD COLUMN {col} INTEGER NOT NULL DEFAULT 0")
+
+    def _exec(self, sql, params=()):
+        with self._lock:
+            return self._db.execute(sql, params).fetchall()
+
+    # --- Generic Access (used by rollups) ---
+    def query(self, sql, params=()):
+        return self._exec(sql, params)
+
+    def transaction(self, statements):
+        """Runs [(sql, params)] atomically"""
+        with self._lock:
+            self._db.execute("BEGIN")
+            try:
+                for sql, params in statements:
+                    self._db.execute(sql, params)
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+            self._db.execute("COMMIT")
+
+    # --- Snapshot ---
+    _UPSERT_SNAPSHOT = (
+        "INSERT INTO snapshots (host_id, updated_at, state_json, synced, seq, head_seq) VALUES (?, ?, ?, ?, ?, ?) "
+        "ON CONFLICT(host_id) DO UPDATE SET updated_at=excluded.updated_at, state_json=excluded.state_json, "
+        "synced=excluded.synced, seq=excluded.seq, head_seq=MAX(snapshots.head_seq, excluded.head_seq), "
+        "rev=snapshots.rev + 1"
+    )
+
+    def save_snapshot(self, host_id, updated_at, state_json, synced=False, seq=0):
+        """Local commit of a host's snapshot (the checkpoint after event seq); bumps its revision"""
+        self._exec(self._UPSERT_SNAPSHOT, (host_id, updated_at, state_json, int(synced), seq, seq))
+
+    def wipe_snapshot(self, host_id, updated_at):
+        """Leaves a tombstone so the wipe is mirrored to the cloud later; drops the session's events.
+
+        The wipe is itself a revision: devices still holding the old session
+        get a RevisionConflict on their next commit. Returns the new head.
+        """
+        self.transaction([
+            ("DELETE FROM events WHERE host_id = ?", (host_id,)),
+            ("DELETE FROM checkpoints WHERE host_id = ?", (host_id,)),
+            ("DELETE FROM log_segments WHERE host_id = ?", (host_id,)),
+            ("INSERT INTO snapshots (host_id, updated_at, state_json, head_seq) VALUES (?, ?, NULL, 1) "
+             "ON CONFLICT(host_id) DO UPDATE SET updated_at=excluded.updated_at, state_json=NULL, synced=0, "
+             "seq=0, head_seq=snapshots.head_seq + 1, rev=snapshots.rev + 1", (host_id, updated_at)),
+        ])
+        return self.head(host_id)
+
+    def load_snapshot(self, host_id):
+        """Returns {'updated_at', 'state_json', 'rev', 'synced', 'seq', 'head_seq'} or None"""
+        rows = self._exec(
+            "SELECT updated_at, state_json, rev, synced, seq, head_seq FROM snapshots WHERE host_id = ?", (host_id,)
+        )
+        if not rows:
+            return None
+        updated_at, state_json, rev, synced, seq, head_seq = rows[0]
+        return {
+            "updated_at": updated_at, "state_json": state_json, "rev": rev, "synced": bool(synced),
+            "seq": seq, "head_seq": head_seq,
+        }
+
+    def head(self, host_id):
+        """Seq of the host's last committed event (0 if none)"""
+        rows = self._exec("SELECT head_seq FROM snapshots WHERE host_id = ?", (host_id,))
+        return rows[0][0] if rows else 0
+
+    def mark_snapshot_synced(self, host_id, rev):
+        # Only if nothing newer was written while the upload was in flight
+        self._exec("UPDATE snapshots SET synced = 1 WHERE host_id = ? AND rev = ?", (host_id, rev))
+
+    # --- Event Log (V7.5) ---
+    def commit_events(self, host_id, base_seq, events, checkpoint=None, segments=()):
+        """Appends [(seq, event_json)] recorded on top of base_seq, in one transaction (V7.6).
+
+        checkpoint is an optional (updated_at, state_json) of the state after
+        the events; segments are [(log, segment, entries_json)] sealed out of
+        its logs (V8.0). Optimistic concurrency: if another device committed
+        since base_seq, nothing is written and RevisionConflict is raised.
+        """
+        head = events[-1][0] if events else base_seq
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._db.execute("SELECT head_seq FROM snapshots WHERE host_id = ?", (host_id,)).fetchone()
+                current = row[0] if row else 0
+                if current != base_seq:
+                    raise RevisionConflict(host_id, base_seq, current)
+                self._db.executemany(
+                    "INSERT INTO events (host_id, seq, event_json) VALUES (?, ?, ?)",
+                    [(host_id, seq, ev) for seq, ev in events]
+                )
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO log_segments (host_id, log, segment, entries_json) VALUES (?, ?, ?, ?)",
+                    [(host_id, log, n, entries) for log, n, entries in segments]
+                )
+                if checkpoint:
+                    updated_at, state_json = checkpoint
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO checkpoints (host_id, seq, state_json) VALUES (?, ?, ?)",
+                        (host_id, head, state_json)
+                    )
+                    self._db.execute(self._UPSERT_SNAPSHOT, (host_id, updated_at, state_json, 0, head, head))
+                elif row:
+                    self._db.execute("UPDATE snapshots SET head_seq = ? WHERE host_id = ?", (head, host_id))
+                else:
+                    # No snapshot yet: an already-mirrored placeholder that only carries the head
+                    self._db.execute(
+                        "INSERT INTO snapshots (host_id, updated_at, state_json, synced, head_seq) VALUES (?, '', NULL, 1, ?)",
+                        (host_id, head)
+                    )
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+            self._db.execute("COMMIT")
+
+    def append_events(self, host_id, events):
+        """[(seq, event_json)] copied in from the cloud log (no revision check)"""
+        if not events:
+            return
+        self.transaction([
+            ("INSERT OR REPLACE INTO events (host_id, seq, event_json) VALUES (?, ?, ?)", (host_id, seq, ev))
+            for seq, ev in events
+        ] + [("UPDATE snapshots SET head_seq = MAX(head_seq, ?) WHERE host_id = ?", (events[-1][0], host_id))])
+
+    def events(self, host_id, after=0, upto=None):
+        """[event_json] with after < seq <= upto, oldest first"""
+        sql, params = "SELECT event_json FROM events WHERE host_id = ? AND seq > ?", [host_id, after]
+        if upto is not None:
+            sql += " AND seq <= ?"
+            params.append(upto)
+        return [r[0] for r in self._exec(sql + " ORDER BY seq", params)]
+
+    def unsynced_events(self, host_id):
+        """[(seq, event_json)] not yet mirrored, oldest first"""
+        return self._exec("SELECT seq, event_json FROM events WHERE host_id = ? AND synced = 0 ORDER BY seq", (host_id,))
+
+    def mark_events_synced(self, host_id, upto):
+        self._exec("UPDATE events SET synced = 1 WHERE host_id = ? AND seq <= ?", (host_id, upto))
+
+    def save_checkpoint(self, host_id, seq, state_json):
+        self._exec("INSERT OR REPLACE INTO checkpoints (host_id, seq, state_json) VALUES (?, ?, ?)", (host_id, seq, state_json))
+
+    def checkpoint_at(self, host_id, seq):
+        """(seq, state_json) of the latest checkpoint at or before seq, or None"""
+        rows = self._exec(
+            "SELECT seq, state_json FROM checkpoints WHERE host_id = ? AND seq <= ? ORDER BY seq DESC LIMIT 1", (host_id, seq)
+        )
+        return rows[0] if rows else None
+
+    # --- Archived Log Segments (V8.0) ---
+    def log_segments(self, host_id, log):
+        """[entries_json] of a log's sealed segments, oldest first"""
+        return [r[0] for r in self._exec(
+            "SELECT entries_json FROM log_segments WHERE host_id = ? AND log = ? ORDER BY segment", (host_id, log)
+        )]
+
+    # --- Session History ---
+    def add_session(self, host_id, record_json):
+        self._exec("INSERT INTO sessions (host_id, record_json) VALUES (?, ?)", (host_id, record_json))
+
+    def unsynced_sessions(self, host_id):
+        """[(id, record_json, attempts)] not yet mirrored, oldest first"""
+        return self._exec(
+            "SELECT id, record_json, attempts FROM sessions WHERE host_id = ? AND synced = 0 ORDER BY id", (host_id,)
+        )
+
+    def mark_session_attempt(self, session_row_id):
+        self._exec("UPDATE sessions SET attempts = attempts + 1 WHERE id = ?", (session_row_id,))
+
+    def mark_session_synced(self, session_row_id):
+        self._exec("UPDATE sessions SET synced = 1 WHERE id = ?", (session_row_id,))
+
+    def sessions(self, host_id):
+        """[record_json] for every recorded session of a host, oldest first"""
+        return [r[0] for r in self._exec("SELECT record_json FROM sessions WHERE host_id = ? ORDER BY id", (host_id,))]
+
+    def unsynced_counts(self):
+        """{'snapshots', 'events', 'sessions'}: rows of every host not yet mirrored"""
+        return {
+            table: self._exec(f"SELECT COUNT(*) FROM {table} WHERE synced = 0")[0][0]
+            for table in ("snapshots", "events", "sessions")
+        }
@@ -0,0 +1,250 @@
+import json
+import os
+import random
+import re
+import threading
+import time
+import weakref
+from collections import Counter, deque
+
+import pandas as pd
+
+# --- In-Memory GSheets Stand-In (V6.5) ---
+# Mimics the parts of st-gsheets-connection / gspread the app uses, with
+# simulated network latency and per-minute quotas, so I/O cost can be
+# measured and tested without a Google account.
+
+DEFAULT_WORKSHEET = "Sheet1"
+
+_books = weakref.WeakSet()  # Every open MemorySpreadsheet, for call_counts()
+
+
+class QuotaExceededError(Exception):
+    """Raised like a 429 from the Sheets API when the simulated quota is used up"""
+
+
+class WorksheetNotFound(Exception):
+    pass
+
+
+def _col_number(letters):
+    n = 0
+    for ch in letters:
+        n = n * 26 + ord(ch) - 64
+    return n
+
+
+def _parse_a1(a1):
+    """'Sheet!B3:D3' / 'B3' -> (row, col) of the top-left cell, 1-based"""
+    match = re.match(r"([A-Z]+)(\d+)", a1.split("!")[-1])
+    return int(match.group(2)), _col_number(match.group(1))
+
+
+def _cell(value):
+    if value is None or (isinstance(value, float) and pd.isna(value)):
+        return ""
+    return str(value)
+
+
+class MemoryWorksheet:
+    """A grid of strings with the gspread Worksheet methods the app calls"""
+
+    def __init__(self, book, title, rows=None):
+        self.book = book
+        self.title = title
+        self.rows = rows or []
+
+    def _grow(self, row, col):
+        while len(self.rows) < row:
+            self.rows.append([])
+        line = self.rows[row - 1]
+        while len(line) < col:
+            line.append("")
+
+    def get_all_values(self):
+        self.book._api("read", "get_all_values")
+        return [list(r) for r in self.rows]
+
+    def row_values(self, row):
+        self.book._api("read", "row_values")
+        return list(self.rows[row - 1]) if row <= len(self.rows) else []
+
+    def col_values(self, col):
+        self.book._api("read", "col_values")
+        return [r[col - 1] if len(r) >= col else "" for r in self.rows]
+
+    def get_values(self, range_name=None, **kwargs):
+        """Cells from the range's top-left corner to the end of the sheet ('A5:ZZ')"""
+        self.book._api("read", "get_values")
+        if not range_name:
+            return [list(r) for r in self.rows]
+        top, left = _parse_a1(range_name)
+        return [list(r[left - 1:]) for r in self.rows[top - 1:]]
+
+    def _write(self, range_name, values):
+        top, left = _parse_a1(range_name)
+        for i, line in enumerate(values or []):
+            for j, v in enumerate(line):
+                self._grow(top + i, left + j)
+                self.rows[top + i - 1][left + j - 1] = _cell(v)
+
+    def update(self, range_name, values=None, raw=True, **kwargs):
+        self.book._api("write", "update")
+        with self.book._lock:
+            self._write(range_name, values)
+        self.book._save()
+        return {"updatedRange": f"{self.title}!{range_name}"}
+
+    def batch_update(self, data, raw=True, **kwargs):
+        """Several range updates in one API call"""
+        self.book._api("write", "batch_update")
+        with self.book._lock:
+            for item in data:
+                self._write(item["range"], item["values"])
+        self.book._save()
+        return {"totalUpdatedCells": sum(len(line) for item in data for line in item["values"])}
+
+    def append_rows(self, values, value_input_option=None, table_range=None, **kwargs):
+        self.book._api("write", "append_rows")
+        with self.book._lock:
+            # Like the API: append after the last non-empty row
+            while self.rows and not any(self.rows[-1]):
+                self.rows.pop()
+            first = len(self.rows) + 1
+            for line in values:
+                self.rows.append([_cell(v) for v in line])
+            last = len(self.rows)
+        self.book._save()
+        return {"updates": {"updatedRange": f"{self.title}!A{first}:A{last}", "updatedRows": len(values)}}
+
+    def append_row(self, values, value_input_option=None, table_range=None, **kwargs):
+        return self.append_rows([values], value_input_option=value_input_option, table_range=table_range)
+
+    def batch_clear(self, ranges):
+        self.book._api("write", "batch_clear")
+        with self.book._lock:
+            for a1 in ranges:
+                row, col = _parse_a1(a1)
+                if row <= len(self.rows) and col <= len(self.rows[row - 1]):
+                    self.rows[row - 1][col - 1] = ""
+        self.book._save()
+
+    def clear(self):
+        self.book._api("write", "clear")
+        with self.book._lock:
+            self.rows = []
+        self.book._save()
+
+
+class MemorySpreadsheet:
+    """Holds the worksheets and enforces latency/quota on every API call"""
+
+    def __init__(self, latency_ms=0, jitter_ms=0, read_quota_per_min=None, write_quota_per_min=None, path=None):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.quota = {"read": read_quota_per_min, "write": write_quota_per_min}
+        self.path = path
+        self._lock = threading.RLock()
+        self._calls = {"read": deque(), "write": deque()}
+        self.api_calls = Counter()  # (kind, op) -> requests served
+        self.sheets = {DEFAULT_WORKSHEET: MemoryWorksheet(self, DEFAULT_WORKSHEET)}
+        if path and os.path.exists(path):
+            with open(path) as f:
+                for title, rows in json.load(f).items():
+                    self.sheets[title] = MemoryWorksheet(self, title, rows)
+        _books.add(self)
+
+    def _api(self, kind, op):
+        """Simulates one Sheets API request: quota check, then network latency"""
+        limit = self.quota.get(kind)
+        if limit:
+            now = time.monotonic()
+            with self._lock:
+                window = self._calls[kind]
+                while window and now - window[0] > 60:
+                    window.popleft()
+                if len(window) >= limit:
+                    raise QuotaExceededError(f"429: Quota exceeded for {kind} requests per minute")
+                window.append(now)
+        with self._lock:
+            self.api_calls[(kind, op)] += 1
+        delay = self.latency_ms + (random.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0)
+        if delay > 0:
+            time.sleep(delay / 1000.0)
+
+    def _save(self):
+        if not self.path:
+            return
+        with self._lock:
+            data = {title: ws.rows for title, ws in self.sheets.items()}
+            tmp = f"{self.path}.tmp"
+            with open(tmp, "w") as f:
+                json.dump(data, f)
+            os.replace(tmp, self.path)
+
+    def worksheet(self, title):
+        title = title or DEFAULT_WORKSHEET
+        if title not in self.sheets:
+            raise WorksheetNotFound(title)
+        return self.sheets[title]
+
+    def add_worksheet(self, title, rows=0, cols=0, index=None):
+        self._api("write", "add_worksheet")
+        with self._lock:
+            ws = self.sheets.setdefault(title, MemoryWorksheet(self, title))
+        self._save()
+        return ws
+
+
+class _MemoryClient:
+    def __init__(self, book):
+        self._book = book
+
+    def _open_spreadsheet(self, **kwargs):
+        return self._book
+
+    def _select_worksheet(self, worksheet=None, **kwargs):
+        self._book._api("read", "open_worksheet")
+        return self._book.worksheet(worksheet)
+
+
+class MemorySheetsConnection:
+    """Drop-in for st.connection('gsheets'): read()/update() on DataFrames plus .client"""
+
+    def __init__(self, **options):
+        self.book = MemorySpreadsheet(**options)
+        self.client = _MemoryClient(self.book)
+
+    def read(self, worksheet=None, ttl=None, **kwargs):
+        ws = self.client._select_worksheet(worksheet=worksheet)
+        values = ws.get_all_values()
+        if not values:
+            return pd.DataFrame()
+        header, body = values[0], values[1:]
+        df = pd.DataFrame([r + [""] * (len(header) - len(r)) for r in body], columns=header)
+        # Numbers come back as numbers, like the real reader's type inference
+        for col in df.columns:
+            converted = pd.to_numeric(df[col], errors="coerce")
+            if len(df) and converted.notna().all():
+                df[col] = converted
+        return df.replace("", None)
+
+    def update(self, worksheet=None, data=None, **kwargs):
+        title = worksheet or DEFAULT_WORKSHEET
+        try:
+            ws = self.client._select_worksheet(worksheet=title)
+        except WorksheetNotFound:
+            ws = self.book.add_worksheet(title)
+        ws.clear()
+        rows = [list(data.columns)] + data.astype(object).where(data.notna(), "").values.tolist()
+        ws.update(range_name="A1", values=rows)
+        return data
+
+
+def call_counts():
+    """(kind, op) -> API requests served so far by every open spreadsheet in this process"""
+    total = Counter()
+    for book in list(_books):
+        with book._lock:
+            total.update(book.api_calls)
+    return total
@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+
+from player_table import PlayerTable
+
+# --- Bulk Player Import (V7.3) ---
+# Admin Mode CSV import: every cell is read as text, the whole frame is
+# validated and typed with column-wise operations, and the PlayerTable is
+# built in one pass. Nothing is applied unless every row is clean.
+
+REQUIRED_COLUMNS = ["Name", "Buy-in", "Final Stack", "Payout"]
+AMOUNT_COLUMNS = {"Buy-in": "cash_in", "Final Stack": "final_stack", "Payout": "final_payout", "Fee Paid": "final_fee"}
+OPTIONAL_DEFAULTS = {"Fee Paid": 0.0}
+ERROR_COLUMNS = ["Row", "Column", "Value", "Error"]
+
+
+def read_import(file):
+    """CSV -> all-text frame (typing is done by validate_import, so a bad cell can't abort the read)"""
+    return pd.read_csv(file, dtype=str, keep_default_na=False, skipinitialspace=True)
+
+
+def validate_import(raw):
+    """(typed frame, error report) for a read_import() frame.
+
+    The typed frame has Name plus the PlayerTable money columns; it is None
+    when required columns are missing. Report rows carry the CSV line number
+    (header = line 1) so the host can fix the file.
+    """
+    missing = [c for c in REQUIRED_COLUMNS if c not in raw.columns]
+    if missing:
+        return None, pd.DataFrame(
+            [{"Row": 1, "Column": c, "Value": "", "Error": "Missing column"} for c in missing],
+            columns=ERROR_COLUMNS,
+        )
+
+    line = pd.Series(np.arange(len(raw)) + 2, index=raw.index)
+    problems = []
+
+    def flag(mask, column, values, message):
+        if mask.any():
+            problems.append(pd.DataFrame({"Row": line[mask], "Column": column, "Value": values[mask], "Error": message}))
+
+    names = raw["Name"].str.strip()
+    flag(names.eq(""), "Name", names, "Missing name")
+    flag(names.ne("") & names.duplicated(keep="first"), "Name", names, "Duplicate name")
+    typed = pd.DataFrame({"Name": names})
+
+    for column, field in AMOUNT_COLUMNS.items():
+        if column not in raw.columns:
+            typed[field] = OPTIONAL_DEFAULTS[column]
+            continue
+        text = raw[column].str.strip()
+        values = pd.to_numeric(text.str.replace(r"[$,]", "", regex=True), errors="coerce")
+        blank = text.eq("")
+        if column in OPTIONAL_DEFAULTS:
+            values = values.mask(blank, OPTIONAL_DEFAULTS[column])
+        else:
+            flag(blank, column, text, "Missing value")
+        flag(~blank & values.isna(), column, text, "Not a number")
+        flag(values.lt(0), column, text, "Negative amount")
+        typed[field] = values.astype("float64")
+
+    report = pd.concat(problems, ignore_index=True).sort_values("Row", kind="stable") if problems else pd.DataFrame(columns=ERROR_COLUMNS)
+    return typed, report.reset_index(drop=True)
+
+
+def build_players(typed, denoms=()):
+    """Cashed-out PlayerTable from a clean validate_import() frame"""
+    return PlayerTable.from_arrays(
+        typed["Name"].tolist(), denoms, status="out",
+        **{field: typed[field].to_numpy() for field in AMOUNT_COLUMNS.values()}
+    )
@@ -0,0 +1,262 @@
+import numpy as np
+
+# --- Columnar Player Table (V7.0) ---
+# Players live in parallel NumPy arrays (one row per player) plus a chip-count
+# matrix of players x denominations, so stacks, chips on table and the audit
+# totals are a dot product and a few masked sums. Rows are handed out as
+# light views that still read like the old player dicts (data['cash_in'],
+# data['chip_counts'][k]), and the table converts losslessly to and from the
+# dict-of-dicts snapshot format older 'active_state' rows use.
+
+STATUSES = ["active", "paused", "out"]
+SEATED = ("active", "paused")
+MONEY_FIELDS = ["cash_in", "credit_in", "final_stack", "final_payout", "final_fee"]
+SNAPSHOT_FORMAT = "columnar/1"
+
+
+def _py(value):
+    """NumPy scalar -> plain int/float (ints stay ints, so JSON and labels look as before)"""
+    value = float(value)
+    return int(value) if value.is_integer() else value
+
+
+class ChipCounts:
+    """Dict-like view of one player's row of the chip matrix"""
+
+    def __init__(self, table, row):
+        self._table = table
+        self._row = row
+
+    def __getitem__(self, chip):
+        return int(self._table.chips[self._row, self._table.denoms.index(chip)])
+
+    def __setitem__(self, chip, count):
+        self._table._ensure_denoms([chip])
+        self._table.chips[self._row, self._table.denoms.index(chip)] = count
+
+    def get(self, chip, default=0):
+        return self[chip] if chip in self._table.denoms else default
+
+    def keys(self):
+        return list(self._table.denoms)
+
+    def items(self):
+        return [(k, self[k]) for k in self._table.denoms]
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self._table.denoms)
+
+
+class PlayerRow:
+    """View of one player; reads and writes go straight to the table's arrays"""
+
+    def __init__(self, table, row):
+        self._table = table
+        self._row = row
+
+    def __getitem__(self, key):
+        if key in MONEY_FIELDS:
+            return _py(getattr(self._table, key)[self._row])
+        if key == "status":
+            return STATUSES[self._table.status[self._row]]
+        if key == "chip_counts":
+            return ChipCounts(self._table, self._row)
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key in MONEY_FIELDS:
+            getattr(self._table, key)[self._row] = value
+        elif key == "status":
+            self._table.status[self._row] = STATUSES.index(value)
+        elif key == "chip_counts":
+            for chip, count in value.items():
+                ChipCounts(self._table, self._row)[chip] = count
+        else:
+            raise KeyError(key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def stack(self, chip_config):
+        return _py(self._table.chips[self._row] @ self._table._values(chip_config))
+
+    def to_dict(self):
+        return {
+            "cash_in": self["cash_in"], "credit_in": self["credit_in"],
+            "chip_counts": dict(self["chip_counts"].items()),
+            "status": self["status"],
+            "final_stack": self["final_stack"], "final_payout": self["final_payout"], "final_fee": self["final_fee"],
+        }
+
+
+class PlayerTable:
+    """All players of a session, in join order"""
+
+    def __init__(self, denoms=()):
+        self.denoms = list(denoms)
+        self.names = []
+        self.index = {}  # name -> row
+        self.chips = np.zeros((0, len(self.denoms)), dtype=np.int64)
+        self.status = np.zeros(0, dtype=np.int8)
+        for f in MONEY_FIELDS:
+            setattr(self, f, np.zeros(0, dtype=np.float64))
+
+    # --- Mapping API (what the old players dict offered) ---
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return name in self.index
+
+    def __iter__(self):
+        return iter(list(self.names))
+
+    def __getitem__(self, name):
+        return PlayerRow(self, self.index[name])
+
+    def get(self, name, default=None):
+        return self[name] if name in self.index else default
+
+    def keys(self):
+        return list(self.names)
+
+    def values(self):
+        return [PlayerRow(self, i) for i in range(len(self.names))]
+
+    def items(self, status=None):
+        """[(name, row)], optionally only players with that status"""
+        if status is None:
+            rows = range(len(self.names))
+        else:
+            rows = np.flatnonzero(self.status == STATUSES.index(status))
+        return [(self.names[i], PlayerRow(self, i)) for i in rows]
+
+    # --- Mutation ---
+    def _ensure_denoms(self, chips):
+        new = [k for k in chips if k not in self.denoms]
+        if new:
+            self.denoms.extend(new)
+            self.chips = np.hstack([self.chips, np.zeros((len(self.names), len(new)), dtype=np.int64)])
+
+    def add(self, name, cash_in=0, credit_in=0, denoms=()):
+        """Seats a new active player; re-adding a name resets that player's row in place"""
+        self._ensure_denoms(denoms)
+        row = self.index.get(name)
+        if row is None:
+            row = len(self.names)
+            self.names.append(name)
+            self.index[name] = row
+            self.chips = np.vstack([self.chips, np.zeros((1, len(self.denoms)), dtype=np.int64)])
+            self.status = np.append(self.status, np.int8(0))
+            for f in MONEY_FIELDS:
+                setattr(self, f, np.append(getattr(self, f), 0.0))
+        self.chips[row] = 0
+        self.status[row] = STATUSES.index("active")
+        for f in MONEY_FIELDS:
+            getattr(self, f)[row] = 0.0
+        self.cash_in[row] = cash_in
+        self.credit_in[row] = credit_in
+        return PlayerRow(self, row)
+
+    def chip_matrix(self, names, chips):
+        """Counts of the given players x chips, as a new array"""
+        self._ensure_denoms(chips)
+        return self.chips[np.ix_([self.index[n] for n in names], [self.denoms.index(k) for k in chips])]
+
+    def set_chip_matrix(self, names, chips, counts):
+        self._ensure_denoms(chips)
+        self.chips[np.ix_([self.index[n] for n in names], [self.denoms.index(k) for k in chips])] = counts
+
+    # --- Vectorized Totals ---
+    def _values(self, chip_config):
+        return np.array([chip_config.get(k, 0) for k in self.denoms], dtype=np.float64)
+
+    def stacks(self, chip_config):
+        """Stack value of every row"""
+        return self.chips @ self._values(chip_config)
+
+    def totals(self, chip_config):
+        """The ledger's player totals in one pass over the arrays"""
+        seated = np.isin(self.status, [STATUSES.index(s) for s in SEATED])
+        out = self.status == STATUSES.index("out")
+        fees = self.final_fee[out]
+        return {
+            "total_inflow": _py((self.cash_in + self.credit_in).sum()),
+            "chips_on_table": _py(self.stacks(chip_config)[seated].sum()),
+            "total_final_stacks": _py(self.final_stack[out].sum()),
+            "total_fees_in_rake": _py(fees[fees > 0].sum()),
+            "total_payout": _py(self.final_payout[out].sum()),
+        }
+
+    @classmethod
+    def from_arrays(cls, names, denoms=(), chips=None, status="active", **fields):
+        """Builds a whole table in one pass (bulk import, snapshot restore).
+
+        status is one status for everyone or one per player; fields are
+        MONEY_FIELDS columns, missing ones start at 0.
+        """
+        table = cls(denoms)
+        n = len(names)
+        table.names = list(names)
+        table.index = {name: i for i, name in enumerate(table.names)}
+        if len(table.index) != n:
+            raise ValueError("Duplicate player names")
+        if chips is not None:
+            table.chips = np.asarray(chips, dtype=np.int64).reshape(n, len(table.denoms))
+        else:
+            table.chips = np.zeros((n, len(table.denoms)), dtype=np.int64)
+        statuses = [status] * n if isinstance(status, str) else list(status)
+        table.status = np.array([STATUSES.index(s) for s in statuses], dtype=np.int8)
+        for f in MONEY_FIELDS:
+            setattr(table, f, np.array(fields.get(f, np.zeros(n)), dtype=np.float64).reshape(n))
+        return table
+
+    # --- Snapshot Format ---
+    def to_dict(self):
+        """The legacy {name: {cash_in, ..., chip_counts: {...}}} layout"""
+        return {name: PlayerRow(self, i).to_dict() for i, name in enumerate(self.names)}
+
+    @classmethod
+    def from_dict(cls, players, denoms=()):
+        table = cls(denoms)
+        for name, p in players.items():
+            table._ensure_denoms(p.get("chip_counts", {}))
+            row = table.add(name, p.get("cash_in", 0), p.get("credit_in", 0))
+            row["chip_counts"] = p.get("chip_counts", {})
+            row["status"] = p.get("status", "active")
+            for f in ("final_stack", "final_payout", "final_fee"):
+                row[f] = p.get(f, 0)
+        return table
+
+    def to_snapshot(self):
+        """Columnar JSON-ready layout, a fraction of the size of to_dict() for a full table"""
+        snap = {
+            "format": SNAPSHOT_FORMAT,
+            "names": list(self.names),
+            "denoms": list(self.denoms),
+            "chips": self.chips.tolist(),
+            "status": [STATUSES[s] for s in self.status],
+        }
+        for f in MONEY_FIELDS:
+            snap[f] = [_py(v) for v in getattr(self, f)]
+        return snap
+
+    @classmethod
+    def from_snapshot(cls, snap, denoms=()):
+        """Reads either snapshot layout (columnar, or the legacy players dict)"""
+        if not snap:
+            return cls(denoms)
+        if snap.get("format") != SNAPSHOT_FORMAT:
+            return cls.from_dict(snap, denoms)
+        table = cls.from_arrays(
+            snap["names"], snap["denoms"], chips=snap["chips"], status=snap["status"],
+            **{f: snap[f] for f in MONEY_FIELDS}
+        )
+        table._ensure_denoms(denoms)
+        return table
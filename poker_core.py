@@ -0,0 +1,153 @@
+import time
+
+import numpy as np
+
+import snapshot_codec
+from player_table import PlayerTable
+from segmented_log import SegmentedLog
+
+# --- Headless Core (V8.0) ---
+# The session's money math and state shape, free of Streamlit, so the app,
+# the ledger and bench_core.py all run the same code. Every function here is
+# plain arithmetic on numbers/dicts: no session_state, no widgets, no I/O.
+
+KEYS_TO_PERSIST = [
+    'players', 'log', 'expenses_log', 'rake_log', 'insurance_log',
+    'income_rake', 'income_insurance', 'game_mode', 'fee_cash_collected', 'start_time',
+    'event_seq'
+]
+
+LOG_KEYS = ('log', 'expenses_log', 'rake_log', 'insurance_log')  # SegmentedLogs (V8.0)
+
+DEFAULT_CHIP_VALUES = {"white": 5, "red": 25, "black": 100, "purple": 500, "yellow": 1000}
+
+RAKE_GAME = "Rake Game"
+DEFAULT_VENUE_FEE = 170  # Time Charge fee per player at cash-out
+DEFAULT_HOST_PCT = 60
+
+# Insurance odds by number of outs; more outs than listed pay DEFAULT_ODDS
+INSURANCE_ODDS = {1: 30, 2: 16, 3: 10, 4: 8, 5: 6, 6: 5, 7: 4.5, 8: 4, 9: 3.5, 10: 3,
+                  11: 2.6, 12: 2.3, 13: 2, 14: 1.8, 15: 1.6, 16: 1.4}
+DEFAULT_ODDS = 1.2
+
+
+# --- Session State ---
+def new_session_state():
+    """A fresh, empty game (defaults, and the base for rebuilding past states)"""
+    return {
+        'players': PlayerTable(),
+        'start_time': time.time(),
+        'log': SegmentedLog(),
+        'expenses_log': SegmentedLog(),
+        'rake_log': SegmentedLog(),
+        'insurance_log': SegmentedLog(),
+        'income_rake': 0.0,
+        'income_insurance': 0.0,
+        'fee_cash_collected': 0.0,
+        'game_mode': "Time Charge (Venue Fee)",
+        'events': [],   # Recorded but not yet committed locally (V7.5)
+        'event_seq': 0
+    }
+
+
+def snapshot_payload(state):
+    """The persisted keys of state, players as their columnar snapshot"""
+    payload = {k: state.get(k) for k in KEYS_TO_PERSIST}
+    if isinstance(payload['players'], PlayerTable):
+        payload['players'] = payload['players'].to_snapshot()
+    for k in LOG_KEYS:
+        if isinstance(payload[k], SegmentedLog):
+            payload[k] = payload[k].to_snapshot() # Hot tail only: sealed segments are archived
+    return payload
+
+
+def load_state(json_str):
+    """Checkpoint string -> state dict of the persisted keys"""
+    payload = snapshot_codec.decode(json_str) # Plain JSON (legacy) or the compressed format
+    state = {k: payload[k] for k in KEYS_TO_PERSIST if k in payload}
+    if 'players' in state:
+        # Columnar or legacy players dict (V7.0)
+        state['players'] = PlayerTable.from_snapshot(state['players'])
+    for k in LOG_KEYS:
+        if k in state:
+            state[k] = SegmentedLog.from_snapshot(state[k]) # Segmented, or a legacy full list
+    state.setdefault('event_seq', 0) # Snapshots from before the event log
+    return state
+
+
+def unarchived_segments(state):
+    """[(log key, segment number, entries)] sealed since the last archive"""
+    return [(k, n, seg) for k in LOG_KEYS for n, seg in state[k].unarchived]
+
+
+def mark_archived(state, segments):
+    """After storage took the segments unarchived_segments() returned"""
+    for k, n, _ in segments:
+        state[k].mark_archived(n + 1)
+
+
+# --- Money Math ---
+def stack_value(chip_counts, chip_config):
+    """Dollar value of {chip: count} at the configured chip values"""
+    return sum(count * chip_config.get(chip, 0) for chip, count in chip_counts.items())
+
+
+def cashout_projection(stack, credit_in, fee=0, deduct_fee=False):
+    """What cashing out a stack settles: {payout_stack, debt_cleared, cash_payout, remaining_debt}.
+
+    A deducted venue fee comes off the stack first (never below 0); the rest
+    repays the player's credit before any cash is paid out.
+    """
+    payout_stack = max(0, stack - fee) if deduct_fee else stack
+    debt_cleared = min(payout_stack, credit_in)
+    return {
+        "payout_stack": payout_stack,
+        "debt_cleared": debt_cleared,
+        "cash_payout": payout_stack - debt_cleared,
+        "remaining_debt": credit_in - debt_cleared,
+    }
+
+
+def cashout_projections(stacks, credit_in, fees=0, deduct_fee=False):
+    """cashout_projection() over arrays of players (fees/deduct_fee: scalars or per player)"""
+    stacks = np.asarray(stacks, dtype=np.float64)
+    credit_in = np.asarray(credit_in, dtype=np.float64)
+    payout_stack = np.where(deduct_fee, np.maximum(0, stacks - np.asarray(fees, dtype=np.float64)), stacks)
+    debt_cleared = np.minimum(payout_stack, credit_in)
+    return {
+        "payout_stack": payout_stack,
+        "debt_cleared": debt_cleared,
+        "cash_payout": payout_stack - debt_cleared,
+        "remaining_debt": credit_in - debt_cleared,
+    }
+
+
+def insurance_odds(outs):
+    return INSURANCE_ODDS.get(outs, DEFAULT_ODDS)
+
+
+def insurance_payout(bet, outs):
+    """What the house pays if the insured hand is hit"""
+    return bet * insurance_odds(outs)
+
+
+def audit_discrepancy(total_inflow, chips_on_table, total_final_stacks, income_rake, fees_in_rake, income_insurance):
+    """Inflow minus everything accounted for; 0 = balanced, >0 = short, <0 = surplus.
+
+    Fees deducted from stacks are already in the final stacks, so only the
+    rest of the rake counts as money that left the table.
+    """
+    pot_rake = income_rake - fees_in_rake
+    return total_inflow - (chips_on_table + total_final_stacks + pot_rake + income_insurance)
+
+
+def net_profit(income_rake, income_insurance, total_exp):
+    """(gross income, net profit) of the house"""
+    gross = income_rake + income_insurance
+    return gross, gross - total_exp
+
+
+def host_share(net, game_mode, host_pct=DEFAULT_HOST_PCT):
+    """The host's cut of the net: host_pct of it in a Rake Game, all of it otherwise"""
+    pct = host_pct if game_mode == RAKE_GAME else 100
+    return net * (pct / 100.0)
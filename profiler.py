@@ -0,0 +1,170 @@
+import collections
+import contextlib
+import functools
+import json
+import threading
+import time
+
+import numpy as np
+
+# --- Rerun Profiler (V7.9) ---
+# Timing spans around the stages of a script run (cookies, restore, sync,
+# audit, player cards, log tables, charts) plus every Sheets call made on
+# the script thread, with its payload size. Profiling is off unless a run
+# was started, and then span() is one thread-local lookup returning a shared
+# no-op context, so the closed panel costs next to nothing.
+
+_local = threading.local()
+_NOOP = contextlib.nullcontext()
+
+
+class RunProfile:
+    """Spans of one script run: stage -> total seconds, calls and bytes"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.last = self.started
+        self.stages = collections.defaultdict(lambda: [0.0, 0, 0])  # name -> [seconds, calls, bytes]
+
+    def add(self, name, seconds, nbytes=0):
+        stage = self.stages[name]
+        stage[0] += seconds
+        stage[1] += 1
+        stage[2] += nbytes
+        self.last = time.perf_counter()
+
+    def finish(self, ended=None):
+        ended = ended or time.perf_counter()
+        return {
+            "at": time.strftime("%H:%M:%S"),
+            "total_ms": round((ended - self.started) * 1000, 2),
+            "stages": {
+                name: {"ms": round(s * 1000, 3), "calls": n, "bytes": b}
+                for name, (s, n, b) in self.stages.items()
+            },
+        }
+
+
+class _Span:
+    __slots__ = ("run", "name", "t0")
+
+    def __init__(self, run, name):
+        self.run = run
+        self.name = name
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.run.add(self.name, time.perf_counter() - self.t0)
+        return False
+
+
+def start_run(history, state):
+    """Begins profiling this script run; a run cut short by st.rerun()/st.stop() is closed first"""
+    open_run = state.get('_profile_run')
+    if open_run is not None:
+        history.append(open_run.finish(open_run.last))
+    run = RunProfile()
+    state['_profile_run'] = run
+    _local.run = run
+
+
+def end_run(history, state):
+    run = state.pop('_profile_run', None)
+    _local.run = None
+    if run is not None:
+        history.append(run.finish())
+
+
+def stop():
+    """Profiling off for this thread (panel closed)"""
+    _local.run = None
+
+
+def span(name):
+    """with span("stage"): ... - timed only while a run is being profiled"""
+    run = getattr(_local, "run", None)
+    return _NOOP if run is None else _Span(run, name)
+
+
+def timed(name):
+    """Decorator form of span() for whole functions"""
+    def wrap(fn):
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return inner
+    return wrap
+
+
+def record_io(op, nbytes, seconds):
+    """Called for each Sheets API call; counted if it happened on a profiled script run"""
+    run = getattr(_local, "run", None)
+    if run is not None:
+        run.add(f"sheets.{op}", seconds, nbytes)
+
+
+def summarize(history):
+    """[{Stage, Runs, Calls, p50 ms, p95 ms, Max ms, KB}] over the recorded runs, slowest p95 first"""
+    per_stage = collections.defaultdict(list)
+    calls = collections.Counter()
+    nbytes = collections.Counter()
+    for run in history:
+        per_stage["(total)"].append(run["total_ms"])
+        for name, stage in run["stages"].items():
+            per_stage[name].append(stage["ms"])
+            calls[name] += stage["calls"]
+            nbytes[name] += stage["bytes"]
+    rows = []
+    for name, samples in per_stage.items():
+        p50, p95 = np.percentile(samples, [50, 95])
+        rows.append({
+            "Stage": name, "Runs": len(samples), "Calls": calls[name] or len(samples),
+            "p50 ms": round(float(p50), 2), "p95 ms": round(float(p95), 2), "Max ms": round(max(samples), 2),
+            "KB": round(nbytes[name] / 1024, 1),
+        })
+    return sorted(rows, key=lambda r: -r["p95 ms"])
+
+
+def export_json(history):
+    return json.dumps({"runs": list(history), "summary": summarize(history)}, indent=2)
+
+
+# --- Startup & Rerun Budget (V8.0) ---
+# Always on, at two clock reads a run: how long the process's first run took
+# (imports included) and the fixed cost every later rerun pays before the
+# page itself starts rendering (secrets, cookies, login, restore, live pull,
+# sidebar), compared against budgets set in Admin Mode / secrets.
+
+class RunBudget:
+    """Process-wide cold start and per-rerun setup/total times"""
+
+    def __init__(self, runs=200):
+        self.cold_start = None  # {"imports_ms", "setup_ms"} of the process's first run
+        self.setup = collections.deque(maxlen=runs)  # Seconds before the page renders, later runs
+        self.total = collections.deque(maxlen=runs)  # Seconds of whole runs that reached the end
+        self._lock = threading.Lock()
+
+    def record_setup(self, imports_s, setup_s):
+        with self._lock:
+            if self.cold_start is None:
+                self.cold_start = {"imports_ms": imports_s * 1000, "setup_ms": setup_s * 1000}
+            else:
+                self.setup.append(setup_s)
+
+    def record_run(self, total_s):
+        with self._lock:
+            self.total.append(total_s)
+
+    def summary(self):
+        """{cold_start_ms, imports_ms, setup_p50_ms, setup_p95_ms, run_p50_ms, run_p95_ms, runs}"""
+        with self._lock:
+            cold, setup, total = self.cold_start or {}, list(self.setup), list(self.total)
+        out = {"cold_start_ms": cold.get("setup_ms"), "imports_ms": cold.get("imports_ms"), "runs": len(setup)}
+        for name, samples in (("setup", setup), ("run", total)):
+            p50, p95 = np.percentile(samples, [50, 95]) * 1000 if samples else (None, None)
+            out[f"{name}_p50_ms"], out[f"{name}_p95_ms"] = p50, p95
+        return out
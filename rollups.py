@@ -0,0 +1,235 @@
+import threading
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+# --- Analytics Rollups (V6.8) ---
+# Pre-aggregated session history kept in the local store. Each saved session
+# adds itself to a handful of rows (lifetime, its day/week/month, per Mode),
+# so the Analytics page reads a few hundred rows instead of the raw log.
+# The Session_IDs already counted are kept too: a session saved here comes
+# back through the history sync, and must not be added a second time.
+
+GRAINS = ["day", "week", "month"]
+BUCKET_FORMATS = {"day": "%Y-%m-%d", "week": "%G-W%V", "month": "%Y-%m"}
+ALL_MODES = "*"
+METRICS = ["My_Share", "Net_Profit", "Gross_Profit", "Total_Buyin", "Expenses"]
+_COLS = ["my_share", "net_profit", "gross_profit", "total_buyin", "expenses"]
+
+_SCHEMA = [
+    ("""CREATE TABLE IF NOT EXISTS rollups (
+        host_id      TEXT NOT NULL,
+        grain        TEXT NOT NULL,    -- all / day / week / month
+        bucket       TEXT NOT NULL,    -- 'all', '2026-10-17', '2026-W42', '2026-10'
+        mode         TEXT NOT NULL,    -- game mode, '*' = every mode
+        sessions     INTEGER NOT NULL DEFAULT 0,
+        my_share     REAL NOT NULL DEFAULT 0,
+        net_profit   REAL NOT NULL DEFAULT 0,
+        gross_profit REAL NOT NULL DEFAULT 0,
+        total_buyin  REAL NOT NULL DEFAULT 0,
+        expenses     REAL NOT NULL DEFAULT 0,
+        cum_sessions INTEGER NOT NULL DEFAULT 0,   -- running totals up to and including bucket
+        cum_my_share REAL NOT NULL DEFAULT 0,
+        PRIMARY KEY (host_id, grain, mode, bucket)
+    )""", ()),
+    ("CREATE TABLE IF NOT EXISTS rollup_hosts (host_id TEXT PRIMARY KEY, seeded_at TEXT)", ()),
+    ("CREATE TABLE IF NOT EXISTS rollup_sessions (host_id TEXT NOT NULL, session_id TEXT NOT NULL, "
+     "PRIMARY KEY (host_id, session_id))", ()),
+]
+
+
+def _num(value):
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return 0.0
+    return 0.0 if value != value else value  # NaN -> 0
+
+
+def _session_id(record):
+    session_id = record.get("Session_ID")
+    return None if session_id is None or pd.isna(session_id) or not str(session_id) else str(session_id)
+
+
+def session_buckets(timestamp):
+    """[(grain, bucket)] a session timestamp ('%Y-%m-%d %H:%M:%S') rolls into.
+
+    A session without a readable date only counts in the lifetime totals; see Rollups.undated().
+    """
+    ts = pd.to_datetime(timestamp, errors="coerce")
+    if pd.isna(ts):
+        return [("all", "all")]
+    return [("all", "all")] + [(grain, ts.strftime(BUCKET_FORMATS[grain])) for grain in GRAINS]
+
+
+def rollup_statements(host_id, record):
+    """SQL that adds one session record to every rollup row it belongs to"""
+    values = [_num(record.get(m)) for m in METRICS]
+    mode = record.get("Mode")
+    mode = str(mode) if mode and not pd.isna(mode) else "Unknown"  # Blank, None or NaN from typed history
+    stmts = []
+    for grain, bucket in session_buckets(record.get("Timestamp")):
+        for m in (ALL_MODES, mode):
+            stmts.append((
+                f"INSERT INTO rollups (host_id, grain, bucket, mode, sessions, {', '.join(_COLS)}) "
+                f"VALUES (?, ?, ?, ?, 1, {', '.join('?' * len(_COLS))}) "
+                f"ON CONFLICT(host_id, grain, mode, bucket) DO UPDATE SET sessions = sessions + 1, "
+                + ", ".join(f"{c} = {c} + excluded.{c}" for c in _COLS),
+                (host_id, grain, bucket, m, *values),
+            ))
+            if grain == "all":
+                continue
+            # Running totals: this bucket = previous bucket's running total + own sums,
+            # and every later bucket (only for back-dated sessions) shifts by this session
+            stmts.append((
+                "UPDATE rollups SET "
+                "cum_sessions = sessions + COALESCE((SELECT p.cum_sessions FROM rollups p WHERE p.host_id = rollups.host_id "
+                "AND p.grain = rollups.grain AND p.mode = rollups.mode AND p.bucket < rollups.bucket "
+                "ORDER BY p.bucket DESC LIMIT 1), 0), "
+                "cum_my_share = my_share + COALESCE((SELECT p.cum_my_share FROM rollups p WHERE p.host_id = rollups.host_id "
+                "AND p.grain = rollups.grain AND p.mode = rollups.mode AND p.bucket < rollups.bucket "
+                "ORDER BY p.bucket DESC LIMIT 1), 0) "
+                "WHERE host_id = ? AND grain = ? AND mode = ? AND bucket = ?",
+                (host_id, grain, m, bucket),
+            ))
+            stmts.append((
+                "UPDATE rollups SET cum_sessions = cum_sessions + 1, cum_my_share = cum_my_share + ? "
+                "WHERE host_id = ? AND grain = ? AND mode = ? AND bucket > ?",
+                (values[0], host_id, grain, m, bucket),
+            ))
+    return stmts
+
+
+class Rollups:
+    """Incrementally maintained aggregates of one store's session history"""
+
+    def __init__(self, store):
+        self.store = store
+        self.store.transaction(_SCHEMA)
+        self._lock = threading.Lock()  # Script thread (saves) and sync workers (synced rows)
+
+    # --- Maintenance ---
+    def is_seeded(self, host_id):
+        return bool(self.store.query("SELECT 1 FROM rollup_hosts WHERE host_id = ?", (host_id,)))
+
+    def apply(self, host_id, record):
+        """Adds one newly saved session (no-op until the host's rollups are seeded from history)"""
+        return self.apply_all(host_id, [record])
+
+    def apply_all(self, host_id, records):
+        """Adds sessions not counted yet, in one transaction; returns how many were added"""
+        with self._lock:
+            if not self.is_seeded(host_id):
+                return 0
+            counted = {r[0] for r in self.store.query("SELECT session_id FROM rollup_sessions WHERE host_id = ?", (host_id,))}
+            stmts, added = [], 0
+            for record in records:
+                session_id = _session_id(record)
+                if session_id in counted:
+                    continue
+                stmts.extend(rollup_statements(host_id, record))
+                added += 1
+                if session_id:
+                    counted.add(session_id)
+                    stmts.append(("INSERT OR IGNORE INTO rollup_sessions (host_id, session_id) VALUES (?, ?)", (host_id, session_id)))
+            if stmts:
+                self.store.transaction(stmts)
+            return added
+
+    def rebuild(self, host_id, records):
+        """Recomputes a host's rollups from its full history, oldest first"""
+        records = sorted(records, key=lambda r: str(r.get("Timestamp") or ""))
+        stmts = [
+            ("DELETE FROM rollups WHERE host_id = ?", (host_id,)),
+            ("DELETE FROM rollup_sessions WHERE host_id = ?", (host_id,)),
+        ]
+        for record in records:
+            stmts.extend(rollup_statements(host_id, record))
+            session_id = _session_id(record)
+            if session_id:
+                stmts.append(("INSERT OR IGNORE INTO rollup_sessions (host_id, session_id) VALUES (?, ?)", (host_id, session_id)))
+        stmts.append((
+            "INSERT OR REPLACE INTO rollup_hosts (host_id, seeded_at) VALUES (?, ?)",
+            (host_id, datetime.now().strftime("%Y-%m-%d %H:%M:%S")),
+        ))
+        self.store.transaction(stmts)
+
+    def reset(self, host_id):
+        """Forgets a host's rollups so the next Analytics visit rebuilds them"""
+        self.store.transaction([
+            ("DELETE FROM rollups WHERE host_id = ?", (host_id,)),
+            ("DELETE FROM rollup_sessions WHERE host_id = ?", (host_id,)),
+            ("DELETE FROM rollup_hosts WHERE host_id = ?", (host_id,)),
+        ])
+
+    # --- Reads ---
+    def totals(self, host_id):
+        """Lifetime {'sessions', 'my_share', 'avg_share', ...}"""
+        rows = self.store.query(
+            f"SELECT sessions, {', '.join(_COLS)} FROM rollups WHERE host_id = ? AND grain = 'all' AND mode = ?",
+            (host_id, ALL_MODES),
+        )
+        sessions, *sums = rows[0] if rows else (0,) + (0.0,) * len(_COLS)
+        out = {"sessions": sessions, **dict(zip(_COLS, sums))}
+        out["avg_share"] = out["my_share"] / sessions if sessions else 0.0
+        return out
+
+    def undated(self, host_id):
+        """Sessions in the lifetime totals but in no day/week/month bucket (no readable Timestamp)"""
+        rows = self.store.query(
+            "SELECT a.sessions - COALESCE((SELECT SUM(d.sessions) FROM rollups d WHERE d.host_id = a.host_id "
+            "AND d.grain = 'day' AND d.mode = a.mode), 0) FROM rollups a "
+            "WHERE a.host_id = ? AND a.grain = 'all' AND a.mode = ?",
+            (host_id, ALL_MODES),
+        )
+        return rows[0][0] if rows else 0
+
+    def by_mode(self, host_id):
+        return pd.DataFrame(
+            self.store.query(
+                "SELECT mode, sessions, my_share FROM rollups WHERE host_id = ? AND grain = 'all' AND mode != ?",
+                (host_id, ALL_MODES),
+            ),
+            columns=["Mode", "Sessions", "My_Share"],
+        )
+
+    def series(self, host_id, grain="day", start=None, end=None):
+        """Per-bucket sums and running totals, oldest first"""
+        sql = ("SELECT bucket, sessions, my_share, net_profit, cum_sessions, cum_my_share FROM rollups "
+               "WHERE host_id = ? AND grain = ? AND mode = ?")
+        params = [host_id, grain, ALL_MODES]
+        if start:
+            sql += " AND bucket >= ?"
+            params.append(start)
+        if end:
+            sql += " AND bucket <= ?"
+            params.append(end)
+        return pd.DataFrame(
+            self.store.query(sql + " ORDER BY bucket", params),
+            columns=["Bucket", "Sessions", "My_Share", "Net_Profit", "Cumulative_Sessions", "Cumulative_Profit"],
+        )
+
+    def day_span(self, host_id):
+        """(first_day, last_day) as dates, or None"""
+        rows = self.store.query(
+            "SELECT MIN(bucket), MAX(bucket) FROM rollups WHERE host_id = ? AND grain = 'day' AND mode = ?",
+            (host_id, ALL_MODES),
+        )
+        if not rows or rows[0][0] is None:
+            return None
+        return tuple(datetime.strptime(d, "%Y-%m-%d").date() for d in rows[0])
+
+    def _cum_at(self, host_id, day):
+        rows = self.store.query(
+            "SELECT cum_sessions, cum_my_share FROM rollups WHERE host_id = ? AND grain = 'day' AND mode = ? "
+            "AND bucket <= ? ORDER BY bucket DESC LIMIT 1",
+            (host_id, ALL_MODES, day),
+        )
+        return rows[0] if rows else (0, 0.0)
+
+    def range_totals(self, host_id, start, end):
+        """{'sessions', 'my_share'} between two dates (inclusive) from two running-total lookups"""
+        before = (start - timedelta(days=1)).strftime("%Y-%m-%d")
+        s_end, p_end = self._cum_at(host_id, end.strftime("%Y-%m-%d"))
+        s_before, p_before = self._cum_at(host_id, before)
+        return {"sessions": s_end - s_before, "my_share": p_end - p_before}
@@ -0,0 +1,104 @@
+import numbers
+
+import pandas as pd
+
+# --- Segmented Session Logs (V8.0) ---
+# The activity, rake, insurance and expense logs used to be plain lists that
+# grew all night, were copied into every checkpoint and turned into a fresh
+# DataFrame on every rerun. A SegmentedLog keeps only a hot tail in session
+# state: once the tail holds two segments, the older one is sealed, handed to
+# the local store for archiving (with the next event commit) and dropped from
+# memory. Sealed entries still count in len() and in total(), so the ledger
+# and the dashboard don't need them back; the full log can be read through
+# entries() with the archive loader, or rebuilt from the event log.
+
+SEGMENT_SIZE = 100
+
+
+class SegmentedLog:
+    """Append-only log of dict entries: sealed segments + a hot tail"""
+
+    def __init__(self, segment_size=SEGMENT_SIZE):
+        self.segment_size = segment_size
+        self.tail = []          # Entries after the sealed segments, oldest first
+        self.sealed = 0         # Entries in sealed segments (a multiple of segment_size)
+        self.sealed_sums = {}   # Numeric field -> total over the sealed entries
+        self.unarchived = []    # [(segment number, entries)] sealed but not yet in storage
+        self._views = {}        # newest_first -> (first entry index, rows, DataFrame)
+
+    def __len__(self):
+        return self.sealed + len(self.tail)
+
+    def append(self, entry):
+        self.tail.append(entry)
+        if len(self.tail) >= 2 * self.segment_size:
+            self._seal()
+
+    def _seal(self):
+        segment, self.tail = self.tail[:self.segment_size], self.tail[self.segment_size:]
+        for entry in segment:
+            for field, value in entry.items():
+                if isinstance(value, numbers.Number) and not isinstance(value, bool):
+                    self.sealed_sums[field] = self.sealed_sums.get(field, 0) + value
+        self.unarchived.append((self.sealed // self.segment_size, segment))
+        self.sealed += len(segment)
+
+    def total(self, field):
+        """Sum of a numeric field over every entry, sealed ones included"""
+        return self.sealed_sums.get(field, 0) + sum(entry.get(field, 0) for entry in self.tail)
+
+    def entries(self, load_sealed=None):
+        """Every entry, oldest first; load_sealed() -> the archived entries (else only the tail)"""
+        return (list(load_sealed()) if load_sealed and self.sealed else []) + list(self.tail)
+
+    def mark_archived(self, upto):
+        """Forgets sealed segments below number upto, now that storage holds them"""
+        self.unarchived = [(n, seg) for n, seg in self.unarchived if n >= upto]
+
+    # --- Table View ---
+    def view(self, newest_first=True):
+        """The tail as a DataFrame, cached and only extended with the entries appended since"""
+        start, rows, frame = self._views.get(newest_first, (self.sealed, 0, None))
+        if frame is None or start + rows < self.sealed:
+            start, rows, frame = self.sealed, 0, pd.DataFrame()
+        elif start < self.sealed:
+            # Segments sealed since: drop their rows from the old end
+            drop = self.sealed - start
+            frame = frame.iloc[:rows - drop] if newest_first else frame.iloc[drop:].reset_index(drop=True)
+            start, rows = self.sealed, rows - drop
+        new = self.tail[rows:]
+        if new:
+            added = pd.DataFrame(new[::-1] if newest_first else new)
+            frame = added if frame.empty else pd.concat([added, frame] if newest_first else [frame, added], ignore_index=True)
+            rows += len(new)
+        self._views[newest_first] = (start, rows, frame)
+        return frame
+
+    # --- Persistence ---
+    def to_snapshot(self):
+        """JSON-ready form for checkpoints: the tail plus what the sealed part adds up to"""
+        return {
+            "segment_size": self.segment_size, "sealed": self.sealed,
+            "sealed_sums": dict(self.sealed_sums), "tail": list(self.tail),
+        }
+
+    @classmethod
+    def from_snapshot(cls, data, segment_size=SEGMENT_SIZE):
+        """From to_snapshot() output, or a legacy plain list of entries"""
+        if isinstance(data, cls):
+            return data
+        if data is None or isinstance(data, list):
+            log = cls(segment_size)
+            for entry in data or []:
+                log.append(entry)
+            return log
+        log = cls(data.get("segment_size", segment_size))
+        log.sealed = data.get("sealed", 0)
+        log.sealed_sums = dict(data.get("sealed_sums", {}))
+        log.tail = list(data.get("tail", []))
+        return log
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state['_views'] = {}  # Cached frames are rebuilt, not copied
+        return state
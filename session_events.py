@@ -0,0 +1,189 @@
+import threading
+import time
+from datetime import datetime
+
+# --- Session Event Log (V7.5) ---
+# Every mutation of a live session is recorded as a typed event. State is the
+# replay of those events on top of the latest checkpoint, so persistence only
+# appends new events (plus a full checkpoint every so often), restore is
+# checkpoint + tail replay, and any point of the night can be rebuilt and
+# audited.
+#
+# Events are plain dicts: {"seq", "at" (epoch seconds), "type", <fields>}.
+
+EVENT_FIELDS = {
+    "player_added":     ("name", "cash_in", "credit_in"),
+    "rebuy":            ("name", "amount"),
+    "repay":            ("name", "amount"),
+    "status_changed":   ("name", "status"),            # sit out / return
+    "chips_set":        ("name", "chip", "count"),
+    "chips_counted":    ("names", "chips", "counts"),  # count grid batch
+    "cashed_out":       ("name", "stack", "payout", "fee"),
+    "fee_charged":      ("name", "amount", "cash"),
+    "rake_added":       ("amount", "event"),
+    "insurance":        ("delta", "action", "details", "change"),
+    "expense_added":    ("item", "amount"),
+    "players_imported": ("players",),                  # PlayerTable snapshot
+    "mode_changed":     ("mode",),
+}
+
+_replay = threading.local()
+
+
+class RevisionConflict(Exception):
+    """Another device committed events since the ones being written were recorded"""
+
+    def __init__(self, host_id, base_seq, head_seq):
+        super().__init__(f"{host_id}: events recorded on #{base_seq}, but the log is at #{head_seq}")
+        self.host_id = host_id
+        self.base_seq = base_seq
+        self.head_seq = head_seq
+
+
+def now():
+    """Wall clock, or the timestamp of the event being replayed"""
+    at = getattr(_replay, "at", None)
+    return datetime.fromtimestamp(at) if at is not None else datetime.now()
+
+
+def record(state, type_, **fields):
+    """Appends one event to the session's pending list (no-op while replaying)"""
+    if getattr(_replay, "at", None) is not None:
+        return None
+    expected = EVENT_FIELDS[type_]
+    if set(fields) != set(expected):
+        raise ValueError(f"{type_} event needs fields {expected}, got {tuple(fields)}")
+    seq = state.get('event_seq', 0) + 1
+    event = {"seq": seq, "at": time.time(), "type": type_, **fields}
+    state['event_seq'] = seq
+    state.setdefault('events', []).append(event)
+    return event
+
+
+def _handlers():
+    import ledger
+    return {
+        "player_added": ledger.add_player,
+        "rebuy": ledger.rebuy,
+        "repay": ledger.repay,
+        "status_changed": ledger.set_status,
+        "chips_set": ledger.set_chip_count,
+        "chips_counted": ledger.set_chip_counts,
+        "cashed_out": ledger.cash_out,
+        "fee_charged": ledger.charge_fee,
+        "rake_added": ledger.add_rake,
+        "insurance": ledger.add_insurance,
+        "expense_added": ledger.add_expense,
+        "players_imported": ledger.import_players,
+        "mode_changed": ledger.set_game_mode,
+    }
+
+
+def replay(state, chip_config, events):
+    """Applies events (oldest first) on top of state; returns the number applied.
+
+    Events at or below state['event_seq'] are skipped, so a tail that overlaps
+    the checkpoint (or was uploaded twice) is harmless.
+    """
+    handlers = _handlers()
+    applied = 0
+    try:
+        for event in sorted(events, key=lambda e: e["seq"]):
+            if event["seq"] <= state.get('event_seq', 0):
+                continue
+            _replay.at = event["at"]
+            fields = {k: event[k] for k in EVENT_FIELDS[event["type"]]}
+            handlers[event["type"]](state, chip_config, **fields)
+            state['event_seq'] = event["seq"]
+            applied += 1
+    finally:
+        _replay.at = None
+    return applied
+
+
+def describe(event):
+    """One-line summary for timeline views"""
+    fields = ", ".join(f"{k}={event[k]}" for k in EVENT_FIELDS[event["type"]] if k not in ("players", "counts"))
+    return f"#{event['seq']} {datetime.fromtimestamp(event['at']).strftime('%H:%M:%S')} {event['type']} ({fields})"
+
+
+def expense_entries(events):
+    """The expenses_log entries the expense_added events add, in seq order, one per seq (V8.0).
+
+    The event log is mirrored to the cloud while sealed log segments are not, so
+    this rebuilds the full expense list on a server that never saw the early ones.
+    """
+    added = {e["seq"]: e for e in events if e["type"] == "expense_added"}
+    return [
+        {"Time": datetime.fromtimestamp(e["at"]).strftime("%H:%M"), "Item": e["item"], "Amount": e["amount"]}
+        for _, e in sorted(added.items())
+    ]
+
+
+# --- Merging Concurrent Devices (V7.6) ---
+# Events that only add to a total (rebuys, rake, expenses...) commute, so two
+# devices' deltas always merge. Events that overwrite something (chip counts,
+# status, cash-out, mode) conflict with any other device's event on the same
+# key. None = touches everything (a CSV import replaces every player).
+DELTA_EVENTS = {"rebuy", "repay", "fee_charged", "rake_added", "insurance", "expense_added"}
+
+
+def touches(event):
+    """Keys of session state the event reads or writes"""
+    kind = event["type"]
+    if kind == "players_imported":
+        return None
+    if kind in ("chips_set", "chips_counted"):
+        names = event["names"] if kind == "chips_counted" else [event["name"]]
+        return {("chips", n) for n in names}
+    if kind == "player_added":
+        name = event["name"]
+        return {("player", name), ("status", name), ("chips", name)}
+    if kind == "status_changed":
+        return {("status", event["name"])}
+    if kind == "cashed_out":
+        return {("player", event["name"]), ("status", event["name"])}
+    if kind == "fee_charged":
+        return {("rake",), ("player", event["name"])}
+    if kind in ("rebuy", "repay"):
+        return {("player", event["name"])}
+    return {{"rake_added": ("rake",), "insurance": ("insurance",),
+             "expense_added": ("expenses",), "mode_changed": ("mode",)}[kind]}
+
+
+def rebase(state, chip_config, theirs, ours):
+    """Re-applies this device's uncommitted events on top of state, which already
+    includes theirs (the events another device committed first).
+
+    Each of ours is recorded again with a new seq, unless it overlaps one of
+    theirs (same key, and either side overwrites) or no longer applies (the
+    player is gone). Returns the events that were dropped.
+    """
+    written = {}  # key -> True if one of theirs overwrote it
+    everything = False
+    for event in theirs:
+        keys = touches(event)
+        if keys is None:
+            everything = True
+            continue
+        for key in keys:
+            written[key] = written.get(key, False) or event["type"] not in DELTA_EVENTS
+
+    handlers = _handlers()
+    dropped = []
+    for event in sorted(ours, key=lambda e: e["seq"]):
+        keys = touches(event)
+        overwrites = event["type"] not in DELTA_EVENTS
+        if everything or (keys is None and theirs) or any(
+            key in written and (overwrites or written[key]) for key in keys or ()
+        ):
+            dropped.append(event)
+            continue
+        n, seq = len(state.get('events', [])), state.get('event_seq', 0)
+        try:
+            handlers[event["type"]](state, chip_config, **{k: event[k] for k in EVENT_FIELDS[event["type"]]})
+        except (KeyError, ValueError, IndexError):
+            del state['events'][n:]  # Recorded but not applied
+            state['event_seq'] = seq
+            dropped.append(event)
+    return dropped
@@ -0,0 +1,110 @@
+import collections
+import threading
+import time
+
+# --- Live Session Hub (V7.7) ---
+# One process-wide hub that every browser session of a host attaches to.
+# A session that commits events publishes them here; the other sessions of
+# that host are flagged and, on their next poll (a fragment ticking every
+# second), replay just those events from memory. The local store stays the
+# durable copy and Sheets only a mirror: neither is used to coordinate.
+
+
+class Subscription:
+    """One browser session's attachment to a host's live session"""
+
+    def __init__(self, host_id, session_id):
+        self.host_id = host_id
+        self.session_id = session_id
+        self.changed = threading.Event()
+        self.last_seen = time.monotonic()
+
+
+class LiveSession:
+    """Head revision, recent events and subscribers of one host"""
+
+    def __init__(self, backlog):
+        self.head = 0
+        self.events = collections.deque(maxlen=backlog)  # Most recent committed events, oldest first
+        self.subscribers = {}  # session_id -> Subscription
+
+
+class SessionHub:
+    """Publish/subscribe of committed session events, keyed by host_id"""
+
+    def __init__(self, backlog=500, idle_timeout=30.0):
+        self.backlog = backlog
+        self.idle_timeout = idle_timeout  # Subscribers that stop polling are dropped after this
+        self._lock = threading.Lock()
+        self._live = {}  # host_id -> LiveSession
+
+    def _session(self, host_id):
+        live = self._live.get(host_id)
+        if live is None:
+            live = self._live[host_id] = LiveSession(self.backlog)
+        return live
+
+    # --- Publishing ---
+    def publish(self, host_id, events, head, source=None):
+        """Announces events committed up to head; every subscriber but source is notified.
+
+        events may be empty (a wipe): subscribers then find a gap and reload.
+        """
+        with self._lock:
+            live = self._session(host_id)
+            if events and live.events and events[0]["seq"] != live.events[-1]["seq"] + 1:
+                live.events.clear()  # Not contiguous with what we hold: keep only the new run
+            if not events:
+                live.events.clear()
+            live.events.extend(events)
+            live.head = max(live.head, head)
+            for sub in live.subscribers.values():
+                if sub.session_id != source:
+                    sub.changed.set()
+
+    def head(self, host_id):
+        with self._lock:
+            live = self._live.get(host_id)
+            return live.head if live else 0
+
+    def since(self, host_id, seq):
+        """Committed events after seq, or None if the hub no longer holds all of them"""
+        with self._lock:
+            live = self._live.get(host_id)
+            if live is None or live.head <= seq:
+                return []
+            if not live.events or live.events[0]["seq"] > seq + 1 or live.events[-1]["seq"] != live.head:
+                return None
+            return [e for e in live.events if e["seq"] > seq]
+
+    # --- Subscribing ---
+    def subscribe(self, host_id, session_id):
+        """The session's subscription (created on first use); also marks it alive"""
+        with self._lock:
+            live = self._session(host_id)
+            sub = live.subscribers.get(session_id)
+            if sub is None:
+                sub = live.subscribers[session_id] = Subscription(host_id, session_id)
+            sub.last_seen = time.monotonic()
+            return sub
+
+    def unsubscribe(self, host_id, session_id):
+        with self._lock:
+            live = self._live.get(host_id)
+            if live:
+                live.subscribers.pop(session_id, None)
+
+    def subscribers(self, host_id):
+        """Number of sessions of the host that polled recently (idle ones are dropped)"""
+        with self._lock:
+            live = self._live.get(host_id)
+            if live is None:
+                return 0
+            cutoff = time.monotonic() - self.idle_timeout
+            for session_id in [s for s, sub in live.subscribers.items() if sub.last_seen < cutoff]:
+                del live.subscribers[session_id]
+            return len(live.subscribers)
+
+    def is_live(self, host_id):
+        """True while another session of the host is attached"""
+        return self.subscribers(host_id) > 0
@@ -0,0 +1,214 @@
+import collections
+import contextlib
+import random
+import threading
+import time
+
+# --- Quota-Aware Sheets Access (V7.8) ---
+# Every Sheets API call goes through a QuotaGate: it takes a token from the
+# global bucket and from the calling host's bucket (reads and writes are
+# metered separately, like the API's per-minute quotas), and retries 429s and
+# transient 5xx errors with jittered exponential backoff. Row updates that
+# several hosts queue on the same worksheet at once are merged into one
+# batch_update by a WriteBatcher.
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """per_minute tokens a minute, up to burst saved up"""
+
+    def __init__(self, per_minute, burst=None):
+        self.rate = per_minute / 60.0
+        self.capacity = float(burst or max(1, per_minute // 4))
+        self.tokens = self.capacity
+        self.stamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    def take(self):
+        """Takes a token and returns 0, or returns the seconds until one is available"""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.stamp) * self.rate)
+            self.stamp = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0.0
+            return (1 - self.tokens) / self.rate
+
+    def refund(self):
+        with self._lock:
+            self.tokens = min(self.capacity, self.tokens + 1)
+
+
+def is_retryable(error):
+    """429 / 5xx from gspread (APIError.response), the memory stand-in's quota error, or a network blip"""
+    status = getattr(getattr(error, "response", None), "status_code", None)
+    if status in RETRY_STATUS:
+        return True
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return True
+    text = str(error)
+    return "429" in text or "Quota exceeded" in text or "RATE_LIMIT_EXCEEDED" in text
+
+
+class QuotaGate:
+    """Rate limiting, backoff and counters shared by every call of one backend.
+
+    Defaults follow the Sheets per-user quota (60 reads and 60 writes a
+    minute); each host may use half of it so one busy table can't starve
+    the others.
+    """
+
+    def __init__(self, read_per_min=60, write_per_min=60, host_read_per_min=30, host_write_per_min=30,
+                 max_retries=5, base_delay=1.0, max_delay=32.0, batch_window=0.05):
+        self.limits = {"read": read_per_min, "write": write_per_min}
+        self.host_limits = {"read": host_read_per_min, "write": host_write_per_min}
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.batch_window = batch_window
+        self._buckets = {kind: TokenBucket(n) for kind, n in self.limits.items() if n}
+        self._host_buckets = {}  # (host_id, kind) -> TokenBucket
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.calls = 0
+            self.throttled = 0      # Calls that had to wait for a token
+            self.throttle_wait_s = 0.0
+            self.retried = 0        # Attempts repeated after a 429 / 5xx
+            self.dropped = 0        # Calls that failed after every retry
+            self.batched = 0        # Writes that rode along in another call's batch_update
+            self._window = {"read": collections.deque(), "write": collections.deque()}
+
+    # --- Host Context ---
+    @contextlib.contextmanager
+    def host(self, host_id):
+        """Calls made inside are charged to host_id's bucket too"""
+        previous = getattr(self._local, "host_id", None)
+        self._local.host_id = host_id
+        try:
+            yield
+        finally:
+            self._local.host_id = previous
+
+    def _host_bucket(self, kind):
+        host_id = getattr(self._local, "host_id", None)
+        limit = self.host_limits.get(kind)
+        if host_id is None or not limit:
+            return None
+        with self._lock:
+            bucket = self._host_buckets.get((host_id, kind))
+            if bucket is None:
+                bucket = self._host_buckets[(host_id, kind)] = TokenBucket(limit)
+            return bucket
+
+    # --- Calls ---
+    def acquire(self, kind):
+        """Blocks until both the host's and the global bucket hand out a token"""
+        host_bucket, bucket = self._host_bucket(kind), self._buckets.get(kind)
+        waited = 0.0
+        while True:
+            wait = host_bucket.take() if host_bucket else 0.0
+            if not wait and bucket:
+                wait = bucket.take()
+                if wait and host_bucket:
+                    host_bucket.refund()
+            if not wait:
+                break
+            time.sleep(wait)
+            waited += wait
+        with self._lock:
+            self.calls += 1
+            if waited:
+                self.throttled += 1
+                self.throttle_wait_s += waited
+            window = self._window[kind]
+            now = time.monotonic()
+            window.append(now)
+            while window and now - window[0] > 60:
+                window.popleft()
+
+    def backoff(self, attempt):
+        """Full-jitter exponential delay before retry number attempt (0-based)"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def call(self, kind, fn, *args, **kwargs):
+        """fn(*args, **kwargs) as one rate-limited API call, retried on 429 / 5xx"""
+        attempt = 0
+        while True:
+            self.acquire(kind)
+            try:
+                return fn(*args, **kwargs)
+            except Exception as e:
+                if not is_retryable(e):
+                    raise
+                if attempt >= self.max_retries:
+                    with self._lock:
+                        self.dropped += 1
+                    raise
+                with self._lock:
+                    self.retried += 1
+                time.sleep(self.backoff(attempt))
+                attempt += 1
+
+    def record_batch(self, merged):
+        with self._lock:
+            self.batched += merged
+
+    def snapshot(self):
+        with self._lock:
+            now = time.monotonic()
+            return {
+                "calls": self.calls, "throttled": self.throttled, "throttle_wait_s": self.throttle_wait_s,
+                "retried": self.retried, "dropped": self.dropped, "batched": self.batched,
+                "last_min": {k: sum(1 for t in w if now - t <= 60) for k, w in self._window.items()},
+                "limits": dict(self.limits),
+            }
+
+
+class WriteBatcher:
+    """Group commit for one worksheet's cell updates.
+
+    The first caller waits batch_window for others to queue theirs, then
+    sends everything as one batch_update (the latest values win for a range
+    queued twice); the others just wait for that call's outcome.
+    """
+
+    def __init__(self, sheet, gate=None):
+        self._sheet = sheet  # () -> worksheet
+        self.gate = gate
+        self._lock = threading.Lock()
+        self._queue = []
+        self._leading = False
+
+    def update(self, range_name, values):
+        item = {"range": range_name, "values": values, "done": threading.Event(), "error": None}
+        with self._lock:
+            self._queue.append(item)
+            lead = not self._leading
+            self._leading = True
+        if lead:
+            if self.gate and self.gate.batch_window:
+                time.sleep(self.gate.batch_window)
+            with self._lock:
+                batch, self._queue = self._queue, []
+                self._leading = False
+            merged = {}
+            for queued in batch:
+                merged[queued["range"]] = queued["values"]
+            try:
+                self._sheet().batch_update([{"range": r, "values": v} for r, v in merged.items()], raw=True)
+            except Exception as e:
+                for queued in batch:
+                    queued["error"] = e
+            if self.gate:
+                self.gate.record_batch(len(batch) - 1)
+            for queued in batch:
+                queued["done"].set()
+        item["done"].wait()
+        if item["error"] is not None:
+            raise item["error"]
@@ -0,0 +1,97 @@
+import base64
+import json
+import re
+import zlib
+
+# --- Snapshot Codec (V7.4) ---
+# State_JSON used to be plain json.dumps text in one cell, which grows with
+# every log line and eventually hits the Sheets per-cell limit. Snapshots are
+# now zlib-compressed, base64-encoded and tagged with a format version and a
+# CRC32 of the JSON, then split across State_JSON, State_JSON_2, ... cells
+# when long. decode() still reads the legacy plain-JSON snapshots.
+#
+#   pcs2:<crc32 hex>:<base64(zlib(json))>     encoded snapshot (local store)
+#   p<k>/<n>:<piece>                          continuation cell k of n
+
+CODEC_VERSION = 2
+CELL_CHARS = 45000  # Google Sheets caps a cell at 50,000 characters
+_HEADER = re.compile(r"pcs(\d+):([0-9a-f]{8}):")
+_PART = re.compile(r"p(\d+)/(\d+):")
+
+
+class SnapshotError(ValueError):
+    """A snapshot that can't be decoded (truncated, corrupted or from a newer app version)"""
+
+
+def encode(payload):
+    """State dict -> compact versioned snapshot string"""
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    body = base64.b64encode(zlib.compress(raw, 6)).decode("ascii")
+    return f"pcs{CODEC_VERSION}:{zlib.crc32(raw):08x}:{body}"
+
+
+def decode(text):
+    """Snapshot string (encoded or legacy plain JSON) -> state dict"""
+    text = (text or "").strip()
+    if text.startswith("{"):
+        return json.loads(text)  # Legacy format (V1)
+    match = _HEADER.match(text)
+    if not match:
+        raise SnapshotError("Unrecognised snapshot format")
+    version, crc = int(match.group(1)), int(match.group(2), 16)
+    if version > CODEC_VERSION:
+        raise SnapshotError(f"Snapshot format v{version} is newer than this app (v{CODEC_VERSION})")
+    try:
+        raw = zlib.decompress(base64.b64decode(text[match.end():], validate=True))
+    except (ValueError, zlib.error) as e:
+        raise SnapshotError(f"Snapshot is corrupted: {e}") from e
+    if zlib.crc32(raw) != crc:
+        raise SnapshotError("Snapshot checksum mismatch")
+    return json.loads(raw)
+
+
+def chunk_column(k):
+    return "State_JSON" if k == 1 else f"State_JSON_{k}"
+
+
+def split_cells(text, limit=CELL_CHARS):
+    """Snapshot string -> {State_JSON: ..., State_JSON_2: ...}, every cell under the Sheets limit"""
+    head, rest = text[:limit], text[limit:]
+    size = limit - 16  # Room for the "p<k>/<n>:" tag
+    pieces = [rest[i:i + size] for i in range(0, len(rest), size)]
+    n = len(pieces) + 1
+    cells = {chunk_column(1): head}
+    for k, piece in enumerate(pieces, start=2):
+        cells[chunk_column(k)] = f"p{k}/{n}:{piece}"
+    return cells
+
+
+def _cell(value):
+    if value is None or (isinstance(value, float) and value != value):  # Blank / NaN
+        return ""
+    return str(value)
+
+
+def join_cells(record):
+    """Reassembles a snapshot string from a row's State_JSON cells"""
+    parts = [_cell(record.get(chunk_column(1)))]
+    k, n = 2, 1
+    while True:
+        cell = _cell(record.get(chunk_column(k)))
+        if not cell:
+            break
+        match = _PART.match(cell)
+        if not match or int(match.group(1)) != k:
+            raise SnapshotError(f"Snapshot cell {chunk_column(k)} is out of sequence")
+        n = int(match.group(2))
+        parts.append(cell[match.end():])
+        if k == n:
+            break
+        k += 1
+    if len(parts) != n:
+        raise SnapshotError(f"Snapshot is truncated ({len(parts)} of {n} cells)")
+    return "".join(parts)
+
+
+def is_chunk_column(name):
+    return name == "State_JSON" or re.fullmatch(r"State_JSON_\d+", str(name)) is not None
@@ -0,0 +1,771 @@
+import collections
+import functools
+import json
+import re
+import threading
+import time
+
+import pandas as pd
+
+import profiler
+from session_events import RevisionConflict
+from sheets_quota import QuotaGate, WriteBatcher
+from snapshot_codec import is_chunk_column, join_cells, split_cells
+
+# --- Flight Recorder Storage (V6.2) ---
+ACTIVE_STATE_WORKSHEET = "active_state"
+ACTIVE_STATE_COLUMNS = ["Host_ID", "Last_Update", "State_JSON", "Revision"]  # Revision = event seq (V7.6)
+HISTORY_WORKSHEET = None  # None = the connection's default worksheet (secrets or first tab)
+HISTORY_DIRECTORY_WORKSHEET = "sessions_directory"
+HISTORY_DIRECTORY_COLUMNS = ["Host_ID", "Worksheet", "Sessions", "Last_Update"]
+EVENTS_COLUMNS = ["Seq", "At", "Type", "Event_JSON"]  # Live-session event log, one tab per host (V7.5)
+SESSION_COLUMNS = [
+    "Session_ID", "Timestamp", "Host_ID", "Mode", "Total_Buyin", "Total_Cashout",
+    "Gross_Profit", "Expenses", "Net_Profit", "My_Share", "Notes"
+]
+
+
+def col_letter(n):
+    """1-based column number -> sheet column letter (1 -> A, 27 -> AA)"""
+    letters = ""
+    while n > 0:
+        n, rem = divmod(n - 1, 26)
+        letters = chr(65 + rem) + letters
+    return letters
+
+
+def row_from_range(a1_range):
+    """Extracts the first row number from an A1 range like 'active_state!A5:C5'"""
+    match = re.search(r"![A-Z]+(\d+)", a1_range or "")
+    return int(match.group(1)) if match else None
+
+
+def history_worksheet_name(host_id, prefix="sessions_"):
+    """Per-host history tab title (Sheets forbids []*?:/\\ and caps titles at 100 chars)"""
+    return prefix + re.sub(r"[\[\]\*\?:/\\']", "_", str(host_id))[:80]
+
+
+def open_worksheet(conn, title, columns, stats=None, quota=None):
+    """Returns the gspread worksheet behind a connection, creating it with a header row if missing"""
+    client = conn.client
+    call = quota.call if quota is not None else (lambda kind, fn, *a, **kw: fn(*a, **kw))
+    t0 = time.perf_counter()
+    try:
+        ws = call("read", client._select_worksheet, worksheet=title)
+    except Exception:
+        if title is None:
+            raise
+        # First run: create the worksheet with its header row
+        book = client._open_spreadsheet()
+        ws = call("write", book.add_worksheet, title=title, rows=1, cols=len(columns))
+        call("write", ws.update, range_name="A1", values=[list(columns)])
+    if stats is not None:
+        stats.record("open_worksheet", "read", 0, time.perf_counter() - t0)
+    if stats is not None or quota is not None:
+        ws = Metered(ws, stats, quota)
+    return ws
+
+
+class HostRowTable:
+    """Row-targeted access to a one-row-per-host worksheet ('active_state', the history directory).
+
+    Keeps an in-memory Host_ID -> row number index so a sync only touches the
+    calling host's cells (or appends one row for a new host). The whole sheet
+    is read once on first use and again only after refresh().
+    """
+
+    def __init__(self, conn, worksheet=ACTIVE_STATE_WORKSHEET, columns=ACTIVE_STATE_COLUMNS, stats=None, quota=None):
+        self.conn = conn
+        self.worksheet = worksheet
+        self.columns = list(columns)
+        self.stats = stats
+        self.quota = quota
+        self._lock = threading.RLock()
+        self._ws = None
+        self._rows = None       # Host_ID -> 1-based sheet row
+        self._prefetched = {}   # Host_ID -> row values from the last full read
+        self._batcher = WriteBatcher(self._sheet, quota)  # Row updates of concurrent hosts share one call (V7.8)
+
+    def _sheet(self):
+        if self._ws is None:
+            self._ws = open_worksheet(self.conn, self.worksheet, self.columns, self.stats, self.quota)
+        return self._ws
+
+    def refresh(self):
+        """Re-reads the whole sheet and rebuilds the row index"""
+        with self._lock:
+            self._ws = None
+            values = self._sheet().get_all_values()
+            header = values[0] if values else []
+            if not header:
+                self._sheet().update(range_name="A1", values=[self.columns])
+                header = self.columns
+            # Keep any extra columns already on the sheet, append ours if missing
+            self.columns = list(header) + [c for c in self.columns if c not in header]
+            if len(self.columns) > len(header):
+                self._sheet().update(range_name="A1", values=[self.columns])
+
+            id_col = self.columns.index("Host_ID")
+            self._rows, self._prefetched = {}, {}
+            for i, row in enumerate(values[1:], start=2):
+                if len(row) > id_col and row[id_col]:
+                    self._rows[row[id_col]] = i
+                    self._prefetched[row[id_col]] = row
+            return len(self._rows)
+
+    def _ensure_index(self):
+        if self._rows is None:
+            self.refresh()
+
+    def read(self, host_id):
+        """Returns {column: value} for a host, or None if the host has no row"""
+        with self._lock:
+            self._ensure_index()
+            row = self._rows.get(host_id)
+            if row is None:
+                return None
+            values = self._prefetched.pop(host_id, None)
+            if values is None:
+                values = self._sheet().row_values(row)
+            values = list(values) + [""] * (len(self.columns) - len(values))
+            return dict(zip(self.columns, values))
+
+    def read_cell(self, host_id, column):
+        """One cell of a host's row, read from the sheet itself; None if the host has no row"""
+        with self._lock:
+            self._ensure_index()
+            row = self._rows.get(host_id)
+            if row is None or column not in self.columns:
+                return None
+            values = self._sheet().get_values(f"{col_letter(self.columns.index(column) + 1)}{row}")
+            return values[0][0] if values and values[0] else ""
+
+    def _ensure_columns(self, names):
+        """Adds header cells for record keys the sheet doesn't have yet (e.g. snapshot chunks)"""
+        new = [c for c in names if c not in self.columns]
+        if new:
+            self.columns += new
+            self._sheet().update(range_name="A1", values=[self.columns])
+
+    def write(self, host_id, record):
+        """Upserts one host's row; record maps column name -> cell value (missing columns are blanked)"""
+        with self._lock:
+            self._ensure_index()
+            self._ensure_columns(record)
+            self._prefetched.pop(host_id, None)
+            cells = [host_id if c == "Host_ID" else record.get(c, "") for c in self.columns]
+            row = self._rows.get(host_id)
+        try:
+            if row is None:
+                with self._lock:
+                    self._append(host_id, cells)
+            else:
+                # Outside the lock, so other hosts' rows can join the same batch_update
+                self._batcher.update(f"A{row}:{col_letter(len(cells))}{row}", [cells])
+        except Exception:
+            # Index may be stale (sheet edited elsewhere) - rebuild once and retry
+            with self._lock:
+                self.refresh()
+                row = self._rows.get(host_id)
+                if row is None:
+                    self._append(host_id, cells)
+                else:
+                    last = col_letter(len(cells))
+                    self._sheet().update(range_name=f"A{row}:{last}{row}", values=[cells], raw=True)
+
+    def _append(self, host_id, cells):
+        resp = self._sheet().append_row(cells, value_input_option="RAW", table_range="A1")
+        row = row_from_range((resp or {}).get("updates", {}).get("updatedRange"))
+        if row is None:
+            self.refresh()
+        else:
+            self._rows[host_id] = row
+
+    def clear(self, host_id, columns, values=None):
+        """Blanks the given cells of a host's row and writes values ({column: value}) in the same call.
+
+        The row itself is kept so indices never shift.
+        """
+        with self._lock:
+            self._ensure_index()
+            self._prefetched.pop(host_id, None)
+            row = self._rows.get(host_id)
+            if row is None:
+                return
+            cells = {**{c: "" for c in columns}, **(values or {})}
+            data = [
+                {"range": f"{col_letter(self.columns.index(c) + 1)}{row}", "values": [[v]]}
+                for c, v in cells.items() if c in self.columns
+            ]
+            if data:
+                self._sheet().batch_update(data, raw=True)
+
+
+class HistoryTable:
+    """Append-only access to the session history worksheet (V6.6).
+
+    Each saved session is one append_row call carrying only the new record,
+    so cost no longer grows with history length and concurrent saves from
+    different hosts can't overwrite each other. Records carry a Session_ID;
+    an append whose outcome is unknown (timeout, retry after a crash) is
+    verified against the Session_ID column before being sent again.
+    """
+
+    def __init__(self, conn, worksheet=HISTORY_WORKSHEET, columns=SESSION_COLUMNS, stats=None, quota=None):
+        self.conn = conn
+        self.worksheet = worksheet
+        self.default_columns = list(columns)
+        self.stats = stats
+        self.quota = quota
+        self._lock = threading.RLock()
+        self._ws = None
+        self.columns = None  # Header row, read once
+
+    def _sheet(self):
+        if self._ws is None:
+            self._ws = open_worksheet(self.conn, self.worksheet, self.default_columns, self.stats, self.quota)
+        return self._ws
+
+    def header(self):
+        """Column names, from the header row (read once)"""
+        with self._lock:
+            if self.columns is None:
+                self.columns = [c for c in self._sheet().row_values(1) if c]
+            return self.columns
+
+    def _ensure_header(self, record):
+        self.header()
+        wanted = dict.fromkeys(list(self.default_columns) + list(record))
+        missing = [c for c in wanted if c not in self.columns]
+        if missing:
+            # New sheet, or a legacy sheet without Session_ID: extend the header in place
+            self.columns = self.columns + missing
+            self._sheet().update(range_name="A1", values=[self.columns])
+
+    def contains(self, session_id):
+        with self._lock:
+            if self.columns is None or "Session_ID" not in self.columns:
+                return False
+            col = self.columns.index("Session_ID") + 1
+            return session_id in self._sheet().col_values(col)
+
+    def append(self, record, verify=False):
+        """Appends one session row; returns False if verify found it already written"""
+        with self._lock:
+            self._ensure_header(record)
+            if verify and record.get("Session_ID") and self.contains(record["Session_ID"]):
+                return False
+            cells = [record.get(c, "") for c in self.columns]
+            self._sheet().append_row(cells, value_input_option="USER_ENTERED", table_range="A1")
+            return True
+
+    def append_many(self, records, value_input_option="RAW"):
+        """Appends several rows in one API call"""
+        if not records:
+            return
+        with self._lock:
+            self._ensure_header(records[0])
+            rows = [[record.get(c, "") for c in self.columns] for record in records]
+            self._sheet().append_rows(rows, value_input_option=value_input_option, table_range="A1")
+
+    def rows(self):
+        """Every data row as {column: value} (one read)"""
+        with self._lock:
+            values = self._sheet().get_all_values()
+            header = values[0] if values else []
+            self.columns = [c for c in header if c] or self.columns
+            return [dict(zip(header, row)) for row in values[1:] if any(row)]
+
+    def values_from(self, row):
+        """Raw sheet rows from the 1-based row on, in one ranged read (V8.0)"""
+        with self._lock:
+            values = self._sheet().get_values(f"A{row}:ZZ")
+        while values and not any(values[-1]):
+            values = values[:-1]
+        return values
+
+    def truncate(self):
+        """Drops every data row, keeping the header"""
+        with self._lock:
+            self._sheet().clear()
+            self.columns = list(self.default_columns)
+            self._sheet().update(range_name="A1", values=[self.columns])
+
+
+# --- Incremental History Reads (V8.0) ---
+# A watermark records how far a reader got through a host's history: the
+# number of rows seen and the last row's Timestamp/Session_ID. History is
+# append-only, so the next read starts at that row, checks it is still the
+# same session and returns only what came after it.
+def history_watermark(last_row, position):
+    return {
+        "rows": position,
+        "timestamp": str((last_row or {}).get("Timestamp", "")),
+        "session_id": str((last_row or {}).get("Session_ID", "")),
+    }
+
+
+def matches_watermark(row, watermark):
+    return (str(row.get("Timestamp", "")) == watermark["timestamp"]
+            and str(row.get("Session_ID", "")) == watermark["session_id"])
+
+
+def frame_rows(df):
+    """DataFrame -> [{column: cell text}], blanks as ''"""
+    if df is None or df.empty:
+        return []
+    cells = df.astype(object).where(df.notna(), "")
+    return [{k: str(v) for k, v in row.items()} for row in cells.to_dict("records")]
+
+
+def history_since(rows, watermark=None):
+    """(rows after the watermark, new watermark), or None if the rows it points at changed"""
+    seen = watermark["rows"] if watermark else 0
+    if seen and (len(rows) < seen or not matches_watermark(rows[seen - 1], watermark)):
+        return None
+    if len(rows) == seen:
+        return [], watermark or history_watermark(None, 0)
+    return rows[seen:], history_watermark(rows[-1], len(rows))
+
+
+# --- I/O Accounting (V6.5) ---
+READ_OPS = {"read", "get_all_values", "row_values", "col_values", "get_values", "batch_get"}
+
+
+def payload_bytes(obj):
+    """Rough wire size of a request/response payload"""
+    if obj is None:
+        return 0
+    if isinstance(obj, pd.DataFrame):
+        return len(obj.to_csv(index=False))
+    if isinstance(obj, (str, bytes)):
+        return len(obj)
+    try:
+        return len(json.dumps(obj, default=str))
+    except Exception:
+        return 0
+
+
+class IOStats:
+    """Thread-safe counters of API calls, bytes and latency for one backend"""
+
+    def __init__(self, recent=50):
+        self._lock = threading.Lock()
+        self._recent_len = recent
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.reads = 0
+            self.writes = 0
+            self.errors = 0
+            self.bytes_read = 0
+            self.bytes_written = 0
+            self.latency_s = 0.0
+            self.by_op = {}     # op -> {"calls", "bytes", "seconds", "errors"}
+            self.recent = collections.deque(maxlen=self._recent_len)
+
+    def record(self, op, kind, nbytes, seconds, ok=True):
+        with self._lock:
+            if kind == "read":
+                self.reads += 1
+                self.bytes_read += nbytes
+            else:
+                self.writes += 1
+                self.bytes_written += nbytes
+            self.latency_s += seconds
+            if not ok:
+                self.errors += 1
+            entry = self.by_op.setdefault(op, {"calls": 0, "bytes": 0, "seconds": 0.0, "errors": 0})
+            entry["calls"] += 1
+            entry["bytes"] += nbytes
+            entry["seconds"] += seconds
+            entry["errors"] += 0 if ok else 1
+            self.recent.append({
+                "Time": time.strftime("%H:%M:%S"), "Op": op, "Kind": kind,
+                "Bytes": nbytes, "ms": round(seconds * 1000, 1), "OK": ok
+            })
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "reads": self.reads, "writes": self.writes, "errors": self.errors,
+                "bytes_read": self.bytes_read, "bytes_written": self.bytes_written,
+                "latency_s": self.latency_s,
+                "by_op": {k: dict(v) for k, v in self.by_op.items()},
+                "recent": list(self.recent),
+            }
+
+
+class Metered:
+    """Proxy that records each public method call on a sheet or connection as one API call.
+
+    With a QuotaGate (V7.8) every call is rate limited and retried first;
+    each attempt is recorded.
+    """
+
+    def __init__(self, target, stats, quota=None):
+        self._target = target
+        self._stats = stats
+        self._quota = quota
+
+    def __getattr__(self, name):
+        attr = getattr(self._target, name)
+        if name.startswith("_") or not callable(attr):
+            return attr
+        kind = "read" if name in READ_OPS else "write"
+
+        def attempt(*args, **kwargs):
+            if self._stats is None:
+                return attr(*args, **kwargs)
+            t0 = time.perf_counter()
+            result, ok = None, False
+            try:
+                result = attr(*args, **kwargs)
+                ok = True
+                return result
+            finally:
+                sent = payload_bytes(kwargs.get("data", kwargs.get("values", args[0] if args else None)))
+                nbytes = payload_bytes(result) if kind == "read" else sent
+                seconds = time.perf_counter() - t0
+                self._stats.record(name, kind, nbytes, seconds, ok)
+                profiler.record_io(name, nbytes, seconds)  # Per-rerun breakdown, when profiling (V7.9)
+
+        def call(*args, **kwargs):
+            if self._quota is None:
+                return attempt(*args, **kwargs)
+            return self._quota.call(kind, attempt, *args, **kwargs)
+        return call
+
+
+# --- Storage Backends (V6.5) ---
+def _revision(record):
+    try:
+        return int(float(record.get("Revision") or 0))
+    except (TypeError, ValueError):
+        return 0
+
+
+def _check_revision(host_id, current, revision):
+    """Raises RevisionConflict if the stored row is already past revision"""
+    stored = _revision(current) if current else 0
+    if stored > revision:
+        raise RevisionConflict(host_id, revision, stored)
+
+
+class StorageBackend:
+    """Interface behind every Flight Recorder and session-history call.
+
+    Snapshot records are {'Last_Update', 'State_JSON', 'Revision'}; history records are
+    one dict per saved session. Implementations count their I/O in self.stats.
+    """
+
+    name = "base"
+
+    def __init__(self):
+        self.stats = IOStats()
+
+    def read_snapshot(self, host_id):
+        """Returns the host's snapshot record, or None"""
+        raise NotImplementedError
+
+    def write_snapshot(self, host_id, record):
+        """Upserts the host's snapshot; raises RevisionConflict rather than overwrite a newer Revision"""
+        raise NotImplementedError
+
+    def clear_snapshot(self, host_id, revision=None):
+        """Wipes the host's snapshot and its event log; the row keeps revision (the wipe's) as its Revision"""
+        raise NotImplementedError
+
+    def append_events(self, host_id, events):
+        """Appends [(seq, event_json)] to the host's live-session event log"""
+        raise NotImplementedError
+
+    def read_events(self, host_id, after=0):
+        """[(seq, event_json)] with seq > after, oldest first"""
+        raise NotImplementedError
+
+    def read_history(self, host_id):
+        """Returns the host's saved sessions as a DataFrame"""
+        raise NotImplementedError
+
+    def read_history_since(self, host_id, watermark=None):
+        """(sessions after the watermark as {column: text}, new watermark), or None if
+        the history was rewritten under the watermark (V8.0). This default reads the
+        whole history and skips what was seen; backends that can read less override it."""
+        return history_since(frame_rows(self.read_history(host_id)), watermark)
+
+    def append_history(self, record, verify=False):
+        """Appends one session; verify=True skips it if its Session_ID is already stored"""
+        raise NotImplementedError
+
+    def refresh(self):
+        """Drops cached indexes; returns the number of indexed snapshot rows"""
+        return 0
+
+
+def _charged_to_host(method):
+    """Runs a backend method with its host_id as the QuotaGate's host context (V7.8)"""
+    @functools.wraps(method)
+    def wrapper(self, host_id, *args, **kwargs):
+        with self.quota.host(host_id):
+            return method(self, host_id, *args, **kwargs)
+    return wrapper
+
+
+class GSheetsBackend(StorageBackend):
+    """Google Sheets via st-gsheets-connection (or anything with the same API)
+
+    mode "rows" keeps a row index and writes only the host's cells (V6.2);
+    mode "sheet" is the legacy whole-worksheet read-modify-write.
+
+    history "partitioned" keeps one 'sessions_<host>' tab per host plus a
+    'sessions_directory' tab (V6.7), so analytics downloads only that host's
+    rows; "shared" is the legacy single history tab filtered in pandas.
+    """
+
+    name = "gsheets"
+
+    def __init__(self, conn, mode="rows", history="partitioned", quota=None):
+        super().__init__()
+        self.quota = quota or QuotaGate()
+        self._raw_conn = conn
+        self.conn = Metered(conn, self.stats, self.quota)
+        self.mode = mode
+        self.history_mode = history
+        self.table = HostRowTable(conn, stats=self.stats, quota=self.quota)
+        self.history = HistoryTable(conn, stats=self.stats, quota=self.quota)   # Legacy shared tab
+        self.directory = HostRowTable(
+            conn, worksheet=HISTORY_DIRECTORY_WORKSHEET, columns=HISTORY_DIRECTORY_COLUMNS,
+            stats=self.stats, quota=self.quota
+        )
+        self._partition_lock = threading.RLock()
+        self._partitions = {}  # Host_ID -> {"table": HistoryTable, "sessions": int}
+        self._event_tables = {}  # Host_ID -> HistoryTable on 'events_<host>'
+
+    # --- Snapshot ---
+    @_charged_to_host
+    def read_snapshot(self, host_id):
+        if self.mode == "rows":
+            record = self.table.read(host_id)
+        else:
+            try:
+                df_state = self.conn.read(worksheet=ACTIVE_STATE_WORKSHEET, ttl=0)
+            except Exception:
+                return None  # Sheet doesn't exist
+            record = None
+            if not df_state.empty and "Host_ID" in df_state.columns:
+                row = df_state[df_state["Host_ID"] == host_id]
+                if not row.empty:
+                    record = row.iloc[0].to_dict()
+
+        if not record or not record.get("State_JSON") or pd.isna(record["State_JSON"]):
+            return None
+        # Long snapshots span State_JSON, State_JSON_2, ... (V7.4)
+        return {
+            "Last_Update": str(record.get("Last_Update") or ""), "State_JSON": join_cells(record),
+            "Revision": _revision(record),
+        }
+
+    @_charged_to_host
+    def write_snapshot(self, host_id, record):
+        revision = record.get("Revision")
+        record = {"Last_Update": record["Last_Update"], **split_cells(record["State_JSON"])}
+        if revision is not None:
+            record["Revision"] = revision
+        if self.mode == "rows":
+            if revision is not None:
+                # Check-on-write (V7.6): another server may already have pushed a newer checkpoint.
+                # Only the Revision cell is read, not the whole row; a push landing between this
+                # read and the write below can still be overwritten
+                _check_revision(host_id, {"Revision": self.table.read_cell(host_id, "Revision")}, revision)
+            # Targeted write: only this host's row cells (append if new); unused chunk cells are blanked
+            self.table.write(host_id, record)
+            return
+
+        # Read Existing
+        try:
+            df_state = self.conn.read(worksheet=ACTIVE_STATE_WORKSHEET, ttl=0)
+        except Exception:
+            df_state = pd.DataFrame(columns=ACTIVE_STATE_COLUMNS)
+        for c in df_state.columns:
+            if is_chunk_column(c) and c not in record:
+                record[c] = ""  # Left over from a longer snapshot
+        for c in record:
+            if c not in df_state.columns:
+                df_state[c] = ""
+
+        # Upsert
+        new_row = {"Host_ID": host_id, **record}
+        if not df_state.empty and "Host_ID" in df_state.columns:
+            if host_id in df_state["Host_ID"].values:
+                if revision is not None:
+                    _check_revision(host_id, df_state[df_state["Host_ID"] == host_id].iloc[0].to_dict(), revision)
+                df_state.loc[df_state["Host_ID"] == host_id, list(record)] = list(record.values())
+            else:
+                df_state = pd.concat([df_state, pd.DataFrame([new_row])], ignore_index=True)
+        else:
+            df_state = pd.DataFrame([new_row])
+
+        # Push
+        self.conn.update(worksheet=ACTIVE_STATE_WORKSHEET, data=df_state)
+
+    @_charged_to_host
+    def clear_snapshot(self, host_id, revision=None):
+        self._events(host_id).truncate()
+        if self.mode == "rows":
+            # Blank the snapshot cells but keep the row, so cached row numbers never shift; the
+            # Revision is the wipe's, so a device still on the old session can't push over it
+            self.table.clear(
+                host_id, ["Last_Update"] + [c for c in self.table.columns if is_chunk_column(c)],
+                {"Revision": "" if revision is None else revision},
+            )
+            return
+        df_state = self.conn.read(worksheet=ACTIVE_STATE_WORKSHEET, ttl=0)
+        if not df_state.empty and "Host_ID" in df_state.columns:
+            # Drop row
+            self.conn.update(worksheet=ACTIVE_STATE_WORKSHEET, data=df_state[df_state["Host_ID"] != host_id])
+
+    # --- Event Log (V7.5) ---
+    def _events(self, host_id):
+        with self._partition_lock:
+            table = self._event_tables.get(host_id)
+            if table is None:
+                table = HistoryTable(
+                    self._raw_conn, worksheet=history_worksheet_name(host_id, prefix="events_"),
+                    columns=EVENTS_COLUMNS, stats=self.stats, quota=self.quota
+                )
+                self._event_tables[host_id] = table
+            return table
+
+    @_charged_to_host
+    def append_events(self, host_id, events):
+        records = []
+        for seq, ev in events:
+            event = json.loads(ev)
+            records.append({"Seq": seq, "At": event.get("at", ""), "Type": event.get("type", ""), "Event_JSON": ev})
+        # One append_rows call per sync, however many events piled up
+        self._events(host_id).append_many(records)
+
+    @_charged_to_host
+    def read_events(self, host_id, after=0):
+        rows = []
+        for row in self._events(host_id).rows():
+            try:
+                seq = int(float(row.get("Seq") or 0))
+            except ValueError:
+                continue
+            if seq > after and row.get("Event_JSON"):
+                rows.append((seq, row["Event_JSON"]))
+        # A retried upload can land twice: keep one copy per seq
+        return sorted(dict(rows).items())
+
+    # --- Session History ---
+    def _read_shared_history(self, host_id):
+        try:
+            df = self.conn.read(worksheet=HISTORY_WORKSHEET, ttl=0)
+        except Exception:
+            return pd.DataFrame()
+        if not df.empty and "Host_ID" in df.columns:
+            df = df[df["Host_ID"] == host_id].reset_index(drop=True)
+        return df
+
+    def _partition(self, host_id):
+        """Returns the host's partition, creating it (and copying legacy rows over) on first use"""
+        with self._partition_lock:
+            part = self._partitions.get(host_id)
+            if part is not None:
+                return part
+
+            entry = self.directory.read(host_id)
+            if entry and entry.get("Worksheet"):
+                try:
+                    sessions = int(float(entry.get("Sessions") or 0))
+                except ValueError:
+                    sessions = 0
+                table = HistoryTable(self._raw_conn, worksheet=entry["Worksheet"], stats=self.stats, quota=self.quota)
+            else:
+                # One-time migration out of the shared tab
+                title = history_worksheet_name(host_id)
+                legacy = self._read_shared_history(host_id)
+                table = HistoryTable(self._raw_conn, worksheet=title, stats=self.stats, quota=self.quota)
+                table._sheet()  # Creates the tab with its header row
+                if not legacy.empty:
+                    columns = list(dict.fromkeys(list(SESSION_COLUMNS) + list(legacy.columns)))
+                    rows = legacy.reindex(columns=columns).astype(object)
+                    rows = rows.where(rows.notna(), "")
+                    table._sheet().update(range_name="A1", values=[columns] + rows.values.tolist())
+                    table.columns = columns
+                sessions = len(legacy)
+                self.directory.write(host_id, {
+                    "Worksheet": title, "Sessions": sessions,
+                    "Last_Update": time.strftime("%Y-%m-%d %H:%M:%S")
+                })
+            part = {"table": table, "sessions": sessions}
+            self._partitions[host_id] = part
+            return part
+
+    @_charged_to_host
+    def read_history(self, host_id):
+        if self.history_mode != "partitioned":
+            return self._read_shared_history(host_id)
+        part = self._partition(host_id)
+        df = self.conn.read(worksheet=part["table"].worksheet, ttl=0)
+        return df.dropna(how="all").reset_index(drop=True) if not df.empty else df
+
+    @_charged_to_host
+    def read_history_since(self, host_id, watermark=None):
+        if self.history_mode != "partitioned":
+            return history_since(frame_rows(self._read_shared_history(host_id)), watermark)
+        # A partition is only ever appended to: read from the last seen row on
+        table = self._partition(host_id)["table"]
+        seen = watermark["rows"] if watermark else 0
+        values = table.values_from(seen + 1)  # Sheet row seen + 1: the header, or the last row seen
+        if seen:
+            header = table.header()
+            if not values or not matches_watermark(dict(zip(header, values[0])), watermark):
+                return None
+        else:
+            header = [c for c in values[0] if c] if values else table.header()
+        body = values[1:]
+        rows = [dict(zip(header, row)) for row in body if any(row)]
+        if not rows:
+            return [], watermark or history_watermark(None, 0)
+        return rows, history_watermark(rows[-1], seen + len(body))
+
+    def append_history(self, record, verify=False):
+        with self.quota.host(record.get("Host_ID")):
+            return self._append_history(record, verify)
+
+    def _append_history(self, record, verify):
+        if self.history_mode != "partitioned":
+            return self.history.append(record, verify=verify)
+        host_id = record.get("Host_ID")
+        part = self._partition(host_id)
+        with self._partition_lock:
+            if not part["table"].append(record, verify=verify):
+                return False
+            part["sessions"] += 1
+            self.directory.write(host_id, {
+                "Worksheet": part["table"].worksheet, "Sessions": part["sessions"],
+                "Last_Update": record.get("Timestamp", "")
+            })
+            return True
+
+    def refresh(self):
+        with self._partition_lock:
+            self._partitions = {}
+            self._event_tables = {}
+            if self.history_mode == "partitioned":
+                self.directory.refresh()
+        return self.table.refresh() if self.mode == "rows" else 0
+
+
+class MemoryBackend(GSheetsBackend):
+    """GSheetsBackend running against the in-memory Sheets stand-in (no Google account needed)"""
+
+    name = "memory"
+
+    def __init__(self, mode="rows", history="partitioned", quota=None, **sheet_options):
+        from memory_sheets import MemorySheetsConnection
+        super().__init__(MemorySheetsConnection(**sheet_options), mode=mode, history=history, quota=quota)
@@ -0,0 +1,128 @@
+import queue
+import threading
+import time
+import weakref
+
+# --- Write-Behind Sync Worker (V6.3) ---
+STATUS_PENDING = "pending"
+STATUS_SYNCED = "synced"
+STATUS_FAILED = "failed"
+
+_workers = weakref.WeakSet()  # Every live worker of the process (see live_workers())
+
+
+def live_workers():
+    """The process's sync workers, e.g. to wait for all of them to drain"""
+    return list(_workers)
+
+
+class SyncWorker:
+    """Background writer for one host's Flight Recorder data.
+
+    notify() is cheap and never touches the network: it just replaces the
+    pending job. The worker thread waits out a short debounce window so
+    bursts of clicks (three quick rebuys) coalesce into one push of the
+    latest state. A failed push keeps the job pending and is retried every
+    retry_interval, so an offline venue catches up once Wi-Fi returns.
+    """
+
+    def __init__(self, host_id, push, debounce=1.5, retry_interval=10.0):
+        self.host_id = host_id
+        self.push = push                  # push(host_id, job) -> None, raises on failure
+        self.debounce = debounce
+        self.retry_interval = retry_interval
+
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._pending = None
+        self._pushing = False
+        self._failed = False
+
+        self.last_error = None
+
+        self._thread = threading.Thread(target=self._run, name=f"sync-{host_id}", daemon=True)
+        self._thread.start()
+        _workers.add(self)
+
+    # --- Public API (called from the Streamlit script thread) ---
+    def notify(self, job):
+        """Marks state dirty; job replaces any job not yet pushed"""
+        with self._lock:
+            self._pending = job
+        self._queue.put(None)
+
+    def flush(self, timeout=15.0):
+        """Pushes any pending job now and waits; returns True if everything is synced"""
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait(timeout)
+        return self.status == STATUS_SYNCED
+
+    @property
+    def status(self):
+        with self._lock:
+            if self._failed:
+                return STATUS_FAILED
+            if self._pending is not None or self._pushing:
+                return STATUS_PENDING
+            return STATUS_SYNCED
+
+    # --- Worker Thread ---
+    def _run(self):
+        while True:
+            waiters = []
+            try:
+                msg = self._queue.get(timeout=self.retry_interval if self._failed else None)
+            except queue.Empty:
+                msg = None  # Retry a failed push
+            if isinstance(msg, threading.Event):
+                waiters.append(msg)
+            else:
+                # Coalesce everything that arrives inside the debounce window
+                deadline = time.monotonic() + self.debounce
+                while True:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    try:
+                        msg = self._queue.get(timeout=remaining)
+                    except queue.Empty:
+                        break
+                    if isinstance(msg, threading.Event):
+                        waiters.append(msg)
+                        break
+            # Flushes queued behind this batch are satisfied by the same push
+            while True:
+                try:
+                    msg = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if isinstance(msg, threading.Event):
+                    waiters.append(msg)
+
+            self._push_latest()
+            for done in waiters:
+                done.set()
+
+    def _push_latest(self):
+        with self._lock:
+            job, self._pending = self._pending, None
+            if job is None:
+                return
+            self._pushing = True
+        try:
+            self.push(self.host_id, job)
+        except Exception as e:
+            print(f"Sync failed (Non-critical): {e}")
+            with self._lock:
+                if self._pending is None:
+                    self._pending = job  # Keep it for the retry unless something newer arrived
+                self._failed = True
+                self.last_error = str(e)
+        else:
+            with self._lock:
+                self._failed = False
+                self.last_error = None
+        finally:
+            with self._lock:
+                self._pushing = False
@@ -0,0 +1,12 @@
+import bench_core
+
+
+def test_core_matches_the_committed_baseline(capsys):
+    # Generous tolerance: CI machines are noisy; sizes and the books are still checked exactly
+    status = bench_core.main(["--check", "--repeat", "7", "--tolerance", "3"])
+    assert status == 0, capsys.readouterr().out
+
+
+def test_a_missing_baseline_fails_the_check(tmp_path, capsys):
+    assert bench_core.main(["--sizes", "10", "--baseline", str(tmp_path / "none.json")]) == 2
+    assert "--save-baseline" in capsys.readouterr().out
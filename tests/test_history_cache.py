@@ -0,0 +1,61 @@
+import pandas as pd
+
+from history_cache import HistoryCache
+from history_ingest import ingest_history
+from local_store import LocalStore
+from rollups import Rollups
+
+COLUMNS = ["Session_ID", "Timestamp", "Host_ID", "Mode", "My_Share", "Notes"]
+
+
+def _row(i):
+    return {"Session_ID": f"s{i}", "Timestamp": f"2026-10-{i:02d} 21:00:00", "Host_ID": "h1",
+            "Mode": "Rake Game", "My_Share": str(i * 10), "Notes": f"night {i}"}
+
+
+class Sheet:
+    """fetch(watermark) over a list of rows; the watermark is the row count"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.calls = []
+
+    def fetch(self, watermark):
+        self.calls.append(watermark)
+        start = watermark["rows"] if watermark else 0
+        return self.rows[start:], {"rows": len(self.rows)}
+
+
+def test_sync_reads_only_the_rows_after_the_watermark(tmp_path):
+    sheet = Sheet([_row(1), _row(2)])
+    cache = HistoryCache(str(tmp_path), COLUMNS)
+    assert cache.sync("h1", sheet.fetch) == 2
+    sheet.rows.append(_row(3))
+    assert cache.sync("h1", sheet.fetch) == 1
+    assert sheet.calls == [None, {"rows": 2}]
+    assert list(cache.frame("h1")["Session_ID"]) == ["s1", "s2", "s3"]
+    assert "Notes" not in cache.frame("h1").columns
+    assert list(cache.notes("h1")["Note"]) == ["night 1", "night 2", "night 3"]
+    # A fresh process reads the file from disk, watermark included
+    assert HistoryCache(str(tmp_path), COLUMNS).status("h1")["watermark"] == {"rows": 3}
+
+
+def test_synced_rows_reach_the_rollups(tmp_path):
+    rollups = Rollups(LocalStore(str(tmp_path / "store.db")))
+    cache = HistoryCache(str(tmp_path / "cache"), COLUMNS)
+    sheet = Sheet([_row(1), _row(2)])
+
+    def on_rows(rows, full):
+        if full:
+            rollups.reset("h1")
+        else:
+            rollups.apply_all("h1", ingest_history(pd.DataFrame(rows))[0].to_dict("records"))
+
+    cache.sync("h1", sheet.fetch, on_rows)
+    rollups.rebuild("h1", cache.frame("h1").to_dict("records"))
+    sheet.rows += [_row(3), _row(4)]  # Saved by another server
+    cache.sync("h1", sheet.fetch, on_rows)
+    assert rollups.totals("h1")["sessions"] == 4
+    assert rollups.totals("h1")["my_share"] == 100
+    cache.resync("h1", sheet.fetch, on_rows)
+    assert not rollups.is_seeded("h1")
@@ -0,0 +1,62 @@
+import pandas as pd
+
+from history_ingest import ingest_history, split_notes, concat_sessions
+
+
+def notes_of(*texts):
+    raw = pd.DataFrame({"Session_ID": [f"s{i}" for i in range(len(texts))], "Notes": list(texts)})
+    return split_notes(raw).set_index("Session_ID")[["Note", "Expense_Details"]].astype(str).values.tolist()
+
+
+def test_split_notes_note_and_expenses():
+    assert notes_of("hello | Exp: Food:$100") == [["hello", "Food:$100"]]
+
+
+def test_split_notes_empty_note():
+    assert notes_of(" | Exp: Food:$100") == [["", "Food:$100"]]
+
+
+def test_split_notes_empty_expenses():
+    assert notes_of("hello | Exp: ") == [["hello", ""]]
+
+
+def test_split_notes_without_marker():
+    assert notes_of("just a note", "pipes | are fine") == [["just a note", ""], ["pipes | are fine", ""]]
+
+
+def test_split_notes_skips_blank_and_empty_frame():
+    assert notes_of("", None) == []
+    assert list(split_notes(pd.DataFrame()).columns) == ["Session_ID", "Note", "Expense_Details"]
+
+
+def test_split_notes_legacy_rows_get_row_ids():
+    raw = pd.DataFrame({"Session_ID": ["", "b"], "Notes": ["x", "y"]})
+    assert split_notes(raw)["Session_ID"].tolist() == ["row2", "b"]
+
+
+def test_ingest_types_and_reports():
+    raw = pd.DataFrame({
+        "Session_ID": ["a", "b", "c"],
+        "Timestamp": ["2026-01-01 10:00:00", "1/2/2026 10:00:00", "garbage"],
+        "Host_ID": ["h", "h", "h"], "Mode": ["Rake Game", "Time Charge", ""],
+        "Total_Buyin": ["1000", "$2,500", "x"], "My_Share": ["10.5", "", "3"], "Net_Profit": ["1", "2", "3"],
+    })
+    df, report = ingest_history(raw)
+    assert str(df["Timestamp"].dtype) == "datetime64[ns]"
+    assert df["Timestamp"].iloc[1] == pd.Timestamp("2026-01-02 10:00:00")
+    assert isinstance(df["Mode"].dtype, pd.CategoricalDtype) and pd.isna(df["Mode"].iloc[2])
+    assert df["Net_Profit"].dtype == "int32"
+    assert df["My_Share"].dtype == "float64"  # Fractional: not squeezed into float32
+    assert df["Total_Buyin"].iloc[1] == 2500
+    assert report[["Row", "Column", "Error"]].values.tolist() == [
+        [4, "Timestamp", "Not a date"], [4, "Total_Buyin", "Not a number"]]
+    assert "Notes" not in df.columns
+
+
+def test_concat_keeps_categoricals():
+    a, _ = ingest_history(pd.DataFrame({"Session_ID": ["a"], "Mode": ["Rake Game"], "My_Share": ["1"]}))
+    b, _ = ingest_history(pd.DataFrame({"Session_ID": ["b"], "Mode": ["New"], "My_Share": ["2"]}))
+    df = concat_sessions([a, b])
+    assert isinstance(df["Mode"].dtype, pd.CategoricalDtype)
+    assert set(df["Mode"].cat.categories) == {"Rake Game", "New"}
+    assert df["My_Share"].dtype == "int32"
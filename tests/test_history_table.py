@@ -0,0 +1,38 @@
+import memory_sheets
+from storage import HistoryTable, MemoryBackend
+
+
+def _record(i, host="h1"):
+    return {"Session_ID": f"s{i}", "Timestamp": f"2026-10-{i:02d} 21:00:00", "Host_ID": host,
+            "Mode": "Rake Game", "My_Share": i * 10, "Notes": ""}
+
+
+def test_each_save_is_one_append_whatever_the_history_length():
+    table = HistoryTable(memory_sheets.MemorySheetsConnection())
+    for i in range(1, 4):
+        table.append(_record(i))
+    before = memory_sheets.call_counts()
+    table.append(_record(4))
+    calls = memory_sheets.call_counts()
+    calls.subtract(before)
+    assert {op: n for (_, op), n in calls.items() if n} == {"append_rows": 1}  # append_row is a one-row append_rows
+    assert [r["Session_ID"] for r in table.rows()] == ["s1", "s2", "s3", "s4"]
+
+
+def test_a_resent_session_is_not_appended_twice():
+    backend = MemoryBackend()
+    assert backend.append_history(_record(1)) is not False
+    assert backend.append_history(_record(1), verify=True) is False
+    assert backend.append_history(_record(2), verify=True) is not False
+    assert list(backend.read_history("h1")["Session_ID"]) == ["s1", "s2"]
+
+
+def test_legacy_sheets_get_a_session_id_column():
+    conn = memory_sheets.MemorySheetsConnection()
+    ws = conn.book.add_worksheet("sessions")
+    ws.update(range_name="A1", values=[["Timestamp", "Host_ID", "My_Share"], ["2026-01-01 20:00:00", "h1", "5"]])
+    table = HistoryTable(conn, worksheet="sessions")
+    table.append(_record(1))
+    rows = table.rows()
+    assert "Session_ID" in table.columns
+    assert rows[0].get("Session_ID", "") == "" and rows[1]["Session_ID"] == "s1"
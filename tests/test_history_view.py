@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+
+from history_view import bucket_dates, downsample_curve, filter_sessions, lttb, page_sessions
+
+
+def test_lttb_keeps_the_ends_and_the_extremes():
+    x = np.arange(1000)
+    y = np.sin(x / 50.0)
+    y[437] = 25   # A spike an every-Nth sample would miss
+    y[812] = -25
+    keep = lttb(x, y, 60)
+    assert len(keep) == 60
+    assert keep[0] == 0 and keep[-1] == 999
+    assert np.all(np.diff(keep) > 0)
+    assert 437 in keep and 812 in keep
+
+
+def test_lttb_returns_everything_when_there_is_nothing_to_cut():
+    assert list(lttb([1, 2, 3], [1, 2, 3], 10)) == [0, 1, 2]
+    assert list(lttb(range(5), range(5), 2)) == [0, 1, 2, 3, 4]
+
+
+def test_downsample_curve_uses_bucket_dates():
+    buckets = pd.date_range("2020-01-01", periods=1000, freq="D").strftime("%Y-%m-%d")
+    df = pd.DataFrame({"Bucket": buckets, "Cumulative_Profit": np.cumsum(np.ones(1000))})
+    shown = downsample_curve(df, "day", max_points=100)
+    assert len(shown) == 100
+    assert shown["Bucket"].iloc[0] == "2020-01-01" and shown["Bucket"].iloc[-1] == buckets[-1]
+    assert downsample_curve(df.head(50), "day", max_points=100) is not None
+    assert list(bucket_dates("week", ["2026-W42"]).dt.strftime("%Y-%m-%d")) == ["2026-10-12"]
+    assert list(bucket_dates("month", ["2026-10"]).dt.day) == [1]
+
+
+def _sessions():
+    return pd.DataFrame({
+        "Session_ID": pd.array([f"s{i}" for i in range(7)], dtype="string"),
+        "Timestamp": pd.to_datetime(["2026-10-01 20:00", "2026-10-02 20:00", None, "2026-10-03 20:00",
+                                     "2026-10-03 23:00", "2026-10-04 20:00", "2026-10-05 20:00"]),
+        "Mode": pd.Categorical(["Rake Game", "Time Charge"] * 3 + ["Rake Game"]),
+        "My_Share": np.array([50, 10, 70, 30, 20, 60, 40], dtype="int32"),
+    })
+
+
+def test_filter_sessions():
+    df = _sessions()
+    days = filter_sessions(df, start=pd.Timestamp("2026-10-02").date(), end=pd.Timestamp("2026-10-03").date())
+    assert list(df["Session_ID"][days]) == ["s1", "s3", "s4"]  # The undated row is outside every range
+    assert list(df["Session_ID"][filter_sessions(df, modes=["Time Charge"])]) == ["s1", "s3", "s5"]
+    assert filter_sessions(df, session_ids=["s6", "s0"]).sum() == 2
+    assert filter_sessions(df).all()
+
+
+def test_page_sessions_sorts_then_pages():
+    df = _sessions()
+    mask = np.ones(len(df), dtype=bool)
+    rows, total, pages = page_sessions(df, mask, "My_Share", descending=True, page=1, page_size=3)
+    assert (total, pages) == (7, 3)
+    assert list(rows["My_Share"]) == [70, 60, 50]
+    rows, _, _ = page_sessions(df, mask, "My_Share", descending=True, page=3, page_size=3)
+    assert list(rows["My_Share"]) == [10]
+    rows, _, _ = page_sessions(df, mask, "My_Share", descending=True, page=99, page_size=3)
+    assert list(rows["My_Share"]) == [10]  # Clamped to the last page
+
+
+def test_page_sessions_by_time_and_text():
+    df = _sessions()
+    mask = filter_sessions(df, modes=["Rake Game"])
+    rows, total, _ = page_sessions(df, mask, "Timestamp", descending=False)
+    assert total == 4
+    assert list(rows["Session_ID"]) == ["s2", "s0", "s4", "s6"]  # NaT sorts first
+    rows, _, _ = page_sessions(df, mask, "Mode", descending=False)
+    assert list(rows["Mode"].astype(str)) == ["Rake Game"] * 4
+    rows, total, pages = page_sessions(df, np.zeros(len(df), dtype=bool))
+    assert rows.empty and (total, pages) == (0, 1)
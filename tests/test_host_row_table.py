@@ -0,0 +1,59 @@
+import memory_sheets
+from storage import HostRowTable
+
+COLUMNS = ["Host_ID", "Last_Update", "State_JSON", "Revision"]
+
+
+def _table():
+    conn = memory_sheets.MemorySheetsConnection()
+    return conn, HostRowTable(conn, worksheet="active_state", columns=COLUMNS)
+
+
+def _calls(conn, since):
+    calls = conn.book.api_calls.copy()
+    calls.subtract(since)
+    return {op: n for (_, op), n in calls.items() if n}
+
+
+def test_an_update_writes_only_the_hosts_row():
+    conn, table = _table()
+    for host in ("h1", "h2", "h3"):
+        table.write(host, {"Last_Update": "20:00", "State_JSON": f"{host}-v1"})
+    before = conn.book.api_calls.copy()
+    table.write("h2", {"Last_Update": "21:00", "State_JSON": "h2-v2"})
+    assert _calls(conn, before) == {"batch_update": 1}  # No read of the sheet, no full rewrite
+    rows = conn.book.worksheet("active_state").get_all_values()
+    assert rows[1:] == [["h1", "20:00", "h1-v1", ""], ["h2", "21:00", "h2-v2", ""], ["h3", "20:00", "h3-v1", ""]]
+
+
+def test_a_new_host_is_appended_and_indexed():
+    conn, table = _table()
+    table.write("h1", {"State_JSON": "a"})
+    table.write("h2", {"State_JSON": "b"})
+    before = conn.book.api_calls.copy()
+    assert table.read("h2")["State_JSON"] == "b"
+    assert _calls(conn, before) == {"row_values": 1}
+    assert table.read("nobody") is None
+
+
+def test_a_stale_index_is_rebuilt_and_the_write_retried():
+    conn, table = _table()
+    table.write("h1", {"State_JSON": "a"})
+    table.write("h2", {"State_JSON": "b"})
+    ws = conn.book.worksheet("active_state")
+    ws.rows.insert(1, ["h0", "", "edited by hand", ""])  # Shifts every row under the cached index
+    failing = ws.batch_update
+    ws.batch_update = lambda *a, **k: (_ for _ in ()).throw(RuntimeError("stale"))
+    table.write("h2", {"State_JSON": "b2"})
+    ws.batch_update = failing
+    assert [r[:3] for r in ws.get_all_values()[1:]] == [["h0", "", "edited by hand"], ["h1", "", "a"], ["h2", "", "b2"]]
+
+
+def test_the_sheets_own_columns_are_kept_and_new_ones_added():
+    conn, table = _table()
+    ws = conn.book.add_worksheet("active_state")
+    ws.update(range_name="A1", values=[["Host_ID", "Owner", "State_JSON"], ["h1", "ann", "x"]])
+    table.write("h1", {"State_JSON": "y", "State_JSON_2": "p2/2:z"})
+    header, row = ws.get_all_values()[:2]
+    assert header == ["Host_ID", "Owner", "State_JSON", "Last_Update", "Revision", "State_JSON_2"]
+    assert row == ["h1", "", "y", "", "", "p2/2:z"]
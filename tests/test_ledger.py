@@ -0,0 +1,46 @@
+import bench_core
+import ledger
+import poker_core
+from player_table import PlayerTable
+
+CHIPS = poker_core.DEFAULT_CHIP_VALUES
+
+
+def test_running_ledger_matches_the_full_recompute_through_a_night():
+    for n_players in (1, 7, 60):
+        state, _ = bench_core.synthetic_night(n_players, rounds=3, seed=n_players)
+        assert ledger.verify_ledger(state, CHIPS) == {}
+        assert bench_core.check_night(state, CHIPS) == []
+
+
+def test_each_mutation_keeps_the_ledger_in_step():
+    state = poker_core.new_session_state()
+    steps = [
+        lambda: ledger.add_player(state, CHIPS, "alice", 1000, 500),
+        lambda: ledger.add_player(state, CHIPS, "bob", 2000, 0),
+        lambda: ledger.rebuy(state, CHIPS, "alice", 300),
+        lambda: ledger.set_chip_count(state, CHIPS, "alice", "black", 15),
+        lambda: ledger.set_chip_counts(state, CHIPS, ["alice", "bob"], [[0, 4, 6, 1, 1], [2, 0, 0, 0, 2]]),
+        lambda: ledger.set_status(state, CHIPS, "bob", "paused"),
+        lambda: ledger.repay(state, CHIPS, "alice", 200),
+        lambda: ledger.add_expense(state, CHIPS, "Food", 120),
+        lambda: ledger.charge_fee(state, CHIPS, "alice", 170),
+        lambda: ledger.cash_out(state, CHIPS, "alice", 1700, 1030, 170),
+        lambda: ledger.add_player(state, CHIPS, "bob", 500, 0),  # Re-adding replaces the player
+    ]
+    for step in steps:
+        step()
+        assert ledger.verify_ledger(state, CHIPS) == {}
+
+
+def test_import_and_chip_value_changes_rebuild_the_ledger():
+    state = poker_core.new_session_state()
+    ledger.add_player(state, CHIPS, "alice", 1000, 0)
+    ledger.set_chip_count(state, CHIPS, "alice", "black", 10)
+    doubled = {k: v * 2 for k, v in CHIPS.items()}
+    assert ledger.get_ledger(state, doubled).chips_on_table == 2000
+    table = PlayerTable.from_arrays(["x", "y"], CHIPS, status="out", cash_in=[100.0, 200.0],
+                                    final_stack=[50.0, 250.0], final_payout=[50.0, 250.0], final_fee=[0.0, 0.0])
+    ledger.import_players(state, CHIPS, table)
+    assert ledger.get_ledger(state, CHIPS).total_inflow == 300
+    assert ledger.verify_ledger(state, CHIPS) == {}
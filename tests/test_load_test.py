@@ -0,0 +1,19 @@
+import time
+
+import load_test
+import memory_sheets
+
+
+def test_api_calls_are_counted_after_the_sync_workers_drain(tmp_path):
+    # A tight write quota keeps the workers waiting (and silent) long after the last click
+    args = load_test.parse_args([
+        "--hosts", "2", "--players", "2", "--rounds", "1", "--latency-ms", "2", "--jitter-ms", "1",
+        "--debounce", "0.3", "--host-write-per-min", "20", "--workdir", str(tmp_path),
+    ])
+    report = load_test.run_load(args)
+    at_report = sum(memory_sheets.call_counts().values())
+    assert report["drained"]
+    assert not report["errors"]
+    time.sleep(4)  # Longer than one token of that quota
+    assert sum(memory_sheets.call_counts().values()) == at_report  # Nothing was left to mirror
+    assert report["api_calls"]["writes"] > 0
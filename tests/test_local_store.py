@@ -0,0 +1,46 @@
+import pytest
+
+from local_store import LocalStore
+from session_events import RevisionConflict
+
+
+def _events(first, n):
+    return [(seq, f'{{"seq": {seq}}}') for seq in range(first, first + n)]
+
+
+@pytest.fixture
+def store(tmp_path):
+    return LocalStore(str(tmp_path / "store.db"))
+
+
+def test_commit_events_advances_the_head(store):
+    store.commit_events("h1", 0, _events(1, 3))
+    assert store.head("h1") == 3
+    store.commit_events("h1", 3, _events(4, 2), checkpoint=("20:00", "state@5"))
+    assert store.head("h1") == 5
+    assert store.load_snapshot("h1")["seq"] == 5
+    assert store.checkpoint_at("h1", 9) == (5, "state@5")
+    assert [seq for seq, _ in store.unsynced_events("h1")] == [1, 2, 3, 4, 5]
+
+
+def test_a_commit_on_a_stale_head_raises_and_writes_nothing(store):
+    store.commit_events("h1", 0, _events(1, 2))
+    store.commit_events("h1", 2, _events(3, 1))  # Another device got there first
+    with pytest.raises(RevisionConflict) as conflict:
+        store.commit_events("h1", 2, _events(3, 2), checkpoint=("21:00", "mine"), segments=[("log", 0, "[]")])
+    assert (conflict.value.base_seq, conflict.value.head_seq) == (2, 3)
+    assert store.head("h1") == 3
+    assert len(store.events("h1")) == 3
+    assert store.log_segments("h1", "log") == []
+    assert store.load_snapshot("h1")["state_json"] is None
+
+
+def test_a_wipe_is_a_revision_too(store):
+    store.commit_events("h1", 0, _events(1, 2), checkpoint=("20:00", "state@2"))
+    head = store.wipe_snapshot("h1", "22:00")
+    assert head == 3
+    assert store.events("h1") == []
+    with pytest.raises(RevisionConflict):
+        store.commit_events("h1", 2, _events(3, 1))  # A device still on the wiped session
+    store.commit_events("h1", 3, _events(4, 1))
+    assert store.unsynced_counts() == {"snapshots": 1, "events": 1, "sessions": 0}
@@ -0,0 +1,62 @@
+import io
+
+import pandas as pd
+
+from player_import import build_players, read_import, validate_import
+
+
+def _csv(text):
+    return read_import(io.StringIO(text))
+
+
+def test_clean_file_builds_cashed_out_players():
+    raw = _csv('Name,Buy-in,Final Stack,Payout,Fee Paid\n alice ,"$1,000",1500,1330,170\nbob,2000,0,0,\n')
+    typed, report = validate_import(raw)
+    assert report.empty
+    assert list(typed["Name"]) == ["alice", "bob"]
+    assert list(typed["cash_in"]) == [1000.0, 2000.0]
+    assert list(typed["final_fee"]) == [170.0, 0.0]  # Blank optional cell -> default
+    players = build_players(typed, {"white": 5})
+    assert len(players) == 2
+    assert players["alice"]["status"] == "out"
+    assert players["alice"]["final_payout"] == 1330
+
+
+def test_fee_column_is_optional():
+    typed, report = validate_import(_csv("Name,Buy-in,Final Stack,Payout\nalice,100,100,100\n"))
+    assert report.empty
+    assert list(typed["final_fee"]) == [0.0]
+
+
+def test_missing_columns_stop_the_import():
+    typed, report = validate_import(_csv("Name,Buy-in\nalice,100\n"))
+    assert typed is None
+    assert list(report["Column"]) == ["Final Stack", "Payout"]
+    assert set(report["Row"]) == {1}
+
+
+def test_every_bad_cell_is_reported_with_its_csv_line():
+    raw = _csv("Name,Buy-in,Final Stack,Payout\n"
+               "alice,100,abc,100\n"
+               ",100,100,100\n"
+               "alice,-5,100,\n")
+    _, report = validate_import(raw)
+    found = set(zip(report["Row"], report["Column"], report["Error"]))
+    assert found == {
+        (2, "Final Stack", "Not a number"),
+        (3, "Name", "Missing name"),
+        (4, "Name", "Duplicate name"),
+        (4, "Buy-in", "Negative amount"),
+        (4, "Payout", "Missing value"),
+    }
+    assert list(report["Row"]) == sorted(report["Row"])
+
+
+def test_cells_are_read_as_text():
+    raw = _csv("Name,Buy-in,Final Stack,Payout\n007,1e3,NA,100\n")
+    assert all(pd.api.types.is_string_dtype(t) for t in raw.dtypes)
+    assert raw.loc[0, "Name"] == "007" and raw.loc[0, "Final Stack"] == "NA"
+    typed, report = validate_import(raw)
+    assert typed.loc[0, "cash_in"] == 1000.0
+    assert list(report["Value"]) == ["NA"]
+    assert isinstance(report, pd.DataFrame)
@@ -0,0 +1,59 @@
+import json
+
+import numpy as np
+import pytest
+
+import poker_core
+from player_table import PlayerTable
+
+CHIPS = poker_core.DEFAULT_CHIP_VALUES
+
+
+def _table():
+    table = PlayerTable(CHIPS)
+    table.add("alice", 1000, 500)
+    table.add("bob", 2000)
+    table.add("carol", 500)
+    table["alice"]["chip_counts"]["black"] = 12
+    table["bob"]["chip_counts"]["yellow"] = 2
+    table["bob"]["status"] = "paused"
+    row = table["carol"]
+    row["status"], row["final_stack"], row["final_payout"], row["final_fee"] = "out", 700, 530, 170
+    return table
+
+
+def test_snapshot_round_trip_through_json():
+    table = _table()
+    restored = PlayerTable.from_snapshot(json.loads(json.dumps(table.to_snapshot())))
+    assert restored.to_dict() == table.to_dict()
+    assert list(restored) == ["alice", "bob", "carol"]
+    assert restored.totals(CHIPS) == table.totals(CHIPS)
+
+
+def test_legacy_players_dict_still_loads():
+    table = _table()
+    restored = PlayerTable.from_snapshot(table.to_dict(), CHIPS)
+    assert restored.to_dict() == table.to_dict()
+    assert PlayerTable.from_snapshot(None, CHIPS).to_dict() == {}
+
+
+def test_restore_adds_denominations_the_snapshot_lacks():
+    table = PlayerTable(["white"])
+    table.add("alice", 100)
+    restored = PlayerTable.from_snapshot(table.to_snapshot(), CHIPS)
+    assert restored.denoms == list(CHIPS)
+    assert restored["alice"]["chip_counts"]["yellow"] == 0
+
+
+def test_stacks_and_totals_are_vectorized_over_the_rows():
+    table = _table()
+    assert list(table.stacks(CHIPS)) == [1200, 2000, 0]
+    assert table.totals(CHIPS) == {
+        "total_inflow": 4000, "chips_on_table": 3200, "total_final_stacks": 700,
+        "total_fees_in_rake": 170, "total_payout": 530,
+    }
+
+
+def test_from_arrays_rejects_duplicate_names():
+    with pytest.raises(ValueError):
+        PlayerTable.from_arrays(["a", "a"], CHIPS, cash_in=np.zeros(2))
@@ -0,0 +1,31 @@
+import numpy as np
+
+import poker_core
+
+
+def test_cashout_projection_clamps_fee_and_repays_credit_first():
+    assert poker_core.cashout_projection(100, 0, fee=170, deduct_fee=True)["cash_payout"] == 0
+    proj = poker_core.cashout_projection(1000, 300, fee=170, deduct_fee=True)
+    assert proj == {"payout_stack": 830, "debt_cleared": 300, "cash_payout": 530, "remaining_debt": 0}
+    assert poker_core.cashout_projection(200, 500)["remaining_debt"] == 300
+
+
+def test_count_grid_payouts_match_the_player_cards():
+    # The grid computes every row at once with cashout_projections(); each must equal the card's number
+    rng = np.random.default_rng(0)
+    stacks = rng.integers(0, 3000, 200).astype(float)
+    credit = rng.choice([0, 0, 500, 2000], 200).astype(float)
+    fees = rng.choice([0, 170, 500], 200).astype(float)
+    deduct = rng.random(200) < 0.5
+    grid = poker_core.cashout_projections(stacks, credit, fees, deduct)
+    for i in range(200):
+        card = poker_core.cashout_projection(stacks[i], credit[i], fees[i], bool(deduct[i]))
+        for key, value in card.items():
+            assert grid[key][i] == value
+    assert (grid["cash_payout"] >= 0).all()
+
+
+def test_host_share_and_audit():
+    assert poker_core.host_share(1000, poker_core.RAKE_GAME, 60) == 600
+    assert poker_core.host_share(1000, "Time Charge", 60) == 1000
+    assert poker_core.audit_discrepancy(1000, 0, 900, 150, 50, 0) == 0
@@ -0,0 +1,55 @@
+import pandas as pd
+
+from local_store import LocalStore
+from rollups import Rollups, session_buckets
+
+
+def _session(timestamp, share, mode="Time Charge"):
+    return {"Timestamp": timestamp, "Mode": mode, "My_Share": share, "Net_Profit": share}
+
+
+def test_undated_sessions_only_count_in_the_lifetime_totals(tmp_path):
+    rollups = Rollups(LocalStore(str(tmp_path / "store.db")))
+    rollups.rebuild("h1", [
+        _session("2026-10-01 21:00:00", 100),
+        _session(pd.NaT, 50),
+        _session("not a date", 25),
+        _session("2026-10-03 21:00:00", 200),
+    ])
+    assert session_buckets(pd.NaT) == [("all", "all")]
+    assert rollups.totals("h1")["sessions"] == 4
+    assert rollups.undated("h1") == 2
+    series = rollups.series("h1", "day")
+    assert list(series["Bucket"]) == ["2026-10-01", "2026-10-03"]
+    assert list(series["Cumulative_Profit"]) == [100, 300]
+    assert rollups.day_span("h1")[1].isoformat() == "2026-10-03"
+
+    rollups.apply("h1", _session("", 10))
+    assert rollups.undated("h1") == 3
+
+
+def test_apply_matches_rebuild(tmp_path):
+    sessions = [_session(f"2026-{m:02d}-{d:02d} 20:00:00", m * d, mode) for m, d, mode in
+                [(9, 30, "Rake"), (10, 2, "Time Charge"), (9, 1, "Rake"), (10, 2, "Rake")]]
+    incremental = Rollups(LocalStore(str(tmp_path / "a.db")))
+    incremental.rebuild("h1", [])
+    for session in sessions:
+        incremental.apply("h1", session)
+    rebuilt = Rollups(LocalStore(str(tmp_path / "b.db")))
+    rebuilt.rebuild("h1", sessions)
+    for grain in ["day", "week", "month"]:
+        pd.testing.assert_frame_equal(incremental.series("h1", grain), rebuilt.series("h1", grain))
+    assert incremental.totals("h1") == rebuilt.totals("h1")
+
+
+def test_a_session_is_counted_once_however_it_arrives(tmp_path):
+    rollups = Rollups(LocalStore(str(tmp_path / "store.db")))
+    first = {**_session("2026-10-01 21:00:00", 100), "Session_ID": "a"}
+    rollups.rebuild("h1", [first])
+    saved = {**_session("2026-10-02 21:00:00", 40), "Session_ID": "b"}
+    assert rollups.apply("h1", saved) == 1
+    # The history sync brings back the session saved here, plus one another server saved
+    synced = [saved, {**_session("2026-10-02 22:00:00", 60), "Session_ID": "c"}]
+    assert rollups.apply_all("h1", synced) == 1
+    assert rollups.totals("h1")["sessions"] == 3
+    assert rollups.totals("h1")["my_share"] == 200
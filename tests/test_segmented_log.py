@@ -0,0 +1,58 @@
+import json
+
+from segmented_log import SegmentedLog
+
+
+def _log(n, segment_size=10):
+    log = SegmentedLog(segment_size)
+    for i in range(n):
+        log.append({"Item": f"e{i}", "Amount": i, "Paid": True})
+    return log
+
+
+def test_the_older_segment_is_sealed_once_the_tail_holds_two():
+    log = _log(19)
+    assert (log.sealed, len(log.tail)) == (0, 19)
+    log.append({"Item": "e19", "Amount": 19})
+    assert (log.sealed, len(log.tail)) == (10, 10)
+    assert len(log) == 20
+    assert [n for n, _ in log.unarchived] == [0]
+    assert log.tail[0]["Item"] == "e10"
+
+
+def test_sealed_entries_still_count_in_total():
+    log = _log(45)
+    assert log.sealed == 30
+    assert log.total("Amount") == sum(range(45))
+    assert "Paid" not in log.sealed_sums  # Booleans aren't summed
+    assert log.total("Missing") == 0
+
+
+def test_archived_segments_come_back_through_the_loader():
+    log = _log(45)
+    archive = {n: seg for n, seg in log.unarchived}
+    log.mark_archived(2)
+    assert [n for n, _ in log.unarchived] == [2]
+    entries = log.entries(lambda: [e for n in sorted(archive) for e in archive[n]])
+    assert [e["Item"] for e in entries] == [f"e{i}" for i in range(45)]
+    assert len(log.entries()) == len(log.tail)
+
+
+def test_snapshot_keeps_the_tail_and_the_sealed_sums():
+    log = _log(45)
+    restored = SegmentedLog.from_snapshot(json.loads(json.dumps(log.to_snapshot())))
+    assert len(restored) == 45 and restored.total("Amount") == log.total("Amount")
+    assert restored.tail == log.tail and restored.unarchived == []
+    legacy = SegmentedLog.from_snapshot([{"Amount": 1}] * 25, segment_size=10)
+    assert (legacy.sealed, len(legacy.tail), legacy.total("Amount")) == (10, 15, 25)
+
+
+def test_the_view_follows_appends_and_seals():
+    log = _log(15)
+    assert list(log.view()["Item"][:2]) == ["e14", "e13"]
+    for i in range(15, 22):
+        log.append({"Item": f"e{i}", "Amount": i})
+    newest = log.view()
+    assert len(newest) == len(log.tail) == 12
+    assert newest["Item"].iloc[0] == "e21" and newest["Item"].iloc[-1] == "e10"
+    assert list(log.view(newest_first=False)["Item"][:1]) == ["e10"]
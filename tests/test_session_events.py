@@ -0,0 +1,100 @@
+import pytest
+
+import ledger
+import poker_core
+import session_events
+
+CHIPS = poker_core.DEFAULT_CHIP_VALUES
+
+
+def _checkpoint():
+    """The state both devices start from"""
+    state = poker_core.new_session_state()
+    ledger.add_player(state, CHIPS, "alice", 1000, 0)
+    ledger.add_player(state, CHIPS, "bob", 2000, 500)
+    return state
+
+
+def _commit(mutate):
+    """(events one device recorded on top of the checkpoint)"""
+    state = _checkpoint()
+    n = len(state['events'])
+    mutate(state)
+    return state['events'][n:]
+
+
+def _merge(theirs, ours):
+    """Their events applied first, then ours rebased: (state, dropped)"""
+    state = _checkpoint()
+    session_events.replay(state, CHIPS, theirs)
+    return state, session_events.rebase(state, CHIPS, theirs, ours)
+
+
+def test_record_rejects_the_wrong_fields():
+    with pytest.raises(ValueError):
+        session_events.record(poker_core.new_session_state(), "rebuy", name="alice")
+
+
+def test_replay_rebuilds_the_session_and_skips_events_it_already_has():
+    original = _checkpoint()
+    ledger.rebuy(original, CHIPS, "alice", 500)
+    ledger.set_chip_count(original, CHIPS, "bob", "black", 12)
+    rebuilt = poker_core.new_session_state()
+    assert session_events.replay(rebuilt, CHIPS, original['events']) == 4
+    assert session_events.replay(rebuilt, CHIPS, original['events']) == 0
+    assert rebuilt['players']["alice"]['cash_in'] == 1500
+    assert rebuilt['players']["bob"]['chip_counts']["black"] == 12
+    assert rebuilt['event_seq'] == original['event_seq']
+
+
+def test_rebase_keeps_commuting_deltas():
+    theirs = _commit(lambda s: ledger.rebuy(s, CHIPS, "alice", 500))
+    ours = _commit(lambda s: (ledger.rebuy(s, CHIPS, "alice", 200), ledger.add_expense(s, CHIPS, "Food", 80)))
+    state, dropped = _merge(theirs, ours)
+    assert dropped == []
+    assert state['players']["alice"]['cash_in'] == 1700
+    assert state['expenses_log'].total('Amount') == 80
+    # Ours were recorded again after theirs
+    assert [e["seq"] for e in state['events'][-2:]] == [theirs[-1]["seq"] + 1, theirs[-1]["seq"] + 2]
+    assert not ledger.verify_ledger(state, CHIPS)
+
+
+def test_rebase_drops_an_overwrite_of_the_same_key():
+    theirs = _commit(lambda s: ledger.set_chip_count(s, CHIPS, "alice", "red", 10))
+    ours = _commit(lambda s: (ledger.set_chip_count(s, CHIPS, "alice", "red", 30),
+                              ledger.set_chip_count(s, CHIPS, "bob", "red", 4)))
+    state, dropped = _merge(theirs, ours)
+    assert [(e["name"], e["count"]) for e in dropped] == [("alice", 30)]
+    assert state['players']["alice"]['chip_counts']["red"] == 10  # Theirs stands
+    assert state['players']["bob"]['chip_counts']["red"] == 4
+
+
+def test_rebase_drops_everything_after_an_import():
+    table = _checkpoint()['players']
+    theirs = _commit(lambda s: ledger.import_players(s, CHIPS, table))
+    ours = _commit(lambda s: ledger.rebuy(s, CHIPS, "bob", 100))
+    _, dropped = _merge(theirs, ours)
+    assert [e["type"] for e in dropped] == ["rebuy"]
+
+
+def test_rebase_drops_events_that_no_longer_apply():
+    ours = _commit(lambda s: (ledger.add_player(s, CHIPS, "carol", 500, 0), ledger.rebuy(s, CHIPS, "carol", 100)))
+    state = _checkpoint()
+    n = len(state['events'])
+    dropped = session_events.rebase(state, CHIPS, [], ours[1:])  # carol was never added here
+    assert [e["type"] for e in dropped] == ["rebuy"]
+    assert len(state['events']) == n and state['event_seq'] == n
+
+
+def test_expense_entries_rebuild_sealed_expenses_from_the_events():
+    state = poker_core.new_session_state()
+    for n in range(250):
+        ledger.add_expense(state, CHIPS, f"item{n}", n)
+    log = state['expenses_log']
+    assert log.sealed and len(log.tail) < len(log)
+
+    # A cloud copy overlapping the local one still yields one entry per event
+    events = state['events'] + state['events'][200:]
+    entries = session_events.expense_entries(events)
+    assert [(x["Item"], x["Amount"]) for x in entries] == [(f"item{n}", n) for n in range(250)]
+    assert entries[-len(log.tail):] == log.tail
@@ -0,0 +1,47 @@
+from session_hub import SessionHub
+
+
+def _events(first, last):
+    return [{"seq": seq, "type": "rebuy"} for seq in range(first, last + 1)]
+
+
+def test_since_returns_the_events_after_seq():
+    hub = SessionHub()
+    hub.publish("h1", _events(1, 3), 3)
+    hub.publish("h1", _events(4, 5), 5)
+    assert [e["seq"] for e in hub.since("h1", 2)] == [3, 4, 5]
+    assert hub.since("h1", 5) == []
+    assert hub.since("nobody", 0) == []
+
+
+def test_since_reports_a_gap_instead_of_skipping_events():
+    hub = SessionHub(backlog=3)
+    hub.publish("h1", _events(1, 5), 5)
+    assert hub.since("h1", 1) is None  # Events 2 and 3 fell out of the backlog
+    assert [e["seq"] for e in hub.since("h1", 2)] == [3, 4, 5]
+
+
+def test_a_run_that_does_not_follow_on_is_a_gap():
+    hub = SessionHub()
+    hub.publish("h1", _events(1, 2), 2)
+    hub.publish("h1", _events(6, 7), 7)  # 3-5 were committed by a session that never published
+    assert hub.since("h1", 2) is None
+    assert [e["seq"] for e in hub.since("h1", 6)] == [7]
+
+
+def test_a_wipe_makes_every_older_reader_reload():
+    hub = SessionHub()
+    hub.publish("h1", _events(1, 4), 4)
+    hub.publish("h1", [], 5)
+    assert hub.since("h1", 4) is None
+    assert hub.since("h1", 5) == []
+
+
+def test_publishers_are_not_notified_of_their_own_events():
+    hub = SessionHub()
+    mine, theirs = hub.subscribe("h1", "a"), hub.subscribe("h1", "b")
+    hub.publish("h1", _events(1, 1), 1, source="a")
+    assert not mine.changed.is_set() and theirs.changed.is_set()
+    assert hub.subscribers("h1") == 2 and hub.is_live("h1")
+    hub.unsubscribe("h1", "b")
+    assert hub.subscribers("h1") == 1
@@ -0,0 +1,83 @@
+import threading
+import time
+
+import pytest
+
+from memory_sheets import QuotaExceededError
+from sheets_quota import QuotaGate, TokenBucket, WriteBatcher
+
+
+def test_token_bucket_hands_out_its_burst_then_paces():
+    bucket = TokenBucket(60, burst=2)  # One token a second
+    assert bucket.take() == 0 and bucket.take() == 0
+    assert 0.9 < bucket.take() <= 1.0
+
+
+def test_a_host_over_its_share_waits_but_others_do_not():
+    gate = QuotaGate(read_per_min=600, host_read_per_min=120)  # Host burst: 30 tokens, then one per 0.5 s
+    with gate.host("busy"):
+        for _ in range(30):
+            gate.acquire("read")
+        started = time.monotonic()
+        gate.acquire("read")
+        assert time.monotonic() - started >= 0.4
+    started = time.monotonic()
+    with gate.host("quiet"):
+        gate.acquire("read")
+    assert time.monotonic() - started < 0.1
+    assert gate.snapshot()["throttled"] == 1
+
+
+def test_quota_errors_are_retried_and_others_raised():
+    gate = QuotaGate(base_delay=0.001, max_retries=2)
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise QuotaExceededError("429: Quota exceeded for write requests per minute")
+        return "ok"
+
+    assert gate.call("write", flaky) == "ok"
+    assert gate.retried == 2
+    with pytest.raises(ValueError):
+        gate.call("write", lambda: (_ for _ in ()).throw(ValueError("bad range")))
+
+    def always():
+        raise QuotaExceededError("429: Quota exceeded for write requests per minute")
+
+    with pytest.raises(QuotaExceededError):
+        gate.call("write", always)  # Given up after max_retries
+    assert gate.dropped == 1
+
+
+class Sheet:
+    def __init__(self):
+        self.calls = []
+
+    def batch_update(self, data, raw=True):
+        self.calls.append(data)
+
+
+def test_concurrent_row_updates_share_one_batch_update():
+    sheet = Sheet()
+    gate = QuotaGate(batch_window=0.1)
+    batcher = WriteBatcher(lambda: sheet, gate)
+    threads = [threading.Thread(target=batcher.update, args=(f"A{row}:C{row}", [[row]])) for row in range(2, 7)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(sheet.calls) == 1
+    assert sorted(item["range"] for item in sheet.calls[0]) == [f"A{row}:C{row}" for row in range(2, 7)]
+    assert gate.batched == 4
+
+
+def test_a_failed_batch_fails_every_caller():
+    class Down:
+        def batch_update(self, data, raw=True):
+            raise ConnectionError("offline")
+
+    batcher = WriteBatcher(lambda: Down(), QuotaGate(batch_window=0))
+    with pytest.raises(ConnectionError):
+        batcher.update("A2:C2", [[1]])
@@ -0,0 +1,63 @@
+import json
+import zlib
+
+import pytest
+
+import snapshot_codec
+from snapshot_codec import SnapshotError, decode, encode, join_cells, split_cells
+
+
+def _payload(n=20):
+    return {"players": {f"P{i}": {"cash_in": i * 100, "note": "閒家" * i} for i in range(n)}, "income_rake": 300}
+
+
+def test_encode_decode_round_trip():
+    payload = _payload()
+    text = encode(payload)
+    assert text.startswith(f"pcs{snapshot_codec.CODEC_VERSION}:")
+    assert decode(text) == payload
+    assert len(text) < len(json.dumps(payload))
+
+
+def test_legacy_plain_json_still_decodes():
+    assert decode(json.dumps(_payload(3))) == _payload(3)
+
+
+def test_damaged_snapshots_raise_snapshot_error():
+    text = encode(_payload())
+    with pytest.raises(SnapshotError, match="checksum"):
+        decode(text[:5] + ("0" if text[5] != "0" else "1") + text[6:])
+    with pytest.raises(SnapshotError, match="corrupted"):
+        decode(text[:-10])
+    with pytest.raises(SnapshotError, match="newer"):
+        decode(text.replace("pcs2:", "pcs9:", 1))
+    with pytest.raises(SnapshotError):
+        decode("not a snapshot")
+
+
+def test_split_and_join_cells():
+    text = encode(_payload(400)) * 3  # Incompressible enough to need several cells at this limit
+    cells = split_cells(text, limit=1000)
+    assert len(cells) > 2
+    assert list(cells)[:3] == ["State_JSON", "State_JSON_2", "State_JSON_3"]
+    assert all(len(c) <= 1000 for c in cells.values())
+    assert join_cells(cells) == text
+    assert split_cells("short") == {"State_JSON": "short"}
+    assert join_cells({"State_JSON": "short", "State_JSON_2": float("nan")}) == "short"
+
+
+def test_missing_or_shuffled_cells_are_detected():
+    cells = split_cells(encode(_payload(400)) * 3, limit=1000)
+    last = f"State_JSON_{len(cells)}"
+    with pytest.raises(SnapshotError, match="truncated"):
+        join_cells({k: v for k, v in cells.items() if k != last})
+    swapped = dict(cells, State_JSON_2=cells["State_JSON_3"], State_JSON_3=cells["State_JSON_2"])
+    with pytest.raises(SnapshotError, match="out of sequence"):
+        join_cells(swapped)
+
+
+def test_chunked_snapshot_decodes_after_the_round_trip():
+    payload = _payload(2000)
+    text = encode(payload)
+    assert decode(join_cells(split_cells(text, limit=500))) == payload
+    assert zlib.crc32(json.dumps(payload, separators=(",", ":")).encode()) == int(text.split(":")[1], 16)
@@ -0,0 +1,58 @@
+import pytest
+
+from session_events import RevisionConflict
+from storage import GSheetsBackend, MemoryBackend
+
+
+def _snapshot(revision, state='{"players": {}}'):
+    return {"Last_Update": "2026-10-17 20:00:00", "State_JSON": state, "Revision": revision}
+
+
+def test_pushes_check_the_revision_cell_instead_of_rereading_the_row():
+    backend = MemoryBackend()
+    rows, cells = [], []
+    read, read_cell = backend.table.read, backend.table.read_cell
+    backend.table.read = lambda host_id: rows.append(host_id) or read(host_id)
+    backend.table.read_cell = lambda host_id, column: cells.append(column) or read_cell(host_id, column)
+
+    for revision in (1, 2, 3):
+        backend.write_snapshot("h1", _snapshot(revision))
+    assert rows == []
+    assert cells == ["Revision"] * 3
+    with pytest.raises(RevisionConflict):
+        backend.write_snapshot("h1", _snapshot(2))
+    assert backend.read_snapshot("h1")["Revision"] == 3
+
+
+def test_a_newer_checkpoint_from_another_server_is_not_overwritten():
+    backend = MemoryBackend()
+    other = GSheetsBackend(backend._raw_conn)  # A second server on the same sheet
+    other.write_snapshot("h1", _snapshot(5))
+    backend.write_snapshot("h1", _snapshot(6))
+    with pytest.raises(RevisionConflict):
+        other.write_snapshot("h1", _snapshot(5))  # Still at its own last push; the sheet is at 6
+    other.write_snapshot("h1", _snapshot(7))
+    assert backend.read_snapshot("h1")["Revision"] == 7
+
+
+def test_clear_snapshot_keeps_the_wipe_revision():
+    backend = MemoryBackend()
+    backend.write_snapshot("h1", _snapshot(7, "x" * 60000))
+    backend.clear_snapshot("h1", 8)
+    assert backend.read_snapshot("h1") is None
+    row = backend.table.read("h1")
+    assert int(float(row["Revision"])) == 8
+    assert not any(row.get(c) for c in row if c.startswith("State_JSON"))
+    with pytest.raises(RevisionConflict):
+        backend.write_snapshot("h1", _snapshot(7))  # A checkpoint of the wiped session
+    backend.write_snapshot("h1", _snapshot(9))
+    assert backend.read_snapshot("h1")["Revision"] == 9
+
+
+def test_read_events_returns_seq_pairs_once_per_seq():
+    backend = MemoryBackend()
+    events = [(seq, f'{{"seq": {seq}, "type": "rebuy"}}') for seq in (1, 2, 3)]
+    backend.append_events("h1", events)
+    backend.append_events("h1", events[1:])  # A retried upload
+    assert backend.read_events("h1") == events
+    assert backend.read_events("h1", after=2) == events[2:]
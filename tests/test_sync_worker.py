@@ -0,0 +1,69 @@
+import threading
+import time
+
+from sync_worker import STATUS_FAILED, STATUS_PENDING, STATUS_SYNCED, SyncWorker
+
+
+class Recorder:
+    def __init__(self, fail=0):
+        self.pushes = []
+        self.fail = fail
+        self.pushed = threading.Event()
+
+    def __call__(self, host_id, job):
+        if self.fail:
+            self.fail -= 1
+            raise ConnectionError("offline")
+        self.pushes.append((host_id, job, time.monotonic()))
+        self.pushed.set()
+
+
+def _wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return predicate()
+
+
+def test_a_burst_of_notifies_is_one_push_of_the_latest_job():
+    push = Recorder()
+    worker = SyncWorker("h1", push, debounce=0.2)
+    started = time.monotonic()
+    for job in ("rebuy", "rebuy", "chips"):
+        worker.notify(job)
+    assert worker.status == STATUS_PENDING
+    assert push.pushed.wait(5)
+    assert _wait_for(lambda: worker.status == STATUS_SYNCED)
+    assert [(h, j) for h, j, _ in push.pushes] == [("h1", "chips")]
+    assert push.pushes[0][2] - started >= 0.2  # Waited out the debounce window
+
+
+def test_flush_pushes_without_waiting_for_the_debounce():
+    push = Recorder()
+    worker = SyncWorker("h1", push, debounce=30)
+    worker.notify("save")
+    started = time.monotonic()
+    assert worker.flush(timeout=5)
+    assert time.monotonic() - started < 5
+    assert [j for _, j, _ in push.pushes] == ["save"]
+
+
+def test_a_failed_push_is_kept_and_retried():
+    push = Recorder(fail=1)
+    worker = SyncWorker("h1", push, debounce=0.05, retry_interval=0.2)
+    worker.notify("state")
+    assert _wait_for(lambda: worker.status == STATUS_FAILED)
+    assert worker.last_error == "offline"
+    assert _wait_for(lambda: worker.status == STATUS_SYNCED)
+    assert [j for _, j, _ in push.pushes] == ["state"]
+    assert worker.last_error is None
+
+
+def test_a_newer_job_replaces_the_failed_one():
+    push = Recorder(fail=1)
+    worker = SyncWorker("h1", push, debounce=0.05, retry_interval=0.3)
+    worker.notify("old")
+    assert _wait_for(lambda: worker.status == STATUS_FAILED)
+    worker.notify("new")
+    assert _wait_for(lambda: worker.status == STATUS_SYNCED)
+    assert [j for _, j, _ in push.pushes] == ["new"]
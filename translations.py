@@ -0,0 +1,146 @@
+# --- Translations ---
+# UI strings per language. Kept in a module so they are built once per
+# process instead of on every rerun (V8.0).
+
+TRANSLATIONS = {
+    "English": {
+        "nav_header": "Navigation",
+        "nav_home": "♠️ Active Session",
+        "nav_analytics": "📊 Analytics Dashboard",
+        "gamemode_header": "Game Mode",
+        "mode_time": "Time Charge (Venue Fee)",
+        "mode_rake": "Rake Game (Profit Share)",
+        "sidebar_header": "🔧 Chip Config",
+        "app_title": "🃏 Poker Host CRM v5.5",
+        "live_header": "🎲 Active Players",
+        "paused_header": "🟡 Paused / Sit Out",
+        "view_cards": "🃏 Player Cards",
+        "view_grid": "🧮 Count Grid",
+        "grid_commit": "✅ Commit Counts",
+        "grid_player": "Player Actions",
+        "grid_hint": "Payout = stack minus outstanding credit, before venue fee (negative = player owes).",
+        "history_header": "⚫ Cashed Out History",
+        "rebuy": "Re-buy",
+        "sit_out": "Sit Out", 
+        "return_seat": "Return",
+        "cashout": "Cash Out",
+        "fee": "Venue Fee",
+        "fee_deduct": "Deduct Stack",
+        "fee_cash": "Paid Cash",
+        "summary": "📊 Session Summary",
+        "save_session": "💾 Save Session to Cloud",
+        "saved": "Session Saved to GSheets!",
+        "analytics_title": "📈 Profit Analytics",
+        "kpi_lifetime": "Lifetime Profit",
+        "kpi_sessions": "Total Sessions",
+        "kpi_avg": "Avg Profit/Session",
+        "chip_white": "White", "chip_red": "Red", "chip_black": "Black", "chip_purple": "Purple", "chip_yellow": "Yellow",
+        "tab_expenses": "💸 Expenses",
+        "tab_income": "💰 Income & Risk",
+        "lbl_item": "Item Name",
+        "lbl_amount": "Amount",
+        "btn_add_exp": "Add Expense",
+        "lbl_rake": "Rake Collection",
+        "btn_add_rake": "Add Rake",
+        "lbl_ins": "Insurance / Risk",
+        "btn_add_ins": "Add Amount",
+        "total_rake": "Total Rake",
+        "total_ins": "Total Insurance",
+        "total_exp": "Total Expenses",
+        "gross_income": "Gross Income",
+        "net_profit": "Net Profit",
+        "my_share": "My Share",
+        "partner_share": "Partner Share",
+        "pct_share": "Host Share %",
+        "notes": "Session Notes",
+        "reset": "Reset All Data",
+        "confirm_out": "Confirm & Out",
+        "still_owes": "Still Owes",
+        "ins_calc": "🧮 Insurance Calculator",
+        "ins_bet": "Bet Amount",
+        "ins_outs": "Outs (1-20)",
+        "ins_odds": "Odds",
+        "ins_payout": "Potential Payout",
+        "btn_win": "✅ House Win (Keep Bet)",
+        "btn_loss": "❌ House Loss (Pay Out)",
+        "log_rake": "📜 Rake History",
+        "log_ins": "📉 Insurance History",
+        "pay_player": "🟢 Pay Player",
+        "player_owes": "🔴 Player Owes",
+        "audit_ok": "✅ System Balanced",
+        "audit_short": "🔴 SHORTAGE DETECTED",
+        "audit_surplus": "🟡 SURPLUS DETECTED",
+        "repay": "💰 Repay",
+        "btn_repay": "Confirm Repay"
+    },
+    "繁體中文": {
+        "nav_header": "功能導覽",
+        "nav_home": "♠️ 當前牌局",
+        "nav_analytics": "📊 數據中心",
+        "gamemode_header": "經營模式",
+        "mode_time": "計時局 (收清潔費)",
+        "mode_rake": "抽水局 (股東分潤)",
+        "sidebar_header": "🔧 籌碼設定",
+        "app_title": "🃏 撲克局務管理 v5.5",
+        "live_header": "🎲 在桌玩家",
+        "paused_header": "🟡 暫離 / Sit Out",
+        "view_cards": "🃏 玩家卡片",
+        "view_grid": "🧮 籌碼表格",
+        "grid_commit": "✅ 確認籌碼",
+        "grid_player": "玩家操作",
+        "grid_hint": "應付 = 籌碼 - 未還借款 (未扣場地費，負數 = 玩家欠款)",
+        "history_header": "⚫ 已離桌記錄",
+        "rebuy": "加買",
+        "sit_out": "暫離",
+        "return_seat": "回桌",
+        "cashout": "結算離桌",
+        "fee": "清潔費",
+        "fee_deduct": "籌碼扣除",
+        "fee_cash": "另外付現",
+        "summary": "📊 結算總表",
+        "save_session": "💾 保存牌局記錄 (雲端)",
+        "saved": "記錄已上傳 Google Sheets！",
+        "analytics_title": "📈 獲利分析報表",
+        "kpi_lifetime": "生涯總獲利",
+        "kpi_sessions": "總場次",
+        "kpi_avg": "場均獲利",
+        "chip_white": "白色", "chip_red": "紅色", "chip_black": "黑色", "chip_purple": "紫色", "chip_yellow": "黃色",
+        "tab_expenses": "💸 支出明細",
+        "tab_income": "💰 收入與風控",
+        "lbl_item": "項目名稱",
+        "lbl_amount": "金額",
+        "btn_add_exp": "新增支出",
+        "lbl_rake": "抽水管理",
+        "btn_add_rake": "新增抽水",
+        "lbl_ins": "保險 / 風控管理",
+        "btn_add_ins": "手動新增金額",
+        "total_rake": "總抽水",
+        "total_ins": "總保險獲利",
+        "total_exp": "總支出",
+        "gross_income": "總營收",
+        "net_profit": "淨利潤",
+        "my_share": "我的分潤",
+        "partner_share": "股東分潤",
+        "pct_share": "主辦佔比 %",
+        "notes": "備註",
+        "reset": "重置所有資料",
+        "confirm_out": "確認結算",
+        "still_owes": "尚欠款項",
+        "ins_calc": "🧮 保險計算器",
+        "ins_bet": "玩家買保險金額",
+        "ins_outs": "補牌數 (Outs)",
+        "ins_odds": "賠率",
+        "ins_payout": "潛在賠付額",
+        "btn_win": "✅ 沒中 (莊贏收錢)",
+        "btn_loss": "❌ 中了 (莊賠付錢)",
+        "log_rake": "📜 抽水記錄",
+        "log_ins": "📉 保險流水",
+        "pay_player": "🟢 應付玩家",
+        "player_owes": "🔴 玩家回補",
+        "audit_ok": "✅ 系統平衡 (無帳差)",
+        "audit_short": "🔴 警告：帳目短缺 (少籌碼)",
+        "audit_surplus": "🟡 警告：帳目盈餘 (多籌碼)",
+        "repay": "💰 還款 (轉現金)",
+        "btn_repay": "確認還款"
+    }
+}